@@ -0,0 +1,70 @@
+"""Convert user flags to boolean
+
+Revision ID: 067febf1c16b
+Revises: 596bcffd55f5
+Create Date: 2026-10-17 13:02:47.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '067febf1c16b'
+down_revision = '596bcffd55f5'
+branch_labels = None
+depends_on = None
+
+
+FLAGS = ['is_active', 'is_superuser']
+# Valores de texto que se consideran verdaderos ('1' en SQLite, 'true'/'t' según el driver en PostgreSQL)
+TRUE_VALUES = "('1', 'true', 't', 'yes', 'y', 'on')"
+# Índice parcial de usuarios activos (PostgreSQL y SQLite), en el orden de la paginación
+ACTIVE_INDEX_COLUMNS = ['is_active', 'is_deleted', 'created_at', 'id']
+
+
+def _is_true(column: str) -> str:
+    return f"lower(trim({column})) IN {TRUE_VALUES}"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite no cambia tipos: se normaliza a 1/0 y batch recrea la tabla copiando los valores
+        for column in FLAGS:
+            op.execute(f"UPDATE users SET {column} = CASE WHEN {_is_true(column)} THEN 1 ELSE 0 END")
+        with op.batch_alter_table('users') as batch_op:
+            for column in FLAGS:
+                batch_op.alter_column(column, type_=sa.Boolean(), existing_type=sa.String(), existing_nullable=False)
+        op.create_index(
+            'ix_users_active', 'users', ACTIVE_INDEX_COLUMNS, unique=False,
+            sqlite_where=sa.text('is_active = 1 AND is_deleted = 0'),
+        )
+        return
+
+    for column in FLAGS:
+        op.alter_column(
+            'users', column, type_=sa.Boolean(), existing_type=sa.String(), existing_nullable=False,
+            postgresql_using=_is_true(column),
+        )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_users_active', 'users', ACTIVE_INDEX_COLUMNS, unique=False,
+            postgresql_where=sa.text('is_active = true AND is_deleted = false'),
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        op.drop_index('ix_users_active', table_name='users')
+    if dialect == 'sqlite':
+        with op.batch_alter_table('users') as batch_op:
+            for column in FLAGS:
+                batch_op.alter_column(column, type_=sa.String(), existing_type=sa.Boolean(), existing_nullable=False)
+        return
+
+    for column in FLAGS:
+        op.alter_column(
+            'users', column, type_=sa.String(), existing_type=sa.Boolean(), existing_nullable=False,
+            postgresql_using=f"CASE WHEN {column} THEN '1' ELSE '0' END",
+        )
@@ -0,0 +1,85 @@
+"""Add full text search on posts and comments
+
+Revision ID: 3882c10ed5a4
+Revises: 62765b528874
+Create Date: 2026-10-17 11:20:05.412870
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3882c10ed5a4'
+down_revision = '62765b528874'
+branch_labels = None
+depends_on = None
+
+
+# DDL fijado en esta revisión (equivale al de app.models.search.FullTextIndex al crearla):
+# SQLite: tablas FTS5 con contenido externo + triggers que solo indexan los registros activos
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE posts_fts USING fts5(title, content, content='posts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER posts_fts_ai AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, content) SELECT new.id, new.title, new.content WHERE new.is_deleted = 0; END",
+    "CREATE TRIGGER posts_fts_ad AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "SELECT 'delete', old.id, old.title, old.content WHERE old.is_deleted = 0; END",
+    "CREATE TRIGGER posts_fts_au AFTER UPDATE OF title, content, is_deleted ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "SELECT 'delete', old.id, old.title, old.content WHERE old.is_deleted = 0; "
+    "INSERT INTO posts_fts(rowid, title, content) SELECT new.id, new.title, new.content WHERE new.is_deleted = 0; END",
+    "INSERT INTO posts_fts(rowid, title, content) SELECT id, title, content FROM posts WHERE is_deleted = 0",
+    "CREATE VIRTUAL TABLE comments_fts USING fts5(content, content='comments', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER comments_fts_ai AFTER INSERT ON comments BEGIN "
+    "INSERT INTO comments_fts(rowid, content) SELECT new.id, new.content WHERE new.is_deleted = 0; END",
+    "CREATE TRIGGER comments_fts_ad AFTER DELETE ON comments BEGIN "
+    "INSERT INTO comments_fts(comments_fts, rowid, content) "
+    "SELECT 'delete', old.id, old.content WHERE old.is_deleted = 0; END",
+    "CREATE TRIGGER comments_fts_au AFTER UPDATE OF content, is_deleted ON comments BEGIN "
+    "INSERT INTO comments_fts(comments_fts, rowid, content) "
+    "SELECT 'delete', old.id, old.content WHERE old.is_deleted = 0; "
+    "INSERT INTO comments_fts(rowid, content) SELECT new.id, new.content WHERE new.is_deleted = 0; END",
+    "INSERT INTO comments_fts(rowid, content) SELECT id, content FROM comments WHERE is_deleted = 0",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS comments_fts_ai",
+    "DROP TRIGGER IF EXISTS comments_fts_ad",
+    "DROP TRIGGER IF EXISTS comments_fts_au",
+    "DROP TABLE IF EXISTS comments_fts",
+    "DROP TRIGGER IF EXISTS posts_fts_ai",
+    "DROP TRIGGER IF EXISTS posts_fts_ad",
+    "DROP TRIGGER IF EXISTS posts_fts_au",
+    "DROP TABLE IF EXISTS posts_fts",
+]
+
+# PostgreSQL: columna tsvector generada (indexa las filas existentes) + índice GIN parcial
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'B')) STORED",
+    "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector) WHERE is_deleted = false",
+    "ALTER TABLE comments ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'A')) STORED",
+    "CREATE INDEX ix_comments_search_vector ON comments USING gin (search_vector) WHERE is_deleted = false",
+]
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_comments_search_vector",
+    "ALTER TABLE comments DROP COLUMN IF EXISTS search_vector",
+    "DROP INDEX IF EXISTS ix_posts_search_vector",
+    "ALTER TABLE posts DROP COLUMN IF EXISTS search_vector",
+]
+
+UPGRADE = {"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRESQL_UPGRADE}
+DOWNGRADE = {"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRESQL_DOWNGRADE}
+
+
+def upgrade() -> None:
+    for statement in UPGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DOWNGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -0,0 +1,53 @@
+"""Add foreign key and soft delete indexes
+
+Revision ID: 62765b528874
+Revises: 8cd6f9888523
+Create Date: 2026-10-17 10:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '62765b528874'
+down_revision = '8cd6f9888523'
+branch_labels = None
+depends_on = None
+
+
+# Índices compuestos (todos los motores)
+COMPOSITE_INDEXES = [
+    ('ix_posts_is_deleted_created_at', 'posts', ['is_deleted', 'created_at', 'id']),
+    ('ix_posts_author_id_is_deleted_created_at', 'posts', ['author_id', 'is_deleted', 'created_at', 'id']),
+    ('ix_comments_is_deleted_created_at', 'comments', ['is_deleted', 'created_at', 'id']),
+    ('ix_comments_post_id_is_deleted_created_at', 'comments', ['post_id', 'is_deleted', 'created_at', 'id']),
+    ('ix_comments_author_id_is_deleted_created_at', 'comments', ['author_id', 'is_deleted', 'created_at', 'id']),
+    ('ix_items_is_deleted_created_at', 'items', ['is_deleted', 'created_at', 'id']),
+    ('ix_items_owner_id_is_deleted_created_at', 'items', ['owner_id', 'is_deleted', 'created_at', 'id']),
+    ('ix_post_tags_tag_id', 'post_tags', ['tag_id']),
+]
+
+# Índices parciales sobre registros activos (solo PostgreSQL)
+ACTIVE_INDEXES = [
+    ('ix_posts_author_id_active', 'posts', ['author_id', 'created_at', 'id']),
+    ('ix_comments_post_id_active', 'comments', ['post_id', 'created_at', 'id']),
+    ('ix_comments_author_id_active', 'comments', ['author_id', 'created_at', 'id']),
+    ('ix_items_owner_id_active', 'items', ['owner_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in COMPOSITE_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, columns in ACTIVE_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_where=sa.text('is_deleted = false'))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, _ in reversed(ACTIVE_INDEXES):
+            op.drop_index(name, table_name=table)
+    for name, table, _ in reversed(COMPOSITE_INDEXES):
+        op.drop_index(name, table_name=table)
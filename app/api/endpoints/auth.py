@@ -1,12 +1,15 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import authenticate_user, create_access_token
-from app.schemas.schemas import Token, UserCreate
-from app.crud.crud_user import user_crud
+from app.core.security import (
+    authenticate_user, create_token_pair, decode_access_token, decode_refresh_token,
+    get_current_active_user, get_login_user, oauth2_scheme, revoke_token
+)
+from app.models.models import User
+from app.schemas.schemas import RefreshTokenRequest, Token, UserCreate
+from app.crud.crud_user import DuplicateUserError, user_crud
 
 router = APIRouter()
 
@@ -15,7 +18,7 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
-    """Endpoint para obtener token de acceso OAuth2"""
+    """Endpoint para obtener token de acceso OAuth2 (y un refresh token)"""
     user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -23,11 +26,41 @@ async def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return create_token_pair(user.username)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    body: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtener un nuevo par de tokens con un refresh token, sin volver a enviar
+    credenciales. El refresh token usado queda revocado (rotación): reutilizarlo falla.
+    El usuario debe seguir existiendo y estar activo.
+    """
+    claims = await decode_refresh_token(db, body.refresh_token)
+    user = await get_login_user(db, claims["sub"]) if claims is not None else None
+    if user is None or not user.is_active or not await revoke_token(db, claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or revoked refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return create_token_pair(claims["sub"])
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: Optional[RefreshTokenRequest] = Body(None),
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Revocar el token de acceso actual y, si se envía, el refresh token del usuario"""
+    await revoke_token(db, decode_access_token(token))
+    if body is not None:
+        claims = await decode_refresh_token(db, body.refresh_token)
+        if claims is not None and claims["sub"] == current_user.username:
+            await revoke_token(db, claims)
 
 @router.post("/register", response_model=dict)
 async def register_user(
@@ -35,21 +68,8 @@ async def register_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Endpoint para registrar un nuevo usuario"""
-    # Verificar si el usuario ya existe
-    existing_user = await user_crud.get_user_by_username(db, user_data.username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    existing_email = await user_crud.get_user_by_email(db, user_data.email)
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Crear nuevo usuario
-    user = await user_crud.create_user(db, user_data)
+    try:
+        user = await user_crud.create_user(db, user_data)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return {"message": "User created successfully", "user_id": user.id}
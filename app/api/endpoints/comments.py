@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.core.database import get_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import datetime
+from typing import Annotated, List, Optional
+from app.core.database import get_db, get_read_db, get_read_session_factory
+from app.core.export import ExportFormat, ExportSerializer, stream_export
+from app.core.pagination import check_search_window, set_next_cursor, set_search_truncated
+from app.core.responses import typed_json_response
 from app.core.security import get_current_active_user
-from app.schemas.schemas import Comment, CommentCreate, CommentUpdate, CommentWithRelations
+from app.schemas.schemas import (
+    BULK_MAX_ITEMS, BulkIds, BulkIdsResult, BulkResult, Comment, CommentBulkUpdate, CommentCreate, CommentSearchResult, CommentUpdate, CommentWithRelations
+)
 from app.crud.crud_comment import comment_crud
 from app.models.models import User
 
 router = APIRouter()
 
+# Serializador de los listados (respuesta JSON rápida)
+_comment_list = TypeAdapter(List[Comment])
+_comment_export = ExportSerializer(Comment)
+_comment_search_list = TypeAdapter(List[CommentSearchResult])
+
 @router.post("/", response_model=Comment, status_code=status.HTTP_201_CREATED)
 async def create_comment(
     comment: CommentCreate,
@@ -18,48 +31,132 @@ async def create_comment(
     """Crear un nuevo comentario (requiere autenticación)"""
     return await comment_crud.create_comment(db=db, comment=comment, author_id=current_user.id)
 
+@router.post("/bulk", response_model=BulkResult[Comment], status_code=status.HTTP_201_CREATED)
+async def bulk_create_comments(
+    comments: Annotated[List[CommentCreate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Crear varios comentarios en una sola transacción"""
+    created, errors = await comment_crud.bulk_create_comments(db, comments, author_id=current_user.id)
+    return {"results": created, "errors": errors}
+
+@router.put("/bulk", response_model=BulkResult[Comment])
+async def bulk_update_comments(
+    comments: Annotated[List[CommentBulkUpdate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Actualizar varios comentarios en una sola transacción (solo los propios o superusuarios)"""
+    updated, errors = await comment_crud.bulk_update_comments(db, comments, author_id=None if current_user.is_superuser else current_user.id)
+    return {"results": updated, "errors": errors}
+
+@router.post("/bulk/delete", response_model=BulkIdsResult)
+async def bulk_delete_comments(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Eliminar varios comentarios (soft delete, solo los propios o superusuarios)"""
+    deleted, errors = await comment_crud.bulk_soft_delete_comments(db, bulk.ids, author_id=None if current_user.is_superuser else current_user.id)
+    return {"ids": deleted, "errors": errors}
+
+@router.post("/bulk/restore", response_model=BulkIdsResult)
+async def bulk_restore_comments(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Restaurar varios comentarios eliminados (requiere autenticación)"""
+    restored, errors = await comment_crud.bulk_restore_comments(db, bulk.ids)
+    return {"ids": restored, "errors": errors}
+
 @router.get("/", response_model=List[Comment])
 async def read_comments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener lista de comentarios (requiere autenticación)"""
-    comments = await comment_crud.get_comments(db, skip=skip, limit=limit)
-    return comments
+    comments = await comment_crud.get_multi(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, comments, limit)
+    return typed_json_response(comments, _comment_list, response)
 
 @router.get("/post/{post_id}", response_model=List[Comment])
 async def read_comments_by_post(
     post_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener comentarios de un post específico (requiere autenticación)"""
-    comments = await comment_crud.get_comments_by_post(db, post_id, skip=skip, limit=limit)
-    return comments
+    comments = await comment_crud.get_comments_by_post(db, post_id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, comments, limit)
+    return typed_json_response(comments, _comment_list, response)
 
 @router.get("/my-comments", response_model=List[Comment])
 async def read_my_comments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener comentarios del usuario actual (requiere autenticación)"""
-    comments = await comment_crud.get_comments_by_author(db, current_user.id, skip=skip, limit=limit)
+    comments = await comment_crud.get_comments_by_author(db, current_user.id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, comments, limit)
     return comments
 
+@router.get("/search", response_model=List[CommentSearchResult])
+async def search_comments(
+    response: Response,
+    q: Annotated[str, Query(min_length=1, max_length=200, description="Términos a buscar en el contenido")],
+    post_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Buscar comentarios por texto completo (opcionalmente de un post), ordenados por relevancia (requiere autenticación).
+    Solo se ordenan las SEARCH_RANK_CANDIDATES coincidencias más recientes: las más antiguas no
+    se devuelven (la respuesta lo indica con el header X-Search-Truncated) y skip + limit
+    por encima de ese límite responde 400
+    """
+    check_search_window(skip, limit)
+    comments, truncated = await comment_crud.search(db, q, skip=skip, limit=limit, filters={"post_id": post_id})
+    set_search_truncated(response, truncated)
+    return typed_json_response(comments, _comment_search_list, response)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_comments(
+    format: ExportFormat = ExportFormat.ndjson,
+    author_id: Optional[int] = None,
+    post_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exportar comentarios en NDJSON o CSV sin paginar, filtrando por autor, post y fecha de creación (requiere autenticación)"""
+    query = comment_crud.export_query({"author_id": author_id, "post_id": post_id}, created_from, created_to)
+    return stream_export(session_factory, comment_crud, query, _comment_export, format, "comments")
+
 @router.get("/{comment_id}", response_model=Comment)
 async def read_comment(
     comment_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener un comentario específico (requiere autenticación)"""
-    db_comment = await comment_crud.get_comment(db, comment_id=comment_id)
+    db_comment = await comment_crud.get(db, comment_id)
     if db_comment is None:
         raise HTTPException(status_code=404, detail="Comment not found")
     return db_comment
@@ -67,7 +164,7 @@ async def read_comment(
 @router.get("/{comment_id}/with-relations", response_model=CommentWithRelations)
 async def read_comment_with_relations(
     comment_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener un comentario con relaciones (requiere autenticación)"""
@@ -85,7 +182,7 @@ async def update_comment(
 ):
     """Actualizar un comentario (solo el autor o superusuarios)"""
     # Verificar que el comentario existe y obtener información del autor
-    db_comment = await comment_crud.get_comment(db, comment_id=comment_id)
+    db_comment = await comment_crud.get(db, comment_id)
     if db_comment is None:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -96,7 +193,7 @@ async def update_comment(
             detail="Not enough permissions"
         )
     
-    updated_comment = await comment_crud.update_comment(db, comment_id=comment_id, comment_update=comment_update)
+    updated_comment = await comment_crud.update(db, comment_id, comment_update)
     return updated_comment
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -107,7 +204,7 @@ async def delete_comment(
 ):
     """Eliminar un comentario (soft delete, solo el autor o superusuarios)"""
     # Verificar que el comentario existe y obtener información del autor
-    db_comment = await comment_crud.get_comment(db, comment_id=comment_id)
+    db_comment = await comment_crud.get(db, comment_id)
     if db_comment is None:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -118,7 +215,7 @@ async def delete_comment(
             detail="Not enough permissions"
         )
     
-    success = await comment_crud.soft_delete_comment(db, comment_id=comment_id)
+    success = await comment_crud.soft_delete(db, comment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Comment not found")
 
@@ -129,7 +226,7 @@ async def restore_comment(
     current_user: User = Depends(get_current_active_user)
 ):
     """Restaurar un comentario eliminado (requiere autenticación)"""
-    success = await comment_crud.restore_comment(db, comment_id=comment_id)
+    success = await comment_crud.restore(db, comment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Comment not found")
     return {"message": "Comment restored successfully"}
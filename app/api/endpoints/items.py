@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.core.database import get_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import datetime
+from typing import Annotated, List, Optional
+from app.core.database import get_db, get_read_db, get_read_session_factory
+from app.core.export import ExportFormat, ExportSerializer, stream_export
+from app.core.pagination import set_next_cursor
+from app.core.responses import typed_json_response
 from app.core.security import get_current_active_user
-from app.schemas.schemas import Item, ItemCreate, ItemUpdate
+from app.schemas.schemas import (
+    BULK_MAX_ITEMS, BulkIds, BulkIdsResult, BulkResult, Item, ItemBulkUpdate, ItemCreate, ItemUpdate
+)
 from app.crud.crud_item import item_crud
 from app.models.models import User as UserModel
 
 router = APIRouter()
 
+# Serializador de los listados (respuesta JSON rápida)
+_item_list = TypeAdapter(List[Item])
+_item_export = ExportSerializer(Item)
+
 @router.post("/", response_model=Item, status_code=status.HTTP_201_CREATED)
 async def create_item(
     item: ItemCreate,
@@ -18,36 +30,95 @@ async def create_item(
     """Crear un nuevo item (requiere autenticación)"""
     return await item_crud.create_item(db=db, item=item, owner_id=current_user.id)
 
+@router.post("/bulk", response_model=BulkResult[Item], status_code=status.HTTP_201_CREATED)
+async def bulk_create_items(
+    items: Annotated[List[ItemCreate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """Crear varios items en una sola transacción"""
+    created = await item_crud.bulk_create_items(db, items, owner_id=current_user.id)
+    return {"results": created, "errors": []}
+
+@router.put("/bulk", response_model=BulkResult[Item])
+async def bulk_update_items(
+    items: Annotated[List[ItemBulkUpdate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """Actualizar varios items en una sola transacción (solo los propios o superusuarios)"""
+    updated, errors = await item_crud.bulk_update_items(db, items, owner_id=None if current_user.is_superuser else current_user.id)
+    return {"results": updated, "errors": errors}
+
+@router.post("/bulk/delete", response_model=BulkIdsResult)
+async def bulk_delete_items(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """Eliminar varios items (soft delete, solo los propios o superusuarios)"""
+    deleted, errors = await item_crud.bulk_soft_delete_items(db, bulk.ids, owner_id=None if current_user.is_superuser else current_user.id)
+    return {"ids": deleted, "errors": errors}
+
+@router.post("/bulk/restore", response_model=BulkIdsResult)
+async def bulk_restore_items(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """Restaurar varios items eliminados (requiere autenticación)"""
+    restored, errors = await item_crud.bulk_restore_items(db, bulk.ids)
+    return {"ids": restored, "errors": errors}
+
 @router.get("/", response_model=List[Item])
 async def read_items(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Obtener lista de items (requiere autenticación)"""
-    items = await item_crud.get_items(db, skip=skip, limit=limit)
-    return items
+    items = await item_crud.get_multi(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, items, limit)
+    return typed_json_response(items, _item_list, response)
 
 @router.get("/my-items", response_model=List[Item])
 async def read_my_items(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Obtener items del usuario actual (requiere autenticación)"""
-    items = await item_crud.get_items_by_owner(db, owner_id=current_user.id, skip=skip, limit=limit)
+    items = await item_crud.get_items_by_owner(db, owner_id=current_user.id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, items, limit)
     return items
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_items(
+    format: ExportFormat = ExportFormat.ndjson,
+    owner_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """Exportar items en NDJSON o CSV sin paginar, filtrando por propietario y fecha de creación (requiere autenticación)"""
+    query = item_crud.export_query({"owner_id": owner_id}, created_from, created_to)
+    return stream_export(session_factory, item_crud, query, _item_export, format, "items")
+
 @router.get("/{item_id}", response_model=Item)
 async def read_item(
     item_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Obtener un item específico (requiere autenticación)"""
-    db_item = await item_crud.get_item(db, item_id=item_id)
+    db_item = await item_crud.get(db, item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
     return db_item
@@ -60,7 +131,7 @@ async def update_item(
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Actualizar un item (solo el propietario o superusuarios)"""
-    db_item = await item_crud.get_item(db, item_id)
+    db_item = await item_crud.get(db, item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -70,7 +141,7 @@ async def update_item(
             detail="Not enough permissions to update this item"
         )
     
-    updated_item = await item_crud.update_item(db, item_id=item_id, item_update=item_update)
+    updated_item = await item_crud.update(db, item_id, item_update)
     return updated_item
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -80,7 +151,7 @@ async def delete_item(
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Eliminar un item (soft delete, solo el propietario o superusuarios)"""
-    db_item = await item_crud.get_item(db, item_id)
+    db_item = await item_crud.get(db, item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -90,7 +161,7 @@ async def delete_item(
             detail="Not enough permissions to delete this item"
         )
     
-    success = await item_crud.soft_delete_item(db, item_id=item_id)
+    success = await item_crud.soft_delete(db, item_id)
     if not success:
         raise HTTPException(status_code=404, detail="Item not found during soft delete")
 
@@ -101,7 +172,7 @@ async def restore_item(
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Restaurar un item eliminado (requiere autenticación)"""
-    success = await item_crud.restore_item(db, item_id=item_id)
+    success = await item_crud.restore(db, item_id)
     if not success:
         raise HTTPException(status_code=404, detail="Item not found or not deleted")
     return {"message": "Item restored successfully"}
@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.core.database import get_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import datetime
+from typing import Annotated, List, Optional
+from app.core.database import get_db, get_read_db, get_read_session_factory
+from app.core.export import ExportFormat, ExportSerializer, stream_export
+from app.core.pagination import check_search_window, set_next_cursor, set_search_truncated
+from app.core.responses import typed_json_response
+from app.core.response_cache import response_cache
 from app.core.security import get_current_active_user
-from app.schemas.schemas import Post, PostCreate, PostUpdate, PostWithRelations
+from app.schemas.schemas import (
+    BULK_MAX_ITEMS, BulkIds, BulkIdsResult, BulkResult, Comment, Post, PostBulkUpdate, PostCreate, PostSearchResult, PostSummary, PostUpdate, PostWithRelations
+)
+from app.crud.crud_comment import comment_crud
 from app.crud.crud_post import post_crud
 from app.models.models import User
 
 router = APIRouter()
 
+# Serializadores de las respuestas cacheadas y de los listados (respuesta JSON rápida)
+_post_with_relations = TypeAdapter(PostWithRelations)
+_post_summary_list = TypeAdapter(List[PostSummary])
+_post_list = TypeAdapter(List[Post])
+_post_with_relations_list = TypeAdapter(List[PostWithRelations])
+_comment_list = TypeAdapter(List[Comment])
+_post_export = ExportSerializer(Post)
+_post_search_list = TypeAdapter(List[PostSearchResult])
+
 @router.post("/", response_model=Post, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post: PostCreate,
@@ -18,59 +37,162 @@ async def create_post(
     """Crear un nuevo post (requiere autenticación)"""
     return await post_crud.create_post(db=db, post=post, author_id=current_user.id)
 
+@router.post("/bulk", response_model=BulkResult[Post], status_code=status.HTTP_201_CREATED)
+async def bulk_create_posts(
+    posts: Annotated[List[PostCreate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Crear varios posts en una sola transacción"""
+    created = await post_crud.bulk_create_posts(db, posts, author_id=current_user.id)
+    return {"results": created, "errors": []}
+
+@router.put("/bulk", response_model=BulkResult[Post])
+async def bulk_update_posts(
+    posts: Annotated[List[PostBulkUpdate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Actualizar varios posts en una sola transacción (solo los propios o superusuarios)"""
+    updated, errors = await post_crud.bulk_update_posts(db, posts, author_id=None if current_user.is_superuser else current_user.id)
+    return {"results": updated, "errors": errors}
+
+@router.post("/bulk/delete", response_model=BulkIdsResult)
+async def bulk_delete_posts(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Eliminar varios posts (soft delete, solo los propios o superusuarios)"""
+    deleted, errors = await post_crud.bulk_soft_delete_posts(db, bulk.ids, author_id=None if current_user.is_superuser else current_user.id)
+    return {"ids": deleted, "errors": errors}
+
+@router.post("/bulk/restore", response_model=BulkIdsResult)
+async def bulk_restore_posts(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Restaurar varios posts eliminados (requiere autenticación)"""
+    restored, errors = await post_crud.bulk_restore_posts(db, bulk.ids)
+    return {"ids": restored, "errors": errors}
+
 @router.get("/", response_model=List[Post])
 async def read_posts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener lista de posts (requiere autenticación)"""
-    posts = await post_crud.get_posts(db, skip=skip, limit=limit)
-    return posts
+    posts = await post_crud.get_multi(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, posts, limit)
+    return typed_json_response(posts, _post_list, response)
 
 @router.get("/with-relations", response_model=List[PostWithRelations])
 async def read_posts_with_relations(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener posts con relaciones (requiere autenticación)"""
-    posts = await post_crud.get_posts_with_relations(db, skip=skip, limit=limit)
-    return posts
+    posts = await post_crud.get_posts_with_relations(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, posts, limit)
+    return typed_json_response(posts, _post_with_relations_list, response)
+
+@router.get("/summary", response_model=List[PostSummary])
+async def read_posts_summary(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Obtener posts con cantidad de comentarios y tags, sin cargar los comentarios (requiere autenticación)"""
+    cached = await response_cache.lookup(request, ("posts", "comments", "tags"))
+    if cached is not None:
+        return cached
+    posts = await post_crud.get_posts_summary(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, posts, limit)
+    return await response_cache.store(request, response, posts, _post_summary_list)
 
 @router.get("/my-posts", response_model=List[Post])
 async def read_my_posts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener posts del usuario actual (requiere autenticación)"""
-    posts = await post_crud.get_posts_by_author(db, current_user.id, skip=skip, limit=limit)
+    posts = await post_crud.get_posts_by_author(db, current_user.id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, posts, limit)
     return posts
 
 @router.get("/author/{author_id}", response_model=List[Post])
 async def read_posts_by_author(
     author_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener posts de un autor específico (requiere autenticación)"""
-    posts = await post_crud.get_posts_by_author(db, author_id, skip=skip, limit=limit)
+    posts = await post_crud.get_posts_by_author(db, author_id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, posts, limit)
     return posts
 
+@router.get("/search", response_model=List[PostSearchResult])
+async def search_posts(
+    response: Response,
+    q: Annotated[str, Query(min_length=1, max_length=200, description="Términos a buscar en título y contenido")],
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Buscar posts por texto completo, ordenados por relevancia y con fragmentos resaltados (requiere autenticación).
+    Solo se ordenan las SEARCH_RANK_CANDIDATES coincidencias más recientes: las más antiguas no
+    se devuelven (la respuesta lo indica con el header X-Search-Truncated) y skip + limit
+    por encima de ese límite responde 400
+    """
+    check_search_window(skip, limit)
+    posts, truncated = await post_crud.search(db, q, skip=skip, limit=limit)
+    set_search_truncated(response, truncated)
+    return typed_json_response(posts, _post_search_list, response)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_posts(
+    format: ExportFormat = ExportFormat.ndjson,
+    author_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exportar posts en NDJSON o CSV sin paginar, filtrando por autor y fecha de creación (requiere autenticación)"""
+    query = post_crud.export_query({"author_id": author_id}, created_from, created_to)
+    return stream_export(session_factory, post_crud, query, _post_export, format, "posts")
+
 @router.get("/{post_id}", response_model=Post)
 async def read_post(
     post_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener un post específico (requiere autenticación)"""
-    db_post = await post_crud.get_post(db, post_id=post_id)
+    db_post = await post_crud.get(db, post_id)
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
     return db_post
@@ -78,14 +200,34 @@ async def read_post(
 @router.get("/{post_id}/with-relations", response_model=PostWithRelations)
 async def read_post_with_relations(
     post_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener un post con todas sus relaciones (requiere autenticación)"""
+    cached = await response_cache.lookup(request, ("posts", "comments", "tags", "users"))
+    if cached is not None:
+        return cached
     db_post = await post_crud.get_post_with_relations(db, post_id=post_id)
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    return db_post
+    return await response_cache.store(request, response, db_post, _post_with_relations)
+
+@router.get("/{post_id}/comments", response_model=List[Comment])
+async def read_post_comments(
+    post_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Obtener los comentarios de un post paginados (requiere autenticación)"""
+    comments = await comment_crud.get_comments_by_post(db, post_id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, comments, limit)
+    return typed_json_response(comments, _comment_list, response)
 
 @router.put("/{post_id}", response_model=Post)
 async def update_post(
@@ -96,7 +238,7 @@ async def update_post(
 ):
     """Actualizar un post (solo el autor o superusuarios)"""
     # Verificar que el post existe y obtener información del autor
-    db_post = await post_crud.get_post(db, post_id=post_id)
+    db_post = await post_crud.get(db, post_id)
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -107,7 +249,7 @@ async def update_post(
             detail="Not enough permissions"
         )
     
-    updated_post = await post_crud.update_post(db, post_id=post_id, post_update=post_update)
+    updated_post = await post_crud.update(db, post_id, post_update)
     return updated_post
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -118,7 +260,7 @@ async def delete_post(
 ):
     """Eliminar un post (soft delete, solo el autor o superusuarios)"""
     # Verificar que el post existe y obtener información del autor
-    db_post = await post_crud.get_post(db, post_id=post_id)
+    db_post = await post_crud.get(db, post_id)
     if db_post is None:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -129,7 +271,7 @@ async def delete_post(
             detail="Not enough permissions"
         )
     
-    success = await post_crud.soft_delete_post(db, post_id=post_id)
+    success = await post_crud.soft_delete(db, post_id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -140,7 +282,7 @@ async def restore_post(
     current_user: User = Depends(get_current_active_user)
 ):
     """Restaurar un post eliminado (requiere autenticación)"""
-    success = await post_crud.restore_post(db, post_id=post_id)
+    success = await post_crud.restore(db, post_id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found")
     return {"message": "Post restored successfully"}
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.core.database import get_db
+from typing import Annotated, List, Optional
+from app.core.database import get_db, get_read_db
+from app.core.pagination import set_next_cursor
+from app.core.response_cache import response_cache
 from app.core.security import get_current_active_user, get_current_superuser
-from app.schemas.schemas import Tag, TagCreate, TagUpdate
+from app.schemas.schemas import (
+    BULK_MAX_ITEMS, BulkIds, BulkIdsResult, BulkResult, Tag, TagBulkUpdate, TagCreate, TagUpdate
+)
 from app.crud.crud_tag import tag_crud
 from app.models.models import User
 
 router = APIRouter()
 
+# Serializador de las respuestas cacheadas
+_tag_list = TypeAdapter(List[Tag])
+
 @router.post("/", response_model=Tag, status_code=status.HTTP_201_CREATED)
 async def create_tag(
     tag: TagCreate,
@@ -26,36 +34,90 @@ async def create_tag(
     
     return await tag_crud.create_tag(db=db, tag=tag)
 
+@router.post("/bulk", response_model=BulkResult[Tag], status_code=status.HTTP_201_CREATED)
+async def bulk_create_tags(
+    tags: Annotated[List[TagCreate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Crear varios tags en una sola transacción"""
+    created, errors = await tag_crud.bulk_create_tags(db, tags)
+    return {"results": created, "errors": errors}
+
+@router.put("/bulk", response_model=BulkResult[Tag])
+async def bulk_update_tags(
+    tags: Annotated[List[TagBulkUpdate], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Actualizar varios tags en una sola transacción (solo superusuarios)"""
+    updated, errors = await tag_crud.bulk_update_tags(db, tags)
+    return {"results": updated, "errors": errors}
+
+@router.post("/bulk/delete", response_model=BulkIdsResult)
+async def bulk_delete_tags(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Eliminar varios tags (soft delete, solo superusuarios)"""
+    deleted, errors = await tag_crud.bulk_soft_delete_tags(db, bulk.ids)
+    return {"ids": deleted, "errors": errors}
+
+@router.post("/bulk/restore", response_model=BulkIdsResult)
+async def bulk_restore_tags(
+    bulk: BulkIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Restaurar varios tags eliminados (solo superusuarios)"""
+    restored, errors = await tag_crud.bulk_restore_tags(db, bulk.ids)
+    return {"ids": restored, "errors": errors}
+
 @router.get("/", response_model=List[Tag])
 async def read_tags(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener lista de tags (requiere autenticación)"""
-    tags = await tag_crud.get_tags(db, skip=skip, limit=limit)
-    return tags
+    cached = await response_cache.lookup(request, ("tags",))
+    if cached is not None:
+        return cached
+    tags = await tag_crud.get_multi(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, tags, limit)
+    return await response_cache.store(request, response, tags, _tag_list)
 
 @router.get("/with-posts", response_model=List[Tag])
 async def read_tags_with_posts(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener tags con posts (requiere autenticación)"""
-    tags = await tag_crud.get_tags_with_posts(db, skip=skip, limit=limit)
-    return tags
+    cached = await response_cache.lookup(request, ("tags", "posts"))
+    if cached is not None:
+        return cached
+    tags = await tag_crud.get_tags_with_posts(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, tags, limit)
+    return await response_cache.store(request, response, tags, _tag_list)
 
 @router.get("/{tag_id}", response_model=Tag)
 async def read_tag(
     tag_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener un tag específico (requiere autenticación)"""
-    db_tag = await tag_crud.get_tag(db, tag_id=tag_id)
+    db_tag = await tag_crud.get(db, tag_id)
     if db_tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
     return db_tag
@@ -63,7 +125,7 @@ async def read_tag(
 @router.get("/{tag_id}/with-posts", response_model=Tag)
 async def read_tag_with_posts(
     tag_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener un tag con sus posts (requiere autenticación)"""
@@ -80,7 +142,7 @@ async def update_tag(
     current_user: User = Depends(get_current_superuser)
 ):
     """Actualizar un tag (solo superusuarios)"""
-    db_tag = await tag_crud.update_tag(db, tag_id=tag_id, tag_update=tag_update)
+    db_tag = await tag_crud.update(db, tag_id, tag_update)
     if db_tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
     return db_tag
@@ -92,7 +154,7 @@ async def delete_tag(
     current_user: User = Depends(get_current_superuser)
 ):
     """Eliminar un tag (soft delete, solo superusuarios)"""
-    success = await tag_crud.soft_delete_tag(db, tag_id=tag_id)
+    success = await tag_crud.soft_delete(db, tag_id)
     if not success:
         raise HTTPException(status_code=404, detail="Tag not found")
 
@@ -103,18 +165,21 @@ async def restore_tag(
     current_user: User = Depends(get_current_superuser)
 ):
     """Restaurar un tag eliminado (solo superusuarios)"""
-    success = await tag_crud.restore_tag(db, tag_id=tag_id)
+    success = await tag_crud.restore(db, tag_id)
     if not success:
         raise HTTPException(status_code=404, detail="Tag not found")
     return {"message": "Tag restored successfully"}
 
 @router.get("/deleted/list", response_model=List[Tag])
 async def read_deleted_tags(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_superuser)
 ):
     """Obtener tags eliminados (solo superusuarios)"""
-    tags = await tag_crud.get_deleted_tags(db, skip=skip, limit=limit)
+    tags = await tag_crud.get_deleted(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, tags, limit)
     return tags
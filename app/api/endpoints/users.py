@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, get_read_db
+from app.core.pagination import set_next_cursor
+from app.core.response_cache import response_cache
 from app.core.security import get_current_active_user, get_current_superuser
 from app.schemas.schemas import User, UserCreate, UserUpdate, UserWithPosts
-from app.crud.crud_user import user_crud
+from app.crud.crud_user import DuplicateUserError, user_crud
 from app.models.models import User as UserModel
 
 router = APIRouter()
 
+# Serializador de las respuestas cacheadas
+_user_with_posts_list = TypeAdapter(List[UserWithPosts])
+
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user: UserCreate, 
@@ -16,53 +22,52 @@ async def create_user(
     current_user: UserModel = Depends(get_current_superuser)
 ):
     """Crear un nuevo usuario (solo superusuarios)"""
-    # Verificar si el usuario ya existe
-    existing_user = await user_crud.get_user_by_username(db, user.username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    existing_email = await user_crud.get_user_by_email(db, user.email)
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    return await user_crud.create_user(db=db, user=user)
+    try:
+        return await user_crud.create_user(db=db, user=user)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/", response_model=List[User])
 async def read_users(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    """Obtener lista de usuarios (requiere autenticación)"""
-    users = await user_crud.get_users(db, skip=skip, limit=limit)
+    """Obtener lista de usuarios, opcionalmente solo activos o inactivos (requiere autenticación)"""
+    users = await user_crud.get_users(db, skip=skip, limit=limit, after=after, is_active=is_active)
+    set_next_cursor(response, users, limit)
     return users
 
 @router.get("/with-posts", response_model=List[UserWithPosts])
 async def read_users_with_posts(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    """Obtener usuarios con sus posts (requiere autenticación)"""
-    users = await user_crud.get_users_with_posts(db, skip=skip, limit=limit)
-    return users
+    """Obtener usuarios con sus posts, comentarios e items (requiere autenticación)"""
+    cached = await response_cache.lookup(request, ("users", "posts", "comments", "items"))
+    if cached is not None:
+        return cached
+    users = await user_crud.get_users_with_posts(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, users, limit)
+    return await response_cache.store(request, response, users, _user_with_posts_list)
 
 @router.get("/{user_id}", response_model=User)
 async def read_user(
     user_id: int, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Obtener un usuario específico (requiere autenticación)"""
-    db_user = await user_crud.get_user(db, user_id=user_id)
+    db_user = await user_crud.get(db, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -82,7 +87,7 @@ async def update_user(
             detail="Not enough permissions"
         )
     
-    db_user = await user_crud.update_user(db, user_id=user_id, user_update=user_update)
+    db_user = await user_crud.update(db, user_id, user_update)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -94,7 +99,7 @@ async def delete_user(
     current_user: UserModel = Depends(get_current_superuser)
 ):
     """Eliminar un usuario (soft delete, solo superusuarios)"""
-    success = await user_crud.soft_delete_user(db, user_id=user_id)
+    success = await user_crud.soft_delete(db, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -105,18 +110,21 @@ async def restore_user(
     current_user: UserModel = Depends(get_current_superuser)
 ):
     """Restaurar un usuario eliminado (solo superusuarios)"""
-    success = await user_crud.restore_user(db, user_id=user_id)
+    success = await user_crud.restore(db, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User restored successfully"}
 
 @router.get("/deleted/list", response_model=List[User])
 async def read_deleted_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_superuser)
 ):
     """Obtener usuarios eliminados (solo superusuarios)"""
-    users = await user_crud.get_deleted_users(db, skip=skip, limit=limit)
+    users = await user_crud.get_deleted(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, users, limit)
     return users
\ No newline at end of file
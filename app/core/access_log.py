@@ -0,0 +1,153 @@
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO
+import structlog
+from app.core.config import settings
+
+_STOP = object()
+
+
+def _format_timestamp(logger, method_name, event_dict):
+    """Convierte el timestamp epoch capturado en el request a ISO 8601"""
+    event_dict["timestamp"] = datetime.fromtimestamp(event_dict["timestamp"], tz=timezone.utc).isoformat()
+    return event_dict
+
+
+def _parse_level(name: str) -> int:
+    """Nivel numérico de logging para su nombre (DEBUG, INFO, ...)"""
+    level = logging.getLevelName(name.upper())
+    # Para un nombre desconocido getLevelName devuelve el texto "Level <nombre>"
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown access log level: {name!r}")
+    return level
+
+
+class AccessLogger:
+    """
+    Access log estructurado y no bloqueante.
+    El event loop solo encola un diccionario; un hilo en segundo plano lo
+    renderiza como una línea JSON (procesadores de structlog) y lo escribe.
+    """
+
+    def __init__(
+        self,
+        level: str = "INFO",
+        sample_rate: float = 1.0,
+        path_levels: Optional[Dict[str, str]] = None,
+        queue_size: int = 10000,
+        stream: TextIO = sys.stdout,
+    ):
+        self.level = _parse_level(level)
+        self.sample_rate = sample_rate
+        # Prefijos ordenados de más largo a más corto para que gane el más específico
+        self.path_levels = sorted(
+            ((prefix, _parse_level(lvl)) for prefix, lvl in (path_levels or {}).items()),
+            key=lambda entry: len(entry[0]),
+            reverse=True,
+        )
+        self.stream = stream
+        self.dropped = 0
+        self.write_errors = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._processors = [_format_timestamp, structlog.processors.JSONRenderer()]
+        self._thread: Optional[threading.Thread] = None
+
+    def _level_for(self, path: str, status_code: int) -> int:
+        if status_code >= 500:
+            return logging.ERROR
+        if status_code >= 400:
+            return logging.WARNING
+        for prefix, level in self.path_levels:
+            if path.startswith(prefix):
+                return level
+        return logging.INFO
+
+    def log_request(self, status_code: int, path: str, **fields) -> None:
+        """Registra un request aplicando nivel por ruta y muestreo"""
+        level = self._level_for(path, status_code)
+        if level < self.level:
+            return
+        # Los errores se registran siempre; el resto según la tasa de muestreo
+        if level < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.emit(level, "request", status=status_code, path=path, **fields)
+
+    def emit(self, level: int, event: str, **fields) -> None:
+        """Encola un evento sin bloquear; si la cola está llena se descarta"""
+        if self._thread is None:
+            self.start()
+        fields["timestamp"] = fields.get("timestamp") or datetime.now(timezone.utc).timestamp()
+        fields["level"] = logging.getLevelName(level).lower()
+        fields["event"] = event
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def _render(self, event_dict: dict) -> str:
+        for processor in self._processors:
+            event_dict = processor(None, event_dict["level"], event_dict)
+        return event_dict
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Agrupar lo que ya esté encolado en una sola escritura
+            while item is not _STOP and len(batch) < 512:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            lines = [self._render(event) for event in batch if event is not _STOP]
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception as e:
+                    # El hilo no debe morir por un stream roto: se cuentan las líneas perdidas
+                    # y solo el primer error se informa, para no inundar stderr
+                    first_error = not self.write_errors
+                    self.write_errors += len(lines)
+                    if first_error:
+                        self._report(e)
+            if batch[-1] is _STOP:
+                return
+
+    @staticmethod
+    def _report(error: Exception) -> None:
+        try:
+            print(f"access log: write failed, dropping lines ({error!r})", file=sys.stderr, flush=True)
+        except Exception:
+            pass
+
+    def get_stats(self) -> dict:
+        """Líneas descartadas con la cola llena, perdidas al escribir y pendientes"""
+        return {"dropped": self.dropped, "write_errors": self.write_errors, "queued": self._queue.qsize()}
+
+    def start(self) -> None:
+        """Inicia el hilo escritor"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Vacía la cola y detiene el hilo escritor"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+access_logger = AccessLogger(
+    level=settings.ACCESS_LOG_LEVEL,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    path_levels=settings.ACCESS_LOG_PATH_LEVELS,
+    queue_size=settings.ACCESS_LOG_QUEUE_SIZE,
+)
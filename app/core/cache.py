@@ -0,0 +1,111 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.core.config import settings
+
+
+class TTLCache:
+    """Cache LRU en memoria con expiración por entrada"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtiene un valor si existe y no ha expirado"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Guarda un valor, desalojando el menos usado si se supera el tamaño"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Elimina una entrada si existe"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Vacía la cache"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCacheBackend:
+    """Backend de cache local al proceso (un worker)"""
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        self.namespace = namespace
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheBackend:
+    """
+    Backend de cache compartido entre workers usando Redis.
+    Los valores se serializan como JSON; requiere el paquete `redis`.
+    """
+
+    def __init__(self, namespace: str, url: str, ttl: float):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requiere instalar el paquete 'redis'") from e
+        self.namespace = namespace
+        self.ttl = ttl
+        self._client = aioredis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        await self._client.set(self._key(key), json.dumps(value), px=int(self.ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self._key(key))
+
+    async def clear(self) -> None:
+        async for key in self._client.scan_iter(match=f"{self.namespace}:*"):
+            await self._client.delete(key)
+
+
+def build_cache_backend(namespace: str, maxsize: int, ttl: float):
+    """Crea el backend de cache configurado en settings.CACHE_BACKEND"""
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requiere configurar REDIS_URL")
+        return RedisCacheBackend(namespace, settings.REDIS_URL, ttl)
+    return MemoryCacheBackend(namespace, maxsize, ttl)
@@ -1,26 +1,200 @@
+import itertools
+import time
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.cache import build_cache_backend
 from app.core.config import settings
+from app.core.metrics import Histogram, prometheus_histogram_lines
+from app.core.tokens import ACCESS_TOKEN_TYPE, decode_access_token
+
+# Drivers asíncronos por defecto para cada backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def build_async_url(database_url: str) -> URL:
+    """Convierte la URL configurada a su variante con driver asíncrono"""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+# Tiempo de espera para obtener una conexión del pool
+pool_wait_histogram = Histogram()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool de conexiones que mide la espera en cada checkout"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_histogram.record(time.perf_counter() - start)
+
+def _engine_options(url: URL) -> dict:
+    """Opciones del motor según el backend configurado"""
+    options = {"echo": settings.DB_ECHO}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # SQLite en memoria usa una única conexión (StaticPool por defecto)
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        connect_args = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        options["connect_args"] = connect_args
+    return options
+
+database_url = build_async_url(settings.DATABASE_URL)
 
 # Crear motor asíncrono
-engine = create_async_engine(
-    settings.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://").replace("postgresql://", "postgresql+asyncpg://"),
-    echo=True  # Para debug, quitar en producción
-)
+engine = create_async_engine(database_url, **_engine_options(database_url))
 
 # Crear sesión asíncrona
 AsyncSessionLocal = async_sessionmaker(
-    engine, 
-    class_=AsyncSession, 
+    engine,
+    class_=AsyncSession,
     expire_on_commit=False
 )
 
 Base = declarative_base()
 
-# Dependency para obtener la sesión asíncrona de la base de datos
-async def get_db():
+class ReplicaSet:
+    """Réplicas de lectura con balanceo round-robin o por menor uso del pool"""
+
+    def __init__(self, urls: List[str], balancing: str = "round_robin"):
+        self.engines = []
+        self.sessions = []
+        for url in urls:
+            replica_url = build_async_url(url)
+            replica_engine = create_async_engine(replica_url, **_engine_options(replica_url))
+            self.engines.append(replica_engine)
+            self.sessions.append(async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False))
+        self.balancing = balancing
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.sessions)
+
+    def choose(self) -> async_sessionmaker:
+        """Elige la réplica para la próxima sesión de lectura"""
+        if self.balancing == "least_busy":
+            pools = [replica.sync_engine.pool for replica in self.engines]
+            if all(isinstance(pool, AsyncAdaptedQueuePool) for pool in pools):
+                index = min(range(len(pools)), key=lambda i: pools[i].checkedout())
+                return self.sessions[index]
+        return self.sessions[next(self._counter) % len(self.sessions)]
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+replicas = ReplicaSet(settings.DATABASE_REPLICA_URLS, settings.DB_REPLICA_BALANCING)
+
+# Usuarios que escribieron recientemente: sus lecturas van al primario (read-your-writes)
+recent_writers = build_cache_backend(
+    "read-your-writes",
+    maxsize=settings.DB_READ_YOUR_WRITES_MAX_SIZE,
+    ttl=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+
+def _request_subject(request: Request) -> Optional[str]:
+    """
+    Subject del token de acceso Bearer del request si su firma es válida: un
+    token falsificado no puede fijar lecturas ajenas al primario ni llenar
+    recent_writers. La verificación queda en cache para get_current_user
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    claims = decode_access_token(token)
+    # Los tokens sin tipo son anteriores a los refresh tokens y valen como acceso
+    if claims is None or claims.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+        return None
+    return claims.get("sub")
+
+def _pool_stats(pool) -> dict:
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"pool": type(pool).__name__}
+    capacity = pool.size() + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "utilization": round(checked_out / capacity, 4) if capacity else 0,
+    }
+
+def get_pool_stats() -> dict:
+    """Obtener uso del pool de conexiones y tiempos de espera de checkout"""
+    stats = _pool_stats(engine.sync_engine.pool)
+    if "checked_out" in stats:
+        stats["checkout_wait"] = pool_wait_histogram.summary()
+    if replicas:
+        stats["replicas"] = [_pool_stats(replica.sync_engine.pool) for replica in replicas.engines]
+    return stats
+
+def get_pool_prometheus() -> str:
+    """Métricas del pool de conexiones en formato de texto de Prometheus"""
+    stats = get_pool_stats()
+    if "checked_out" not in stats:
+        return ""
+    lines = [
+        "# HELP db_pool_checked_out Conexiones del pool en uso.",
+        "# TYPE db_pool_checked_out gauge",
+        f"db_pool_checked_out {stats['checked_out']}",
+        "# HELP db_pool_utilization Fracción de la capacidad del pool en uso.",
+        "# TYPE db_pool_utilization gauge",
+        f"db_pool_utilization {stats['utilization']}",
+        "# HELP db_pool_checkout_wait_seconds Espera para obtener una conexión del pool.",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+    ]
+    lines.extend(prometheus_histogram_lines("db_pool_checkout_wait_seconds", "", pool_wait_histogram))
+    return "\n".join(lines) + "\n"
+
+# Dependency para obtener la sesión asíncrona de la base de datos (primario)
+async def get_db(request: Request):
+    if replicas and request.method not in ("GET", "HEAD", "OPTIONS"):
+        subject = _request_subject(request)
+        if subject:
+            await recent_writers.set(subject, True)
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+# Dependency que elige la base de lectura: una réplica salvo que el usuario haya escrito hace poco.
+# Las respuestas en streaming la usan para abrir su propia sesión, ya que las
+# dependencias con yield se cierran antes de enviar el cuerpo
+async def get_read_session_factory(request: Request) -> async_sessionmaker:
+    if replicas:
+        subject = _request_subject(request)
+        if not subject or not await recent_writers.get(subject):
+            return replicas.choose()
+    return AsyncSessionLocal
+
+# Dependency de solo lectura
+async def get_read_db(request: Request):
+    session_factory = await get_read_session_factory(request)
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
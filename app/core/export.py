@@ -0,0 +1,77 @@
+import csv
+import io
+from enum import Enum
+from typing import Sequence, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+class ExportSerializer:
+    """
+    Serializa lotes de filas con el esquema de respuesta del endpoint, de modo
+    que la exportación tenga los mismos campos y formatos que la API JSON
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.adapter = TypeAdapter(schema)
+        self.fieldnames = list(schema.model_fields)
+
+    def ndjson(self, rows: Sequence[RowMapping]) -> bytes:
+        adapter = self.adapter
+        return b"".join(adapter.dump_json(adapter.validate_python(row)) + b"\n" for row in rows)
+
+    def csv_header(self) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.fieldnames)
+        return buffer.getvalue().encode()
+
+    def csv(self, rows: Sequence[RowMapping]) -> bytes:
+        adapter = self.adapter
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, self.fieldnames, extrasaction="ignore")
+        writer.writerows(adapter.dump_python(adapter.validate_python(row), mode="json") for row in rows)
+        return buffer.getvalue().encode()
+
+
+def stream_export(
+    session_factory: async_sessionmaker,
+    crud,
+    query,
+    serializer: ExportSerializer,
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Respuesta que envía la exportación de `query` a medida que `crud.stream_rows`
+    lee los lotes (EXPORT_BATCH_SIZE filas cada uno). La sesión se abre dentro
+    del generador: vive mientras dure el envío y se cierra al terminar o si el
+    cliente corta la conexión.
+    """
+    async def body():
+        if format == ExportFormat.csv:
+            yield serializer.csv_header()
+        encode = serializer.csv if format == ExportFormat.csv else serializer.ndjson
+        async with session_factory() as session:
+            async for batch in crud.stream_rows(session, query, settings.EXPORT_BATCH_SIZE):
+                yield encode(batch)
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format.value}"'},
+    )
+
@@ -0,0 +1,298 @@
+import glob
+import json
+import math
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+
+# Buckets log-espaciados (cuarto de octava, ~19% de error relativo) desde 100 µs.
+# Son fijos para que histogramas de distintos workers se puedan sumar.
+BUCKET_BASE = 0.0001
+BUCKET_FACTOR = 2 ** 0.25
+BUCKET_COUNT = 81
+BUCKET_BOUNDS = [BUCKET_BASE * BUCKET_FACTOR ** i for i in range(BUCKET_COUNT)]
+# Para Prometheus se exporta un bucket por octava (subconjunto exacto de los anteriores)
+PROMETHEUS_BUCKET_INDEXES = list(range(12, 72, 4))
+
+
+def bucket_index(seconds: float) -> int:
+    """Índice del bucket que contiene la duración (BUCKET_COUNT = desborde)"""
+    if seconds <= BUCKET_BASE:
+        return 0
+    index = math.ceil(math.log(seconds / BUCKET_BASE, BUCKET_FACTOR) - 1e-9)
+    return min(index, BUCKET_COUNT)
+
+
+class Histogram:
+    """Histograma de latencias con buckets dispersos"""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        index = bucket_index(seconds)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "Histogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Percentil aproximado (límite superior del bucket, acotado por el máximo)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                if index >= BUCKET_COUNT:
+                    return self.max
+                return min(BUCKET_BOUNDS[index], self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 6) if self.count else 0,
+            "p50": round(self.percentile(0.50), 6),
+            "p95": round(self.percentile(0.95), 6),
+            "p99": round(self.percentile(0.99), 6),
+            "max": round(self.max, 6),
+        }
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "count": self.count, "sum": self.sum, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.max = data["max"]
+        return histogram
+
+
+def _key(method: str, route: str, status: int) -> str:
+    return f"{method} {route} {status}"
+
+
+def _split_key(key: str) -> Tuple[str, str, int]:
+    method, route, status = key.split(" ")
+    return method, route, int(status)
+
+
+class RequestMetrics:
+    """
+    Métricas de latencia por ruta y status del worker actual.
+    Mantiene histogramas acumulados y ventanas deslizantes formadas por
+    intervalos (slots) alineados al epoch, y un buffer acotado de requests lentos.
+    """
+
+    def __init__(
+        self,
+        windows: Iterable[int] = (60, 300, 900),
+        slot_seconds: int = 10,
+        slow_threshold: float = 1.0,
+        slow_max: int = 100,
+        stale_seconds: float = 30.0,
+    ):
+        self.windows = sorted(windows)
+        self.slot_seconds = slot_seconds
+        self.max_slots = math.ceil(self.windows[-1] / slot_seconds) + 1
+        self.slow_threshold = slow_threshold
+        self.stale_seconds = stale_seconds
+        self.request_count = 0
+        self.total_time = 0.0
+        self.slow_requests: deque = deque(maxlen=slow_max)
+        self.totals: Dict[str, Histogram] = {}
+        self.slots: Dict[int, Dict[str, Histogram]] = {}
+
+    def record(self, method: str, route: str, status: int, seconds: float) -> None:
+        """Registra la duración de un request"""
+        now = time.time()
+        key = _key(method, route, status)
+        slot = int(now // self.slot_seconds)
+        slot_histograms = self.slots.get(slot)
+        if slot_histograms is None:
+            slot_histograms = self.slots[slot] = {}
+            self._prune(slot)
+        for histograms in (slot_histograms, self.totals):
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram()
+            histogram.record(seconds)
+        self.request_count += 1
+        self.total_time += seconds
+        if seconds > self.slow_threshold:
+            self.slow_requests.append({
+                "path": route,
+                "method": method,
+                "status": status,
+                "time": seconds,
+                "timestamp": datetime.fromtimestamp(now).isoformat()
+            })
+
+    def _prune(self, current_slot: int) -> None:
+        oldest = current_slot - self.max_slots
+        for slot in [slot for slot in self.slots if slot <= oldest]:
+            del self.slots[slot]
+
+    def snapshot(self) -> dict:
+        """Estado serializable del worker, apto para combinar con otros workers"""
+        return {
+            "pid": os.getpid(),
+            "updated_at": time.time(),
+            "request_count": self.request_count,
+            "total_time": self.total_time,
+            "slow_requests": list(self.slow_requests),
+            "totals": {key: h.to_dict() for key, h in self.totals.items()},
+            "slots": {
+                str(slot): {key: h.to_dict() for key, h in histograms.items()}
+                for slot, histograms in self.slots.items()
+            },
+        }
+
+    def flush(self, directory: str, snapshot: Optional[dict] = None) -> None:
+        """
+        Escribe el snapshot del worker de forma atómica en el directorio compartido.
+        Desde otro hilo hay que pasar el `snapshot` tomado en el event loop: los
+        histogramas cambian con cada request
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"worker-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot if snapshot is not None else self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self, directory: Optional[str] = None, snapshot: Optional[dict] = None) -> List[dict]:
+        """
+        Snapshots del worker actual (`snapshot`, como en flush) y, si hay
+        directorio compartido, del resto. Los que no se actualizan hace más de
+        stale_seconds son de workers terminados o reiniciados: se borran para
+        no sumarlos para siempre
+        """
+        snapshots = [snapshot if snapshot is not None else self.snapshot()]
+        if directory:
+            own = f"worker-{os.getpid()}.json"
+            oldest = time.time() - self.stale_seconds
+            for path in glob.glob(os.path.join(directory, "worker-*.json")):
+                if os.path.basename(path) == own:
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                    if snapshot["updated_at"] < oldest:
+                        os.remove(path)
+                        continue
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                snapshots.append(snapshot)
+        return snapshots
+
+    def get_stats(self, snapshots: Optional[List[dict]] = None) -> dict:
+        """Obtener estadísticas agregadas (p50/p95/p99/max por ventana)"""
+        snapshots = snapshots if snapshots is not None else [self.snapshot()]
+        now_slot = int(time.time() // self.slot_seconds)
+        request_count = sum(s["request_count"] for s in snapshots)
+        total_time = sum(s["total_time"] for s in snapshots)
+        slow_requests = sorted(
+            (r for s in snapshots for r in s["slow_requests"]),
+            key=lambda r: r["timestamp"]
+        )
+
+        routes: Dict[str, dict] = {}
+        for key, histogram in _merge(s["totals"] for s in snapshots).items():
+            method, route, status = _split_key(key)
+            routes[key] = {"method": method, "route": route, "status": status, "total": histogram.summary(), "windows": {}}
+        for window in self.windows:
+            first_slot = now_slot - math.ceil(window / self.slot_seconds) + 1
+            merged = _merge(
+                histograms
+                for s in snapshots
+                for slot, histograms in s["slots"].items()
+                if int(slot) >= first_slot
+            )
+            for key, entry in routes.items():
+                entry["windows"][f"{window}s"] = (merged.get(key) or Histogram()).summary()
+
+        return {
+            "workers": len(snapshots),
+            "total_requests": request_count,
+            "total_time": round(total_time, 4),
+            "average_time": round(total_time / request_count, 4) if request_count > 0 else 0,
+            "slow_requests_count": len(slow_requests),
+            "slow_requests": slow_requests[-10:],  # Últimos 10 requests lentos
+            "routes": sorted(routes.values(), key=lambda r: (r["route"], r["method"], r["status"])),
+        }
+
+    def prometheus(self, snapshots: Optional[List[dict]] = None) -> str:
+        """Exporta los histogramas acumulados en formato de texto de Prometheus"""
+        snapshots = snapshots if snapshots is not None else [self.snapshot()]
+        name = "http_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Duración de los requests HTTP por ruta y status.",
+            f"# TYPE {name} histogram",
+        ]
+        for key, histogram in sorted(_merge(s["totals"] for s in snapshots).items()):
+            method, route, status = _split_key(key)
+            labels = f'method="{method}",route="{route}",status="{status}"'
+            lines.extend(prometheus_histogram_lines(name, labels, histogram))
+        return "\n".join(lines) + "\n"
+
+
+def prometheus_histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    """Líneas _bucket/_sum/_count de un histograma en formato Prometheus"""
+    prefix = f"{labels}," if labels else ""
+    suffix = f"{{{labels}}}" if labels else ""
+    lines = []
+    cumulative = 0
+    indexes = sorted(histogram.counts)
+    position = 0
+    for bucket in PROMETHEUS_BUCKET_INDEXES:
+        while position < len(indexes) and indexes[position] <= bucket:
+            cumulative += histogram.counts[indexes[position]]
+            position += 1
+        lines.append(f'{name}_bucket{{{prefix}le="{BUCKET_BOUNDS[bucket]:.6g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{suffix} {histogram.sum}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+def _merge(sources: Iterable[Dict[str, dict]]) -> Dict[str, Histogram]:
+    merged: Dict[str, Histogram] = {}
+    for histograms in sources:
+        for key, data in histograms.items():
+            histogram = Histogram.from_dict(data)
+            if key in merged:
+                merged[key].merge(histogram)
+            else:
+                merged[key] = histogram
+    return merged
+
+
+request_metrics = RequestMetrics(
+    windows=settings.METRICS_WINDOWS_SECONDS,
+    slot_seconds=settings.METRICS_SLOT_SECONDS,
+    slow_threshold=settings.METRICS_SLOW_REQUEST_SECONDS,
+    slow_max=settings.METRICS_SLOW_REQUESTS_MAX,
+    stale_seconds=settings.METRICS_STALE_SECONDS,
+)
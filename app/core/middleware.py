@@ -1,10 +1,12 @@
 import logging
 import sys
-from datetime import datetime
-from fastapi import Request, HTTPException
+from fastapi import HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.access_log import access_logger
+from app.core.config import settings
+from app.core.metrics import request_metrics
 import time
 
 # Configurar logging para mostrar en consola
@@ -18,126 +20,153 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-class ExceptionHandlingMiddleware(BaseHTTPMiddleware):
+# Los middlewares son ASGI puros: no envuelven el request en tareas ni
+# buferizan el cuerpo de la respuesta, solo interceptan los mensajes.
+
+class ExceptionHandlingMiddleware:
     """Middleware para manejo centralizado de excepciones"""
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                # Agregar header de tiempo de procesamiento
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = str(time.time() - start_time)
+            await send(message)
+
         try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            
-            # Agregar header de tiempo de procesamiento
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
+
         except HTTPException as e:
-            logger.warning(f"HTTP Exception: {e.detail} - Path: {request.url.path}")
-            return JSONResponse(
+            if response_started:
+                raise
+            logger.warning(f"HTTP Exception: {e.detail} - Path: {scope['path']}")
+            response = JSONResponse(
                 status_code=e.status_code,
                 content={"detail": e.detail, "error": "HTTP_ERROR"}
             )
-            
+            await response(scope, receive, send)
+
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)} - Path: {request.url.path}")
-            return JSONResponse(
+            if response_started:
+                raise
+            logger.error(f"Unexpected error: {str(e)} - Path: {scope['path']}")
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "detail": "Internal server error",
                     "error": "INTERNAL_ERROR"
                 }
             )
+            await response(scope, receive, send)
+
+class LoggingMiddleware:
+    """Middleware de access log estructurado con tiempo de respuesta"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware para logging detallado de requests con tiempo de respuesta"""
-    
-    async def dispatch(self, request: Request, call_next):
         start_time = time.time()
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Información del request
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        
-        # Log del request entrante
-        print(f"\n[INCOMING] [{timestamp}] REQUEST INCOMING")
-        print(f"   Method: {request.method}")
-        print(f"   Path: {request.url.path}")
-        print(f"   Query: {request.url.query}")
-        print(f"   Client IP: {client_ip}")
-        print(f"   User-Agent: {user_agent[:50]}...")
-        
+        status_code = 500
+        content_type = "unknown"
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                # Agregar header de tiempo de procesamiento
+                headers["X-Process-Time"] = str(round(time.time() - start_time, 4))
+                content_type = headers.get("content-type", "unknown")
+            await send(message)
+
         try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            
-            # Agregar header de tiempo de procesamiento
-            response.headers["X-Process-Time"] = str(round(process_time, 4))
-            
-            # Log del response
-            status_emoji = "[OK]" if response.status_code < 400 else "[ERROR]"
-            print(f"\n{status_emoji} [{timestamp}] RESPONSE SENT")
-            print(f"   Status: {response.status_code}")
-            print(f"   Time: {process_time:.4f}s")
-            print(f"   Path: {request.url.path}")
-            print(f"   Content-Type: {response.headers.get('content-type', 'unknown')}")
-            
-            # Log en consola con formato especial para tiempo de respuesta
-            print(f"[TIME] Response Time: {process_time:.4f}s for {request.method} {request.url.path}")
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             process_time = time.time() - start_time
-            print(f"\n[ERROR] [{timestamp}] ERROR OCCURRED")
-            print(f"   Error: {str(e)}")
-            print(f"   Time: {process_time:.4f}s")
-            print(f"   Path: {request.url.path}")
+            if settings.ACCESS_LOG_ENABLED:
+                access_logger.emit(
+                    logging.ERROR,
+                    "request_failed",
+                    timestamp=start_time,
+                    method=scope["method"],
+                    path=scope["path"],
+                    duration_ms=round(process_time * 1000, 3),
+                    error=str(e),
+                )
             raise
 
-class PerformanceMiddleware(BaseHTTPMiddleware):
+        if settings.ACCESS_LOG_ENABLED:
+            process_time = time.time() - start_time
+            client = scope.get("client")
+            access_logger.log_request(
+                status_code,
+                scope["path"],
+                timestamp=start_time,
+                method=scope["method"],
+                query=scope.get("query_string", b"").decode("latin-1"),
+                duration_ms=round(process_time * 1000, 3),
+                client_ip=client[0] if client else "unknown",
+                user_agent=Headers(scope=scope).get("user-agent", "unknown"),
+                content_type=content_type,
+            )
+
+class PerformanceMiddleware:
     """Middleware para métricas de rendimiento y estadísticas"""
-    
-    def __init__(self, app):
-        super().__init__(app)
-        self.request_count = 0
-        self.total_time = 0.0
-        self.slow_requests = []
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        self.request_count += 1
-        
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        self.total_time += process_time
-        
-        # Registrar requests lentos (>1 segundo)
-        if process_time > 1.0:
-            self.slow_requests.append({
-                "path": request.url.path,
-                "method": request.method,
-                "time": process_time,
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        # Agregar estadísticas al header
-        avg_time = self.total_time / self.request_count
-        response.headers["X-Total-Requests"] = str(self.request_count)
-        response.headers["X-Average-Time"] = str(round(avg_time, 4))
-        response.headers["X-Slow-Requests-Count"] = str(len(self.slow_requests))
-        
-        return response
-    
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Agregar estadísticas al header
+                count = request_metrics.request_count
+                avg_time = request_metrics.total_time / count if count else 0
+                headers = MutableHeaders(scope=message)
+                headers["X-Total-Requests"] = str(count + 1)
+                headers["X-Average-Time"] = str(round(avg_time, 4))
+                headers["X-Slow-Requests-Count"] = str(len(request_metrics.slow_requests))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Se usa la plantilla de la ruta para acotar la cardinalidad de las métricas
+            route = scope.get("route")
+            request_metrics.record(
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status_code,
+                time.perf_counter() - start_time
+            )
+
     def get_stats(self):
         """Obtener estadísticas de rendimiento"""
-        return {
-            "total_requests": self.request_count,
-            "total_time": round(self.total_time, 4),
-            "average_time": round(self.total_time / self.request_count, 4) if self.request_count > 0 else 0,
-            "slow_requests_count": len(self.slow_requests),
-            "slow_requests": self.slow_requests[-10:]  # Últimos 10 requests lentos
-        }
+        return request_metrics.get_stats()
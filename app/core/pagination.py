@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import DateTime, and_, bindparam, or_
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+from app.core.config import settings
+
+# Header donde se devuelve el cursor de la siguiente página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Header de las búsquedas con más coincidencias que las que se ordenan por relevancia
+SEARCH_TRUNCATED_HEADER = "X-Search-Truncated"
+
+# SQLite guarda CURRENT_TIMESTAMP sin microsegundos, el valor del cursor debe
+# enlazarse con el mismo formato para que la comparación de texto sea correcta
+_CURSOR_TIMESTAMP = DateTime(timezone=True).with_variant(
+    SQLITE_DATETIME(truncate_microseconds=True), "sqlite"
+)
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Codifica (created_at, id) en un cursor opaco"""
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica un cursor opaco en (created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate(query, model, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+    """
+    Aplica paginación ordenada por (created_at, id).
+    Con `after` se usa keyset (se ignora `skip`); sin él, offset clásico.
+    """
+    query = query.order_by(model.created_at, model.id)
+    if after is not None:
+        created_at, id = decode_cursor(after)
+        created_at_param = bindparam("cursor_created_at", created_at, type_=_CURSOR_TIMESTAMP)
+        query = query.filter(
+            or_(
+                model.created_at > created_at_param,
+                and_(model.created_at == created_at_param, model.id > id)
+            )
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def check_search_window(skip: int, limit: int) -> None:
+    """
+    La búsqueda solo ordena por relevancia las SEARCH_RANK_CANDIDATES
+    coincidencias más recientes: una página fuera de esa ventana se rechaza
+    en vez de devolver una lista vacía que parezca el final de los resultados
+    """
+    if skip + limit > settings.SEARCH_RANK_CANDIDATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"skip + limit must not exceed {settings.SEARCH_RANK_CANDIDATES} for search"
+        )
+
+
+def set_search_truncated(response: Response, truncated: bool) -> None:
+    """Marca la respuesta si la búsqueda descartó coincidencias más antiguas que SEARCH_RANK_CANDIDATES"""
+    if truncated:
+        response.headers[SEARCH_TRUNCATED_HEADER] = "true"
+
+
+def filter_created_between(query, model, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None):
+    """Filtra por rango de fecha de creación (ambos extremos incluidos, None = sin límite)"""
+    if created_from is not None:
+        query = query.filter(model.created_at >= bindparam("created_from", created_from, type_=_CURSOR_TIMESTAMP))
+    if created_to is not None:
+        query = query.filter(model.created_at <= bindparam("created_to", created_to, type_=_CURSOR_TIMESTAMP))
+    return query
+
+
+def next_cursor(rows: Sequence, limit: int) -> Optional[str]:
+    """Devuelve el cursor de la siguiente página o None si no hay más resultados"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int) -> None:
+    """Agrega el header con el cursor de la siguiente página a la respuesta"""
+    cursor = next_cursor(rows, limit)
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,202 @@
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import decode_access_token
+
+
+class RateLimitPolicy:
+    """
+    Política de token bucket para un grupo de rutas: `capacity` requests de
+    ráfaga que se recargan a razón de `capacity` cada `per_seconds` segundos,
+    contados por IP ("ip") o por usuario autenticado ("user", con la IP como
+    respaldo si el token no es válido).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        paths: Sequence[str],
+        capacity: int,
+        per_seconds: float,
+        methods: Optional[Sequence[str]] = None,
+        key: str = "ip",
+    ):
+        self.name = name
+        # Prefijos por segmentos: "/auth/token" no incluye "/auth/tokens"
+        self.paths = tuple(path.rstrip("/") for path in paths)
+        self.methods = frozenset(method.upper() for method in methods) if methods else None
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.key = key
+        self.allowed = 0
+        self.limited = 0
+
+    def matches(self, method: str, path: str) -> bool:
+        """La ruta es uno de los prefijos o está debajo de él (segmentos completos)"""
+        if self.methods is not None and method not in self.methods:
+            return False
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.paths)
+
+
+class MemoryBucketStore:
+    """
+    Buckets locales al proceso. Cada entrada expira cuando el bucket se habría
+    vuelto a llenar (equivale a no tenerla), así que los buckets inactivos se
+    descartan solos y el LRU acota la memoria.
+    """
+
+    def __init__(self, maxsize: int):
+        self._buckets = TTLCache(maxsize=maxsize)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Consume un token; devuelve 0 si se permite o los segundos a esperar si no"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens, updated_at = bucket
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / rate)
+        return retry_after
+
+
+# Mismo algoritmo que MemoryBucketStore, atómico en Redis y con el reloj del servidor
+_REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = capacity
+if bucket[1] then
+  tokens = math.min(capacity, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore:
+    """Buckets compartidos entre workers en Redis (requiere el paquete `redis`)"""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requiere instalar el paquete 'redis'") from e
+        client = aioredis.from_url(url)
+        self._take = client.register_script(_REDIS_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        return float(await self._take(keys=[f"rate-limit:{key}"], args=[capacity, rate]))
+
+
+def build_bucket_store():
+    """Crea el almacén de buckets configurado en settings.RATE_LIMIT_BACKEND"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requiere configurar REDIS_URL")
+        return RedisBucketStore(settings.REDIS_URL)
+    return MemoryBucketStore(settings.RATE_LIMIT_MAX_BUCKETS)
+
+
+class RateLimiter:
+    """Políticas configuradas y almacén de buckets compartido por el middleware"""
+
+    def __init__(self, policies: List[RateLimitPolicy], store):
+        self.policies = policies
+        self.store = store
+
+    def policy_for(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        """Primera política que aplica a la ruta (en el orden configurado)"""
+        for policy in self.policies:
+            if policy.matches(method, path):
+                return policy
+        return None
+
+    def client_key(self, policy: RateLimitPolicy, scope: Scope) -> str:
+        headers = Headers(scope=scope)
+        if policy.key == "user":
+            scheme, _, token = headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                # Claims verificados (cacheados): un token falso no consume el bucket de otro usuario
+                claims = decode_access_token(token)
+                if claims is not None and claims.get("sub"):
+                    return f"{policy.name}:user:{claims['sub']}"
+        return f"{policy.name}:ip:{client_ip(scope, headers)}"
+
+    async def check(self, scope: Scope) -> float:
+        """0 si el request puede pasar o los segundos a esperar si se limita"""
+        policy = self.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            return 0.0
+        retry_after = await self.store.take(self.client_key(policy, scope), policy.capacity, policy.rate)
+        if retry_after > 0:
+            policy.limited += 1
+        else:
+            policy.allowed += 1
+        return retry_after
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {
+            policy.name: {"allowed": policy.allowed, "limited": policy.limited}
+            for policy in self.policies
+        }
+
+
+def client_ip(scope: Scope, headers: Headers) -> str:
+    """IP del cliente (la primera de X-Forwarded-For si se confía en el proxy)"""
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Responde 429 con Retry-After cuando el cliente agota el bucket de la política de la ruta"""
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self.limiter.check(scope)
+        if retry_after > 0:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests", "error": "RATE_LIMITED"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+rate_limiter = RateLimiter(
+    [RateLimitPolicy(**policy) for policy in settings.RATE_LIMIT_POLICIES] if settings.RATE_LIMIT_ENABLED else [],
+    build_bucket_store(),
+)
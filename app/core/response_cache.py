@@ -0,0 +1,113 @@
+import hashlib
+import time
+from typing import Any, Iterable, Optional, Sequence
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from app.core.cache import build_cache_backend
+from app.core.config import settings
+from app.core.responses import serialize
+
+# Headers de la respuesta original que se guardan junto al cuerpo (p. ej. X-Next-Cursor)
+_STORED_HEADERS = ("x-next-cursor",)
+
+
+def compute_etag(body: bytes) -> str:
+    """ETag fuerte calculado a partir del contenido serializado"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indica si el If-None-Match del request incluye el ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+class ResponseCache:
+    """
+    Cache de respuestas JSON de endpoints GET con TTL y LRU.
+    La clave incluye ruta, query y la versión de cada entidad de la que
+    depende la respuesta: invalidar una entidad cambia su versión y deja
+    inalcanzables las entradas anteriores (se descartan por LRU/TTL).
+    La respuesta no puede depender de quién la pide. Con el backend en memoria
+    las versiones son por worker: la invalidación no llega a los demás, que
+    sirven la entrada vieja hasta que vence su TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.enabled = ttl > 0
+        self._entries = build_cache_backend("responses", maxsize=maxsize, ttl=ttl)
+        # Las versiones son marcas de tiempo que no se repiten: si una expira solo provoca misses
+        self._versions = build_cache_backend("response-versions", maxsize=1024, ttl=max(ttl, 0) * 10)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def _key(self, request: Request, entities: Sequence[str]) -> str:
+        versions = [await self._versions.get(entity) or 0 for entity in entities]
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        version_part = ",".join(f"{entity}={version}" for entity, version in zip(entities, versions))
+        return f"{request.url.path}?{query}|{version_part}"
+
+    async def lookup(self, request: Request, entities: Sequence[str]) -> Optional[Response]:
+        """
+        Respuesta cacheada para el request (304 si el cliente ya tiene esa versión)
+        o None si hay que calcularla
+        """
+        if not self.enabled:
+            return None
+        key = await self._key(request, entities)
+        request.state.response_cache_key = key
+        entry = await self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._respond(request, entry["body"].encode(), entry["etag"], entry["headers"])
+
+    async def store(self, request: Request, response: Response, payload: Any, adapter: TypeAdapter) -> Response:
+        """Serializa el payload, lo guarda en la cache y devuelve la respuesta con ETag"""
+        body = serialize(adapter, payload)
+        etag = compute_etag(body)
+        headers = {
+            name: response.headers[name] for name in _STORED_HEADERS if name in response.headers
+        }
+        key = getattr(request.state, "response_cache_key", None)
+        if key is not None:
+            await self._entries.set(key, {"body": body.decode(), "etag": etag, "headers": headers})
+        return self._respond(request, body, etag, headers)
+
+    def _respond(self, request: Request, body: bytes, etag: str, headers: dict) -> Response:
+        headers = {**headers, "ETag": etag}
+        if etag_matches(request, etag):
+            self.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, entities: Iterable[str]) -> None:
+        """Invalida las respuestas que dependen de las entidades indicadas"""
+        if not self.enabled:
+            return
+        version = time.time_ns()
+        for entity in entities:
+            await self._versions.set(entity, version)
+
+    def get_stats(self) -> dict:
+        """Obtener aciertos, fallos y respuestas 304 de la cache"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
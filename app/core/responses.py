@@ -0,0 +1,50 @@
+from typing import Any, Mapping, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Headers que Starlette calcula para el cuerpo de la respuesta y no deben copiarse
+_BODY_HEADERS = ("content-length", "content-type")
+
+
+def serialize(adapter: TypeAdapter, payload: Any) -> bytes:
+    """
+    Valida el payload (objetos ORM o dicts) una sola vez contra el esquema del
+    adapter y lo serializa directamente a bytes JSON con pydantic-core
+    """
+    return adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+
+
+class TypedJSONResponse(Response):
+    """
+    Respuesta JSON serializada con un TypeAdapter de Pydantic v2.
+    Los endpoints que la devuelven evitan la validación de `response_model`,
+    el paso por objetos Python y el json.dumps de la respuesta por defecto;
+    `response_model` se mantiene solo para la documentación OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        adapter: TypeAdapter,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.adapter = adapter
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        return serialize(self.adapter, content)
+
+
+def typed_json_response(payload: Any, adapter: TypeAdapter, response: Optional[Response] = None) -> TypedJSONResponse:
+    """
+    Crea la respuesta rápida conservando los headers agregados al `response`
+    inyectado por FastAPI (p. ej. X-Next-Cursor), que se pierden al devolver
+    una Response propia
+    """
+    headers = None
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name not in _BODY_HEADERS}
+    return TypedJSONResponse(payload, adapter, headers=headers)
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import build_cache_backend
+from app.core.config import settings
+from app.models.models import RevokedToken
+
+# La versión compartida solo avisa a los demás workers que recarguen; si expira fuerza una recarga
+_VERSION_TTL_SECONDS = 86400
+# Margen al leer revocaciones nuevas por created_at (precisión de segundos en SQLite, commits en curso)
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un bytearray: responde "seguro que no está" sin falsos
+    negativos y con una tasa de falsos positivos acotada por la capacidad.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Doble hashing (Kirsch-Mitzenmacher) a partir de un único digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+    """
+    Tokens revocados (por `jti`) hasta su expiración, persistidos en la tabla
+    revoked_tokens. La consulta por request no toca la base de datos: el filtro
+    de Bloom descarta casi todos los tokens válidos y el dict jti -> expiración
+    confirma los positivos. Como el filtro no admite borrados, se reconstruye
+    al barrer las entradas expiradas o al superar su capacidad.
+    Cada revocación (también cada rotación de refresh token) publica una versión
+    en el backend de cache compartido. Los workers la consultan como mucho cada
+    REVOCATION_VERSION_CHECK_SECONDS y, si cambió, leen solo las revocaciones
+    nuevas (`sync`), no la tabla entera.
+    Con el backend "memory" esa versión es local al proceso: los demás workers
+    solo ven una revocación en el `sync` periódico (ver main.py), así que un
+    token de acceso revocado sigue valiendo en ellos hasta REVOCATION_SYNC_SECONDS.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._expiry: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._loaded = False
+        self._version = None
+        self._synced_until: Optional[datetime] = None
+        self._next_check = 0.0
+        self._lock = asyncio.Lock()
+        self._shared = build_cache_backend("revocations", maxsize=1, ttl=_VERSION_TTL_SECONDS)
+        self.checks = 0
+        self.bloom_positives = 0
+
+    def _rebuild(self) -> None:
+        bloom = BloomFilter(max(self.capacity, len(self._expiry) * 2), self.error_rate)
+        for jti in self._expiry:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        self._expiry[jti] = expires_at
+        if self._bloom.count >= self._bloom.capacity:
+            self._rebuild()
+        else:
+            self._bloom.add(jti)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Carga desde la base de datos los tokens revocados que aún no expiraron"""
+        version = await self._shared.get("version")
+        result = await db.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.created_at)
+            .filter(RevokedToken.expires_at > datetime.now(timezone.utc))
+        )
+        rows = result.all()
+        self._expiry = {row.jti: _timestamp(row.expires_at) for row in rows}
+        self._rebuild()
+        self._synced_until = max((row.created_at for row in rows), default=None)
+        self._version = version
+        self._loaded = True
+
+    async def sync(self, db: AsyncSession) -> int:
+        """
+        Agrega las revocaciones creadas por otros workers desde la última lectura
+        (sin reconstruir el filtro). Devuelve cuántas filas leyó.
+        """
+        if not self._loaded:
+            await self.load(db)
+            return len(self._expiry)
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.created_at)
+        if self._synced_until is not None:
+            query = query.filter(RevokedToken.created_at >= self._synced_until - _SYNC_OVERLAP)
+        result = await db.execute(query)
+        rows = result.all()
+        now = time.time()
+        for row in rows:
+            expires_at = _timestamp(row.expires_at)
+            if expires_at > now and row.jti not in self._expiry:
+                self._add(row.jti, expires_at)
+        if rows:
+            latest = max(row.created_at for row in rows)
+            self._synced_until = latest if self._synced_until is None else max(self._synced_until, latest)
+        return len(rows)
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """
+        Carga la lista si no está cargada y, como mucho cada
+        REVOCATION_VERSION_CHECK_SECONDS, compara la versión compartida: si
+        otro worker revocó tokens incorpora solo las revocaciones nuevas
+        """
+        if self._loaded and time.monotonic() < self._next_check:
+            return
+        async with self._lock:
+            if not self._loaded:
+                await self.load(db)
+            elif time.monotonic() >= self._next_check:
+                version = await self._shared.get("version")
+                if version != self._version:
+                    await self.sync(db)
+                    self._version = version
+            self._next_check = time.monotonic() + settings.REVOCATION_VERSION_CHECK_SECONDS
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        """Indica si el token fue revocado (la base de datos solo se consulta si cambió la versión)"""
+        await self.ensure_fresh(db)
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.bloom_positives += 1
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: float) -> bool:
+        """
+        Revoca un token hasta `expires_at` (timestamp) y hace commit.
+        Devuelve False si ya estaba revocado (p. ej. dos rotaciones simultáneas).
+        """
+        try:
+            await db.execute(
+                insert(RevokedToken).values(
+                    jti=jti, expires_at=datetime.fromtimestamp(expires_at, timezone.utc)
+                )
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return False
+        self._add(jti, expires_at)
+        # La versión propia no se marca como vista: si otro worker revocó antes,
+        # la próxima comprobación también trae esas revocaciones
+        await self._shared.set("version", time.time_ns())
+        return True
+
+    async def sweep(self, db: AsyncSession) -> int:
+        """Elimina las revocaciones expiradas (memoria y base de datos) y reconstruye el filtro"""
+        now = time.time()
+        expired = [jti for jti, expires_at in self._expiry.items() if expires_at <= now]
+        for jti in expired:
+            del self._expiry[jti]
+        if expired:
+            self._rebuild()
+        await db.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= datetime.fromtimestamp(now, timezone.utc))
+        )
+        await db.commit()
+        return len(expired)
+
+    def get_stats(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "revoked": len(self._expiry),
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "checks": self.checks,
+            "bloom_positives": self.bloom_positives,
+        }
+
+
+def _timestamp(value: datetime) -> float:
+    # SQLite devuelve fechas sin zona horaria: se guardan siempre en UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+revocation_store = RevocationStore(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
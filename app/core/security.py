@@ -1,20 +1,118 @@
+import asyncio
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import DateTime, bindparam, select
+from sqlalchemy.engine import Row
+from app.core.cache import build_cache_backend
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.revocation import revocation_store
+from app.core.tokens import ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE, decode_access_token
 from app.models.models import User
-from app.schemas.schemas import TokenData
 
 # Configuración de seguridad
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Cache de usuarios autenticados, indexada por el subject del token (username).
+# Por worker la invalidación no llega a los demás: TTL corto para acotar la ventana
+user_cache = build_cache_backend(
+    "user",
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=(
+        settings.USER_CACHE_TTL_SECONDS
+        if settings.CACHE_BACKEND == "redis"
+        else settings.USER_CACHE_MEMORY_TTL_SECONDS
+    )
+)
+
+# El hash de la contraseña nunca se guarda en la cache
+_CACHED_USER_COLUMNS = tuple(
+    column.key for column in User.__table__.columns if column.key != "hashed_password"
+)
+_CACHED_USER_DATETIMES = tuple(
+    column.key for column in User.__table__.columns if isinstance(column.type, DateTime)
+)
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de hilos acotado para no bloquear el event loop.
+    Expone métricas de concurrencia y profundidad de cola.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int = 0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _run(self, func: Callable, *args):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def submit(self, func: Callable, *args):
+        """Ejecuta una operación de hashing en el pool y espera su resultado"""
+        with self._lock:
+            if self.max_pending and self.queued + self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service busy, retry later",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        future = self._executor.submit(self._run, func, *args)
+        # Si el request se cancela antes de que el trabajo empiece, _run nunca
+        # corre: el future del pool queda cancelado y hay que descontarlo aquí
+        future.add_done_callback(self._discard_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _discard_if_cancelled(self, future) -> None:
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def get_stats(self) -> dict:
+        """Obtener métricas del pool de hashing"""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "peak_queued": self.peak_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica una contraseña contra su hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,18 +121,42 @@ def get_password_hash(password: str) -> str:
     """Genera el hash de una contraseña"""
     return pwd_context.hash(password)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Crea un token JWT de acceso"""
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica una contraseña en el pool de hashing sin bloquear el event loop"""
+    return await password_hasher.submit(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Genera el hash de una contraseña en el pool de hashing sin bloquear el event loop"""
+    return await password_hasher.submit(get_password_hash, password)
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, token_type: str = ACCESS_TOKEN_TYPE):
+    """Crea un token JWT de acceso (con un jti único para poder revocarlo)"""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": token_type})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(username: str) -> str:
+    """Crea un refresh token de larga duración"""
+    return create_access_token(
+        {"sub": username},
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        token_type=REFRESH_TOKEN_TYPE,
+    )
+
+def create_token_pair(username: str) -> dict:
+    """Respuesta de login/refresh: token de acceso y refresh token"""
+    return {
+        "access_token": create_access_token({"sub": username}),
+        "refresh_token": create_refresh_token(username),
+        "token_type": "bearer",
+    }
+
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Obtiene un usuario por su nombre de usuario"""
     result = await db.execute(
@@ -49,35 +171,99 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     )
     return result.scalar_one_or_none()
 
-async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
-    """Autentica un usuario verificando sus credenciales"""
-    user = await get_user_by_username(db, username)
-    if not user:
+# El login solo necesita estas columnas: sin cargar (ni registrar en la sesión) la fila completa
+_login_stmt = select(User.id, User.username, User.hashed_password, User.is_active).filter(
+    User.username == bindparam("username"), User.is_deleted == False
+)
+
+async def get_login_user(db: AsyncSession, username: str) -> Optional[Row]:
+    """Fila (id, username, hashed_password, is_active) del usuario no eliminado, o None"""
+    result = await db.execute(_login_stmt, {"username": username})
+    return result.one_or_none()
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[Row]:
+    """
+    Autentica un usuario verificando sus credenciales. Devuelve la fila
+    (id, username, hashed_password, is_active), no la entidad User
+    """
+    user = await get_login_user(db, username)
+    if user is None:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
-    """Obtiene el usuario actual basado en el token JWT"""
-    credentials_exception = HTTPException(
+def _serialize_user(user: User) -> dict:
+    """Convierte un usuario en un diccionario apto para la cache"""
+    data = {key: getattr(user, key) for key in _CACHED_USER_COLUMNS}
+    for key in _CACHED_USER_DATETIMES:
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return data
+
+def _deserialize_user(data: dict) -> User:
+    """Reconstruye un usuario (desacoplado de la sesión) desde la cache"""
+    data = dict(data)
+    for key in _CACHED_USER_DATETIMES:
+        if data[key] is not None:
+            data[key] = datetime.fromisoformat(data[key])
+    return User(**data)
+
+async def invalidate_cached_user(*usernames: Optional[str]) -> None:
+    """Elimina usuarios de la cache de autenticación"""
+    for username in usernames:
+        if username:
+            await user_cache.delete(username)
+
+async def is_token_revoked(db: AsyncSession, claims: dict) -> bool:
+    """Indica si el token fue revocado (los tokens sin jti, anteriores a la revocación, no se pueden revocar)"""
+    jti = claims.get("jti")
+    return jti is not None and await revocation_store.is_revoked(db, jti)
+
+async def revoke_token(db: AsyncSession, claims: dict) -> bool:
+    """Revoca un token hasta su expiración; False si ya estaba revocado"""
+    jti, expires_at = claims.get("jti"), claims.get("exp")
+    if jti is None or not isinstance(expires_at, (int, float)):
+        return False
+    return await revocation_store.revoke(db, jti, expires_at)
+
+async def decode_refresh_token(db: AsyncSession, token: str) -> Optional[dict]:
+    """Claims de un refresh token válido y no revocado, o None"""
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if claims.get("type") != REFRESH_TOKEN_TYPE or claims.get("sub") is None:
+        return None
+    if await is_token_revoked(db, claims):
+        return None
+    return claims
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    """Obtiene el usuario actual basado en el token JWT"""
+    claims = decode_access_token(token)
+    username = claims.get("sub") if claims is not None else None
+    # Los tokens sin tipo son anteriores a los refresh tokens y valen como acceso
+    if username is None or claims.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+        raise _credentials_exception()
+    if await is_token_revoked(db, claims):
+        raise _credentials_exception()
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
+    cached = await user_cache.get(username)
+    if cached is not None:
+        return _deserialize_user(cached)
     
-    user = await get_user_by_username(db, username=token_data.username)
+    user = await get_user_by_username(db, username=username)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    await user_cache.set(username, _serialize_user(user))
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,30 @@
+import time
+from typing import Optional
+from jose import JWTError, jwt
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Tipos de token: el de acceso autentica requests, el de refresco solo obtiene un par nuevo
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# Tokens ya verificados (firma y expiración) -> claims, local al proceso.
+# Cada entrada vence con el `exp` de su token, así que nunca acepta uno expirado
+verified_tokens = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """
+    Claims de un token JWT válido o None. La firma se verifica una sola vez por
+    token: los siguientes requests lo encuentran en `verified_tokens` hasta su `exp`
+    """
+    claims = verified_tokens.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    expires_at = claims.get("exp")
+    if isinstance(expires_at, (int, float)):
+        verified_tokens.set(token, claims, ttl=expires_at - time.time())
+    return claims
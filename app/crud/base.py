@@ -0,0 +1,186 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.sql import Executable
+from sqlalchemy.engine import RowMapping
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.pagination import filter_created_between, paginate
+from app.core.response_cache import response_cache
+from app.crud.bulk import set_deleted
+from app.models.search import FullTextIndex, search_terms
+
+ModelType = TypeVar("ModelType")
+
+
+class CRUDBase(Generic[ModelType]):
+    """
+    Repositorio asíncrono genérico para modelos con SoftDeleteMixin.
+    Los statements comunes se construyen una sola vez por modelo, con los valores
+    como parámetros ligados (bindparam): cada llamada reutiliza el mismo objeto
+    (y su clave ya calculada en la cache de compilación) en vez de reconstruirlo.
+    """
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        cascade: Optional[Callable[[List[int], bool], Executable]] = None,
+        cache_entities: Sequence[str] = (),
+        search_index: Optional[FullTextIndex] = None,
+    ):
+        self.model = model
+        self.cascade = cascade
+        self.search_index = search_index
+        # Entidades cuyas respuestas cacheadas se invalidan al escribir (la tabla y las afectadas en cascada)
+        self.cache_entities = (model.__tablename__, *cache_entities)
+        # "pk" y no "id": en UPDATE los nombres de columna están reservados
+        by_pk = model.id == bindparam("pk")
+        self.active = select(model).where(model.is_deleted == False)
+        self.deleted = select(model).where(model.is_deleted == True)
+        self._get_stmt = self.active.where(by_pk)
+        self._soft_delete_stmt = model.soft_delete_stmt(by_pk)
+        self._restore_stmt = model.restore_stmt(by_pk)
+        self._by_column: Dict[str, Executable] = {}
+
+    def active_by(self, column: str):
+        """select de registros activos con `column` == bindparam(column), cacheado por columna"""
+        stmt = self._by_column.get(column)
+        if stmt is None:
+            stmt = self._by_column[column] = self.active.where(
+                getattr(self.model, column) == bindparam(column)
+            )
+        return stmt
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[ModelType]:
+        """Obtiene un registro por ID (solo activos)"""
+        result = await db.execute(self._get_stmt, {"pk": id})
+        return result.scalar_one_or_none()
+
+    async def get_by(self, db: AsyncSession, column: str, value) -> Optional[ModelType]:
+        """Obtiene un registro activo por igualdad en una columna"""
+        result = await db.execute(self.active_by(column), {column: value})
+        return result.scalar_one_or_none()
+
+    async def get_multi(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None, query=None) -> List[ModelType]:
+        """Obtiene lista de registros activos (o de `query`, si se indica)"""
+        result = await db.execute(
+            paginate(self.active if query is None else query, self.model, skip=skip, limit=limit, after=after)
+        )
+        return result.scalars().all()
+
+    async def get_multi_by(self, db: AsyncSession, column: str, value, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[ModelType]:
+        """Obtiene registros activos filtrados por igualdad en una columna"""
+        result = await db.execute(
+            paginate(self.active_by(column), self.model, skip=skip, limit=limit, after=after),
+            {column: value}
+        )
+        return result.scalars().all()
+
+    async def get_deleted(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[ModelType]:
+        """Obtiene registros eliminados (soft delete)"""
+        return await self.get_multi(db, skip=skip, limit=limit, after=after, query=self.deleted)
+
+    def export_query(self, filters: Optional[Dict[str, int]] = None, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None):
+        """
+        select de las columnas de los registros activos para exportar, filtrado por
+        igualdad en columnas (p. ej. {"author_id": 1}) y rango de creación, en orden (created_at, id)
+        """
+        query = select(*self.model.__table__.columns).where(self.model.is_deleted == False)
+        for column, value in (filters or {}).items():
+            if value is not None:
+                query = query.where(getattr(self.model, column) == value)
+        query = filter_created_between(query, self.model, created_from, created_to)
+        return query.order_by(self.model.created_at, self.model.id)
+
+    async def stream_rows(self, db: AsyncSession, query, batch_size: int = 1000) -> AsyncIterator[Sequence[RowMapping]]:
+        """
+        Recorre el resultado con un cursor del servidor (stream + yield_per) y
+        entrega lotes de filas: la memoria usada depende del lote, no de la tabla
+        """
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.mappings().partitions():
+            yield batch
+
+    async def search(self, db: AsyncSession, text: str, skip: int = 0, limit: int = 20, filters: Optional[Dict[str, int]] = None) -> Tuple[Sequence[RowMapping], bool]:
+        """
+        Búsqueda de texto completo entre los registros activos, ordenada por
+        relevancia, con filtros opcionales por igualdad en columnas. Solo se
+        puntúan las SEARCH_RANK_CANDIDATES coincidencias más recientes (skip +
+        limit debe caber en ellas, ver check_search_window).
+        Devuelve (filas, truncada): truncada indica que hay coincidencias más
+        antiguas que no se consideraron
+        """
+        terms = search_terms(text)
+        if not terms:
+            return [], False
+        criteria = [
+            getattr(self.model, column) == value
+            for column, value in (filters or {}).items() if value is not None
+        ]
+        dialect = db.get_bind().dialect.name
+        scoring_terms = None
+        if dialect == "sqlite":
+            # Los términos muy frecuentes no cambian el orden de bm25 pero sí su costo
+            sample = settings.SEARCH_TERM_SAMPLE_SIZE
+            result = await db.execute(self.search_index.term_sample_query(terms, sample))
+            common = self.search_index.common_terms(
+                terms, sample, result.mappings().one(), settings.SEARCH_COMMON_TERM_RATIO
+            )
+            if common:
+                scoring_terms = [term for term in terms if term not in common]
+        query = self.search_index.search_query(
+            dialect, terms, skip, limit, settings.SEARCH_RANK_CANDIDATES, *criteria, scoring_terms=scoring_terms
+        )
+        result = await db.execute(query)
+        rows = result.mappings().all()
+        # Con la página incompleta no se llegó a SEARCH_RANK_CANDIDATES coincidencias
+        truncated = False
+        if len(rows) == limit:
+            result = await db.execute(
+                self.search_index.truncation_query(dialect, terms, settings.SEARCH_RANK_CANDIDATES, *criteria)
+            )
+            truncated = result.first() is not None
+        return rows, truncated
+
+    async def update(self, db: AsyncSession, id: int, obj_in: BaseModel) -> Optional[ModelType]:
+        """Actualiza un registro activo con los campos enviados"""
+        return await self.update_values(db, id, obj_in.model_dump(exclude_unset=True))
+
+    async def update_values(self, db: AsyncSession, id: int, values: dict) -> Optional[ModelType]:
+        """Actualiza un registro activo (un único UPDATE ... RETURNING) y hace commit"""
+        if not values:
+            return await self.get(db, id)
+        db_obj = await self._update_returning(db, id, values)
+        await db.commit()
+        await self._after_write(db)
+        return db_obj
+
+    async def _update_returning(self, db: AsyncSession, id: int, values: dict) -> Optional[ModelType]:
+        """UPDATE ... RETURNING de un registro activo (sin commit)"""
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.id == id, self.model.is_deleted == False)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def soft_delete(self, db: AsyncSession, id: int) -> bool:
+        """Elimina un registro (soft delete, un único UPDATE)"""
+        count = await set_deleted(db, self._soft_delete_stmt, True, {"pk": id}, cascade=self.cascade, ids=[id])
+        await db.commit()
+        await self._after_write(db)
+        return count > 0
+
+    async def restore(self, db: AsyncSession, id: int) -> bool:
+        """Restaura un registro eliminado"""
+        count = await set_deleted(db, self._restore_stmt, False, {"pk": id}, cascade=self.cascade, ids=[id])
+        await db.commit()
+        await self._after_write(db)
+        return count > 0
+
+    async def _after_write(self, db: AsyncSession) -> None:
+        """Se llama tras cada commit de escritura: invalida las respuestas cacheadas que dependen del modelo"""
+        await response_cache.invalidate(self.cache_entities)
@@ -0,0 +1,131 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.sql import Executable
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def bulk_error(index: int, id: Optional[int], detail: str) -> dict:
+    """Error asociado a un elemento de una operación masiva"""
+    return {"index": index, "id": id, "detail": detail}
+
+
+async def get_by_ids(db: AsyncSession, model, ids: Sequence[int], deleted: bool = False) -> Dict[int, object]:
+    """Obtiene en una sola consulta los registros con los IDs dados, indexados por ID"""
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(model).filter(model.id.in_(set(ids)), model.is_deleted == deleted)
+    )
+    return {obj.id: obj for obj in result.scalars()}
+
+
+async def bulk_insert(db: AsyncSession, model, rows: List[dict]) -> List:
+    """Inserta varias filas con un único INSERT ... RETURNING (sin commit)"""
+    if not rows:
+        return []
+    result = await db.scalars(
+        insert(model).returning(model, sort_by_parameter_order=True),
+        rows
+    )
+    return result.all()
+
+
+async def bulk_update(
+    db: AsyncSession, model, rows: List[dict], ids: Sequence[int], touched: Iterable[int] = ()
+) -> List:
+    """
+    Actualiza varias filas activas por clave primaria (sin commit) y devuelve
+    los registros `ids` activos con sus valores actuales. Los `touched` (p. ej.
+    cuyas relaciones cambiaron) se marcan como actualizados aunque su fila no
+    traiga columnas
+    """
+    rows = [row for row in rows if len(row) > 1]
+    if rows:
+        # Sin sincronizar la sesión: el select final recarga los registros
+        await db.execute(
+            update(model).where(model.is_deleted == False).execution_options(synchronize_session=None),
+            rows
+        )
+    touched = set(touched) - {row["id"] for row in rows}
+    if touched:
+        await db.execute(
+            update(model)
+            .where(model.id.in_(touched), model.is_deleted == False)
+            .values(updated_at=func.now())
+            .execution_options(synchronize_session=None)
+        )
+    if not ids:
+        return []
+    result = await db.execute(
+        select(model)
+        .filter(model.id.in_(set(ids)), model.is_deleted == False)
+        .execution_options(populate_existing=True)
+    )
+    by_id = {obj.id: obj for obj in result.scalars()}
+    return [by_id[id] for id in ids if id in by_id]
+
+
+def check_targets(
+    ids: Sequence[int],
+    targets: Dict[int, object],
+    not_found: str,
+    owner_attr: Optional[str] = None,
+    owner_id: Optional[int] = None,
+) -> Tuple[List[int], List[dict]]:
+    """
+    Separa los IDs válidos de los que no existen o no pertenecen a `owner_id`
+    (owner_id None = sin restricción, p. ej. superusuarios)
+    """
+    allowed, errors = [], []
+    for index, id in enumerate(ids):
+        target = targets.get(id)
+        if target is None:
+            errors.append(bulk_error(index, id, not_found))
+        elif owner_id is not None and owner_attr and getattr(target, owner_attr) != owner_id:
+            errors.append(bulk_error(index, id, "Not enough permissions"))
+        else:
+            allowed.append(id)
+    return allowed, errors
+
+
+async def bulk_set_deleted(
+    db: AsyncSession,
+    model,
+    ids: Sequence[int],
+    deleted: bool,
+    not_found: str,
+    owner_attr: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    cascade: Optional[Callable[[List[int], bool], Executable]] = None,
+) -> Tuple[List[int], List[dict]]:
+    """Soft delete (o restauración) de varios registros con un único UPDATE y commit"""
+    targets = await get_by_ids(db, model, ids, deleted=not deleted)
+    allowed, errors = check_targets(ids, targets, not_found, owner_attr, owner_id)
+    if allowed:
+        criteria = model.id.in_(set(allowed))
+        stmt = model.soft_delete_stmt(criteria) if deleted else model.restore_stmt(criteria)
+        await set_deleted(db, stmt, deleted, cascade=cascade, ids=allowed)
+        await db.commit()
+    return list(dict.fromkeys(allowed)), errors
+
+
+async def set_deleted(
+    db: AsyncSession,
+    stmt: Executable,
+    deleted: bool,
+    params: Optional[dict] = None,
+    cascade: Optional[Callable[[List[int], bool], Executable]] = None,
+    ids: Sequence[int] = (),
+) -> int:
+    """
+    Ejecuta un soft delete (o restauración) set-based sin commit. `cascade(ids, deleted)`
+    devuelve el UPDATE de los registros dependientes: se ejecuta después del soft
+    delete (para copiar deleted_at) y antes de la restauración (para comparar con
+    deleted_at). Devuelve la cantidad de registros afectados.
+    """
+    if cascade and not deleted:
+        await db.execute(cascade(list(ids), deleted))
+    result = await db.execute(stmt, params)
+    if cascade and deleted and result.rowcount:
+        await db.execute(cascade(list(ids), deleted))
+    return result.rowcount
@@ -1,59 +1,32 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
-from app.models.models import Comment
-from app.schemas.schemas import CommentCreate, CommentUpdate
+from typing import List, Optional, Tuple
+from app.models.models import Comment, Post, comment_search
+from app.crud.base import CRUDBase
+from app.crud.bulk import bulk_error, bulk_insert, bulk_set_deleted, bulk_update, check_targets, get_by_ids
+from app.schemas.schemas import CommentBulkUpdate, CommentCreate
 
-class CommentCRUD:
-    async def get_comment(self, db: AsyncSession, comment_id: int) -> Optional[Comment]:
-        """Obtiene un comentario por ID (solo activos)"""
-        result = await db.execute(
-            select(Comment).filter(Comment.id == comment_id, Comment.is_deleted == False)
+class CommentCRUD(CRUDBase[Comment]):
+    def __init__(self):
+        super().__init__(Comment, search_index=comment_search)
+        self._with_relations_by_id = self.active_by("id").options(
+            selectinload(Comment.author),
+            selectinload(Comment.post)
         )
-        return result.scalar_one_or_none()
 
     async def get_comment_with_relations(self, db: AsyncSession, comment_id: int) -> Optional[Comment]:
         """Obtiene un comentario con relaciones (solo activos)"""
-        result = await db.execute(
-            select(Comment)
-            .options(
-                selectinload(Comment.author),
-                selectinload(Comment.post)
-            )
-            .filter(Comment.id == comment_id, Comment.is_deleted == False)
-        )
+        result = await db.execute(self._with_relations_by_id, {"id": comment_id})
         return result.scalar_one_or_none()
 
-    async def get_comments(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Comment]:
-        """Obtiene lista de comentarios activos"""
-        result = await db.execute(
-            select(Comment)
-            .filter(Comment.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
-
-    async def get_comments_by_post(self, db: AsyncSession, post_id: int, skip: int = 0, limit: int = 100) -> List[Comment]:
+    async def get_comments_by_post(self, db: AsyncSession, post_id: int, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Comment]:
         """Obtiene comentarios de un post específico (solo activos)"""
-        result = await db.execute(
-            select(Comment)
-            .filter(Comment.post_id == post_id, Comment.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_multi_by(db, "post_id", post_id, skip=skip, limit=limit, after=after)
 
-    async def get_comments_by_author(self, db: AsyncSession, author_id: int, skip: int = 0, limit: int = 100) -> List[Comment]:
+    async def get_comments_by_author(self, db: AsyncSession, author_id: int, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Comment]:
         """Obtiene comentarios de un autor específico (solo activos)"""
-        result = await db.execute(
-            select(Comment)
-            .filter(Comment.author_id == author_id, Comment.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_multi_by(db, "author_id", author_id, skip=skip, limit=limit, after=after)
 
     async def create_comment(self, db: AsyncSession, comment: CommentCreate, author_id: int) -> Comment:
         """Crea un nuevo comentario"""
@@ -64,55 +37,52 @@ class CommentCRUD:
         )
         db.add(db_comment)
         await db.commit()
-        await db.refresh(db_comment)
+        await self._after_write(db)
         return db_comment
 
-    async def update_comment(self, db: AsyncSession, comment_id: int, comment_update: CommentUpdate) -> Optional[Comment]:
-        """Actualiza un comentario"""
-        db_comment = await self.get_comment(db, comment_id)
-        if not db_comment:
-            return None
-        
-        update_data = comment_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_comment, field, value)
-        
+    async def bulk_create_comments(self, db: AsyncSession, comments: List[CommentCreate], author_id: int) -> Tuple[List[Comment], List[dict]]:
+        """Crea varios comentarios en una sola transacción (INSERT ... RETURNING)"""
+        result = await db.execute(
+            select(Post.id).filter(Post.id.in_({c.post_id for c in comments}), Post.is_deleted == False)
+        )
+        post_ids = set(result.scalars())
+        rows, errors = [], []
+        for index, comment in enumerate(comments):
+            if comment.post_id not in post_ids:
+                errors.append(bulk_error(index, None, "Post not found"))
+                continue
+            rows.append({"content": comment.content, "post_id": comment.post_id, "author_id": author_id})
+        created = await bulk_insert(db, Comment, rows)
         await db.commit()
-        await db.refresh(db_comment)
-        return db_comment
+        await self._after_write(db)
+        return created, errors
 
-    async def soft_delete_comment(self, db: AsyncSession, comment_id: int) -> bool:
-        """Elimina un comentario (soft delete)"""
-        db_comment = await self.get_comment(db, comment_id)
-        if not db_comment:
-            return False
-        
-        db_comment.soft_delete()
+    async def bulk_update_comments(self, db: AsyncSession, updates: List[CommentBulkUpdate], author_id: Optional[int] = None) -> Tuple[List[Comment], List[dict]]:
+        """Actualiza varios comentarios en una sola transacción (author_id None = sin restricción)"""
+        ids = [comment_update.id for comment_update in updates]
+        targets = await get_by_ids(db, Comment, ids)
+        allowed, errors = check_targets(ids, targets, "Comment not found", "author_id", author_id)
+        allowed_ids = set(allowed)
+        rows = [
+            {"id": comment_update.id, **comment_update.model_dump(exclude_unset=True, exclude={"id"})}
+            for comment_update in updates if comment_update.id in allowed_ids
+        ]
+        updated = await bulk_update(db, Comment, rows, list(dict.fromkeys(allowed)))
         await db.commit()
-        return True
+        await self._after_write(db)
+        return updated, errors
 
-    async def restore_comment(self, db: AsyncSession, comment_id: int) -> bool:
-        """Restaura un comentario eliminado"""
-        result = await db.execute(
-            select(Comment).filter(Comment.id == comment_id, Comment.is_deleted == True)
-        )
-        db_comment = result.scalar_one_or_none()
-        if not db_comment:
-            return False
-        
-        db_comment.restore()
-        await db.commit()
-        return True
+    async def bulk_soft_delete_comments(self, db: AsyncSession, comment_ids: List[int], author_id: Optional[int] = None) -> Tuple[List[int], List[dict]]:
+        """Elimina varios comentarios (soft delete) con un único UPDATE"""
+        result = await bulk_set_deleted(db, Comment, comment_ids, True, "Comment not found", "author_id", author_id)
+        await self._after_write(db)
+        return result
 
-    async def get_deleted_comments(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Comment]:
-        """Obtiene comentarios eliminados (soft delete)"""
-        result = await db.execute(
-            select(Comment)
-            .filter(Comment.is_deleted == True)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def bulk_restore_comments(self, db: AsyncSession, comment_ids: List[int]) -> Tuple[List[int], List[dict]]:
+        """Restaura varios comentarios eliminados con un único UPDATE"""
+        result = await bulk_set_deleted(db, Comment, comment_ids, False, "Comment not found")
+        await self._after_write(db)
+        return result
 
 # Instancia global del CRUD
 comment_crud = CommentCRUD()
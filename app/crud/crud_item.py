@@ -1,37 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.models.models import Item
-from app.schemas.schemas import ItemCreate, ItemUpdate
+from app.crud.base import CRUDBase
+from app.crud.bulk import bulk_insert, bulk_set_deleted, bulk_update, check_targets, get_by_ids
+from app.schemas.schemas import ItemBulkUpdate, ItemCreate
 
-class ItemCRUD:
-    async def get_item(self, db: AsyncSession, item_id: int) -> Optional[Item]:
-        """Obtiene un item por ID (solo activos)"""
-        result = await db.execute(
-            select(Item).filter(Item.id == item_id, Item.is_deleted == False)
-        )
-        return result.scalar_one_or_none()
-
-    async def get_items(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Item]:
-        """Obtiene lista de items activos"""
-        result = await db.execute(
-            select(Item)
-            .filter(Item.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+class ItemCRUD(CRUDBase[Item]):
+    def __init__(self):
+        super().__init__(Item)
 
-    async def get_items_by_owner(self, db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100) -> List[Item]:
+    async def get_items_by_owner(self, db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Item]:
         """Obtiene items de un propietario específico (solo activos)"""
-        result = await db.execute(
-            select(Item)
-            .filter(Item.owner_id == owner_id, Item.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_multi_by(db, "owner_id", owner_id, skip=skip, limit=limit, after=after)
 
     async def create_item(self, db: AsyncSession, item: ItemCreate, owner_id: int) -> Item:
         """Crea un nuevo item"""
@@ -43,55 +23,42 @@ class ItemCRUD:
         )
         db.add(db_item)
         await db.commit()
-        await db.refresh(db_item)
+        await self._after_write(db)
         return db_item
 
-    async def update_item(self, db: AsyncSession, item_id: int, item_update: ItemUpdate) -> Optional[Item]:
-        """Actualiza un item"""
-        db_item = await self.get_item(db, item_id)
-        if not db_item:
-            return None
-        
-        update_data = item_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_item, field, value)
-        
+    async def bulk_create_items(self, db: AsyncSession, items: List[ItemCreate], owner_id: int) -> List[Item]:
+        """Crea varios items en una sola transacción (INSERT ... RETURNING)"""
+        created = await bulk_insert(db, Item, [{**item.model_dump(), "owner_id": owner_id} for item in items])
         await db.commit()
-        await db.refresh(db_item)
-        return db_item
+        await self._after_write(db)
+        return created
 
-    async def soft_delete_item(self, db: AsyncSession, item_id: int) -> bool:
-        """Elimina un item (soft delete)"""
-        db_item = await self.get_item(db, item_id)
-        if not db_item:
-            return False
-        
-        db_item.soft_delete()
+    async def bulk_update_items(self, db: AsyncSession, updates: List[ItemBulkUpdate], owner_id: Optional[int] = None) -> Tuple[List[Item], List[dict]]:
+        """Actualiza varios items en una sola transacción (owner_id None = sin restricción)"""
+        ids = [item_update.id for item_update in updates]
+        targets = await get_by_ids(db, Item, ids)
+        allowed, errors = check_targets(ids, targets, "Item not found", "owner_id", owner_id)
+        allowed_ids = set(allowed)
+        rows = [
+            {"id": item_update.id, **item_update.model_dump(exclude_unset=True, exclude={"id"})}
+            for item_update in updates if item_update.id in allowed_ids
+        ]
+        updated = await bulk_update(db, Item, rows, list(dict.fromkeys(allowed)))
         await db.commit()
-        return True
+        await self._after_write(db)
+        return updated, errors
 
-    async def restore_item(self, db: AsyncSession, item_id: int) -> bool:
-        """Restaura un item eliminado"""
-        result = await db.execute(
-            select(Item).filter(Item.id == item_id, Item.is_deleted == True)
-        )
-        db_item = result.scalar_one_or_none()
-        if not db_item:
-            return False
-        
-        db_item.restore()
-        await db.commit()
-        return True
+    async def bulk_soft_delete_items(self, db: AsyncSession, item_ids: List[int], owner_id: Optional[int] = None) -> Tuple[List[int], List[dict]]:
+        """Elimina varios items (soft delete) con un único UPDATE"""
+        result = await bulk_set_deleted(db, Item, item_ids, True, "Item not found", "owner_id", owner_id)
+        await self._after_write(db)
+        return result
 
-    async def get_deleted_items(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Item]:
-        """Obtiene items eliminados (soft delete)"""
-        result = await db.execute(
-            select(Item)
-            .filter(Item.is_deleted == True)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def bulk_restore_items(self, db: AsyncSession, item_ids: List[int]) -> Tuple[List[int], List[dict]]:
+        """Restaura varios items eliminados con un único UPDATE"""
+        result = await bulk_set_deleted(db, Item, item_ids, False, "Item not found or not deleted")
+        await self._after_write(db)
+        return result
 
 # Instancia global del CRUD
 item_crud = ItemCRUD()
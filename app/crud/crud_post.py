@@ -1,65 +1,69 @@
+from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
-from app.models.models import Post, Tag
-from app.schemas.schemas import PostCreate, PostUpdate
+from typing import Dict, List, Optional, Tuple
+from app.models.models import Comment, Post, post_search, post_tags
+from app.crud.base import CRUDBase
+from app.crud.bulk import bulk_insert, bulk_set_deleted, bulk_update, check_targets, get_by_ids
+from app.crud.tag_index import tag_index
+from app.schemas.schemas import PostBulkUpdate, PostCreate, PostUpdate
 
-class PostCRUD:
-    async def get_post(self, db: AsyncSession, post_id: int) -> Optional[Post]:
-        """Obtiene un post por ID (solo activos)"""
-        result = await db.execute(
-            select(Post).filter(Post.id == post_id, Post.is_deleted == False)
+class PostCRUD(CRUDBase[Post]):
+    def __init__(self):
+        super().__init__(Post, cascade=self._cascade_comments, cache_entities=("comments",), search_index=post_search)
+        relations = (
+            selectinload(Post.author),
+            selectinload(Post.comments),
+            selectinload(Post.tags)
         )
-        return result.scalar_one_or_none()
+        self._with_relations = self.active.options(*relations)
+        self._with_relations_by_id = self.active_by("id").options(*relations)
 
     async def get_post_with_relations(self, db: AsyncSession, post_id: int) -> Optional[Post]:
         """Obtiene un post con todas sus relaciones (solo activos)"""
-        result = await db.execute(
-            select(Post)
-            .options(
-                selectinload(Post.author),
-                selectinload(Post.comments),
-                selectinload(Post.tags)
-            )
-            .filter(Post.id == post_id, Post.is_deleted == False)
-        )
+        result = await db.execute(self._with_relations_by_id, {"id": post_id})
         return result.scalar_one_or_none()
 
-    async def get_posts(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Post]:
-        """Obtiene lista de posts activos"""
+    async def get_posts_with_relations(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Post]:
+        """Obtiene posts con relaciones (solo activos)"""
+        return await self.get_multi(db, skip=skip, limit=limit, after=after, query=self._with_relations)
+
+    async def get_posts_summary(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Post]:
+        """
+        Obtiene posts activos con agregados ligeros (cantidad de comentarios,
+        fecha del último comentario y nombres de tags) sin cargar colecciones completas
+        """
+        posts = await self.get_multi(db, skip=skip, limit=limit, after=after)
+        if not posts:
+            return posts
+        post_ids = [post.id for post in posts]
+        
+        # Agregados de comentarios de toda la página en una sola consulta agrupada
         result = await db.execute(
-            select(Post)
-            .filter(Post.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
+            select(Comment.post_id, func.count(Comment.id), func.max(Comment.created_at))
+            .filter(Comment.post_id.in_(post_ids), Comment.is_deleted == False)
+            .group_by(Comment.post_id)
         )
-        return result.scalars().all()
-
-    async def get_posts_with_relations(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Post]:
-        """Obtiene posts con relaciones (solo activos)"""
+        comment_stats = {post_id: (count, last_at) for post_id, count, last_at in result}
+        
+        # Nombres de tags desde el índice en memoria (solo se consulta la tabla de asociación)
         result = await db.execute(
-            select(Post)
-            .options(
-                selectinload(Post.author),
-                selectinload(Post.comments),
-                selectinload(Post.tags)
-            )
-            .filter(Post.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
+            select(post_tags.c.post_id, post_tags.c.tag_id).filter(post_tags.c.post_id.in_(post_ids))
         )
-        return result.scalars().all()
+        tag_ids = defaultdict(list)
+        for post_id, tag_id in result:
+            tag_ids[post_id].append(tag_id)
+        tag_names = {post_id: await tag_index.names_for(db, ids) for post_id, ids in tag_ids.items()}
+        
+        for post in posts:
+            post.comment_count, post.last_comment_at = comment_stats.get(post.id, (0, None))
+            post.tag_names = tag_names.get(post.id, [])
+        return posts
 
-    async def get_posts_by_author(self, db: AsyncSession, author_id: int, skip: int = 0, limit: int = 100) -> List[Post]:
+    async def get_posts_by_author(self, db: AsyncSession, author_id: int, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Post]:
         """Obtiene posts de un autor específico (solo activos)"""
-        result = await db.execute(
-            select(Post)
-            .filter(Post.author_id == author_id, Post.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_multi_by(db, "author_id", author_id, skip=skip, limit=limit, after=after)
 
     async def create_post(self, db: AsyncSession, post: PostCreate, author_id: int) -> Post:
         """Crea un nuevo post"""
@@ -69,76 +73,106 @@ class PostCRUD:
             author_id=author_id
         )
         
-        # Agregar tags si se proporcionan
+        db.add(db_post)
+        
+        # Agregar tags si se proporcionan (validados contra el índice en memoria)
         if post.tag_ids:
-            result = await db.execute(
-                select(Tag).filter(Tag.id.in_(post.tag_ids), Tag.is_deleted == False)
-            )
-            tags = result.scalars().all()
-            db_post.tags = tags
+            await db.flush()
+            await self._set_post_tags(db, {db_post.id: post.tag_ids})
         
-        db.add(db_post)
         await db.commit()
-        await db.refresh(db_post)
+        await self._after_write(db)
         return db_post
 
-    async def update_post(self, db: AsyncSession, post_id: int, post_update: PostUpdate) -> Optional[Post]:
-        """Actualiza un post"""
-        db_post = await self.get_post(db, post_id)
-        if not db_post:
-            return None
-        
+    async def update(self, db: AsyncSession, post_id: int, post_update: PostUpdate) -> Optional[Post]:
+        """Actualiza un post (un único UPDATE ... RETURNING) y, si se envían, sus tags"""
         update_data = post_update.model_dump(exclude_unset=True)
         
         # Manejar tags por separado
         tag_ids = update_data.pop("tag_ids", None)
-        if tag_ids is not None:
-            result = await db.execute(
-                select(Tag).filter(Tag.id.in_(tag_ids), Tag.is_deleted == False)
-            )
-            tags = result.scalars().all()
-            db_post.tags = tags
-        
-        # Actualizar otros campos
-        for field, value in update_data.items():
-            setattr(db_post, field, value)
+        if tag_ids is None:
+            return await self.update_values(db, post_id, update_data)
+        if not update_data:
+            # Solo cambian los tags: igual se marca el post como actualizado
+            update_data["updated_at"] = func.now()
         
+        db_post = await self._update_returning(db, post_id, update_data)
+        if db_post:
+            await self._set_post_tags(db, {post_id: tag_ids})
         await db.commit()
-        await db.refresh(db_post)
+        await self._after_write(db)
         return db_post
 
-    async def soft_delete_post(self, db: AsyncSession, post_id: int) -> bool:
-        """Elimina un post (soft delete)"""
-        db_post = await self.get_post(db, post_id)
-        if not db_post:
-            return False
-        
-        db_post.soft_delete()
+    def _cascade_comments(self, post_ids: List[int], deleted: bool):
+        """
+        UPDATE de los comentarios de los posts dados. Al eliminar copian el
+        deleted_at del post; al restaurar solo vuelven los que se eliminaron
+        junto con él (mismo deleted_at), no los eliminados individualmente.
+        """
+        post_deleted_at = select(Post.deleted_at).where(Post.id == Comment.post_id).scalar_subquery()
+        if deleted:
+            return Comment.soft_delete_stmt(Comment.post_id.in_(post_ids), deleted_at=post_deleted_at)
+        return Comment.restore_stmt(Comment.post_id.in_(post_ids), Comment.deleted_at == post_deleted_at)
+
+    async def _set_post_tags(self, db: AsyncSession, tag_ids_by_post: Dict[int, List[int]]) -> None:
+        """Reemplaza los tags de varios posts con un DELETE y un INSERT masivos"""
+        if not tag_ids_by_post:
+            return
+        requested = {tag_id for tag_ids in tag_ids_by_post.values() for tag_id in tag_ids}
+        valid = set(await tag_index.existing_ids(db, requested))
+        await db.execute(delete(post_tags).where(post_tags.c.post_id.in_(tag_ids_by_post.keys())))
+        rows = [
+            {"post_id": post_id, "tag_id": tag_id}
+            for post_id, tag_ids in tag_ids_by_post.items()
+            for tag_id in dict.fromkeys(tag_ids) if tag_id in valid
+        ]
+        if rows:
+            await db.execute(insert(post_tags), rows)
+
+    async def bulk_create_posts(self, db: AsyncSession, posts: List[PostCreate], author_id: int) -> List[Post]:
+        """Crea varios posts en una sola transacción (INSERT ... RETURNING)"""
+        created = await bulk_insert(db, Post, [
+            {"title": post.title, "content": post.content, "author_id": author_id} for post in posts
+        ])
+        await self._set_post_tags(db, {
+            db_post.id: post.tag_ids for db_post, post in zip(created, posts) if post.tag_ids
+        })
         await db.commit()
-        return True
+        await self._after_write(db)
+        return created
 
-    async def restore_post(self, db: AsyncSession, post_id: int) -> bool:
-        """Restaura un post eliminado"""
-        result = await db.execute(
-            select(Post).filter(Post.id == post_id, Post.is_deleted == True)
-        )
-        db_post = result.scalar_one_or_none()
-        if not db_post:
-            return False
-        
-        db_post.restore()
+    async def bulk_update_posts(self, db: AsyncSession, updates: List[PostBulkUpdate], author_id: Optional[int] = None) -> Tuple[List[Post], List[dict]]:
+        """Actualiza varios posts en una sola transacción (author_id None = sin restricción)"""
+        ids = [post_update.id for post_update in updates]
+        targets = await get_by_ids(db, Post, ids)
+        allowed, errors = check_targets(ids, targets, "Post not found", "author_id", author_id)
+        allowed_ids = set(allowed)
+        rows, tag_ids_by_post = [], {}
+        for post_update in updates:
+            if post_update.id not in allowed_ids:
+                continue
+            update_data = post_update.model_dump(exclude_unset=True, exclude={"id"})
+            tag_ids = update_data.pop("tag_ids", None)
+            if tag_ids is not None:
+                tag_ids_by_post[post_update.id] = tag_ids
+            rows.append({"id": post_update.id, **update_data})
+        await self._set_post_tags(db, tag_ids_by_post)
+        updated = await bulk_update(db, Post, rows, list(dict.fromkeys(allowed)), touched=tag_ids_by_post)
         await db.commit()
-        return True
+        await self._after_write(db)
+        return updated, errors
 
-    async def get_deleted_posts(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Post]:
-        """Obtiene posts eliminados (soft delete)"""
-        result = await db.execute(
-            select(Post)
-            .filter(Post.is_deleted == True)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def bulk_soft_delete_posts(self, db: AsyncSession, post_ids: List[int], author_id: Optional[int] = None) -> Tuple[List[int], List[dict]]:
+        """Elimina varios posts y sus comentarios (soft delete) con un único UPDATE por tabla"""
+        result = await bulk_set_deleted(db, Post, post_ids, True, "Post not found", "author_id", author_id, cascade=self._cascade_comments)
+        await self._after_write(db)
+        return result
+
+    async def bulk_restore_posts(self, db: AsyncSession, post_ids: List[int]) -> Tuple[List[int], List[dict]]:
+        """Restaura varios posts eliminados (y sus comentarios) con un único UPDATE por tabla"""
+        result = await bulk_set_deleted(db, Post, post_ids, False, "Post not found", cascade=self._cascade_comments)
+        await self._after_write(db)
+        return result
 
 # Instancia global del CRUD
 post_crud = PostCRUD()
@@ -1,54 +1,34 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.models.models import Tag
-from app.schemas.schemas import TagCreate, TagUpdate
+from app.crud.base import CRUDBase
+from app.crud.bulk import bulk_error, bulk_insert, bulk_set_deleted, bulk_update, get_by_ids
+from app.crud.tag_index import tag_index
+from app.schemas.schemas import TagBulkUpdate, TagCreate
 
-class TagCRUD:
-    async def get_tag(self, db: AsyncSession, tag_id: int) -> Optional[Tag]:
-        """Obtiene un tag por ID (solo activos)"""
-        result = await db.execute(
-            select(Tag).filter(Tag.id == tag_id, Tag.is_deleted == False)
-        )
-        return result.scalar_one_or_none()
+class TagCRUD(CRUDBase[Tag]):
+    def __init__(self):
+        super().__init__(Tag)
+        self._with_posts = self.active.options(selectinload(Tag.posts))
+        self._with_posts_by_id = self.active_by("id").options(selectinload(Tag.posts))
 
     async def get_tag_by_name(self, db: AsyncSession, name: str) -> Optional[Tag]:
         """Obtiene un tag por nombre (solo activos)"""
-        result = await db.execute(
-            select(Tag).filter(Tag.name == name, Tag.is_deleted == False)
-        )
-        return result.scalar_one_or_none()
+        tag_id = await tag_index.id_for_name(db, name)
+        if tag_id is None:
+            return None
+        return await self.get(db, tag_id)
 
     async def get_tag_with_posts(self, db: AsyncSession, tag_id: int) -> Optional[Tag]:
         """Obtiene un tag con sus posts (solo activos)"""
-        result = await db.execute(
-            select(Tag)
-            .options(selectinload(Tag.posts))
-            .filter(Tag.id == tag_id, Tag.is_deleted == False)
-        )
+        result = await db.execute(self._with_posts_by_id, {"id": tag_id})
         return result.scalar_one_or_none()
 
-    async def get_tags(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Tag]:
-        """Obtiene lista de tags activos"""
-        result = await db.execute(
-            select(Tag)
-            .filter(Tag.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
-
-    async def get_tags_with_posts(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Tag]:
+    async def get_tags_with_posts(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[Tag]:
         """Obtiene tags con posts (solo activos)"""
-        result = await db.execute(
-            select(Tag)
-            .options(selectinload(Tag.posts))
-            .filter(Tag.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+        return await self.get_multi(db, skip=skip, limit=limit, after=after, query=self._with_posts)
 
     async def create_tag(self, db: AsyncSession, tag: TagCreate) -> Tag:
         """Crea un nuevo tag"""
@@ -58,55 +38,68 @@ class TagCRUD:
         )
         db.add(db_tag)
         await db.commit()
-        await db.refresh(db_tag)
+        await self._after_write(db)
         return db_tag
 
-    async def update_tag(self, db: AsyncSession, tag_id: int, tag_update: TagUpdate) -> Optional[Tag]:
-        """Actualiza un tag"""
-        db_tag = await self.get_tag(db, tag_id)
-        if not db_tag:
-            return None
-        
-        update_data = tag_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_tag, field, value)
-        
-        await db.commit()
-        await db.refresh(db_tag)
-        return db_tag
+    async def _after_write(self, db: AsyncSession) -> None:
+        """Además de invalidar las respuestas cacheadas, recarga el índice de tags"""
+        await super()._after_write(db)
+        await tag_index.refresh(db)
 
-    async def soft_delete_tag(self, db: AsyncSession, tag_id: int) -> bool:
-        """Elimina un tag (soft delete)"""
-        db_tag = await self.get_tag(db, tag_id)
-        if not db_tag:
-            return False
-        
-        db_tag.soft_delete()
+    async def _get_name_owners(self, db: AsyncSession, names) -> dict:
+        """Nombres ya usados (incluye tags eliminados, el nombre es único) -> ID"""
+        if not names:
+            return {}
+        result = await db.execute(select(Tag.name, Tag.id).filter(Tag.name.in_(set(names))))
+        return dict(result.all())
+
+    async def bulk_create_tags(self, db: AsyncSession, tags: List[TagCreate]) -> Tuple[List[Tag], List[dict]]:
+        """Crea varios tags en una sola transacción (INSERT ... RETURNING)"""
+        taken = await self._get_name_owners(db, [tag.name for tag in tags])
+        rows, errors = [], []
+        for index, tag in enumerate(tags):
+            if tag.name in taken:
+                errors.append(bulk_error(index, None, "Tag name already exists"))
+                continue
+            taken[tag.name] = None
+            rows.append({"name": tag.name, "description": tag.description})
+        created = await bulk_insert(db, Tag, rows)
         await db.commit()
-        return True
+        await self._after_write(db)
+        return created, errors
 
-    async def restore_tag(self, db: AsyncSession, tag_id: int) -> bool:
-        """Restaura un tag eliminado"""
-        result = await db.execute(
-            select(Tag).filter(Tag.id == tag_id, Tag.is_deleted == True)
-        )
-        db_tag = result.scalar_one_or_none()
-        if not db_tag:
-            return False
-        
-        db_tag.restore()
+    async def bulk_update_tags(self, db: AsyncSession, updates: List[TagBulkUpdate]) -> Tuple[List[Tag], List[dict]]:
+        """Actualiza varios tags en una sola transacción"""
+        targets = await get_by_ids(db, Tag, [tag_update.id for tag_update in updates])
+        taken = await self._get_name_owners(db, [u.name for u in updates if u.name is not None])
+        rows, ids, errors = [], [], []
+        for index, tag_update in enumerate(updates):
+            if tag_update.id not in targets:
+                errors.append(bulk_error(index, tag_update.id, "Tag not found"))
+                continue
+            if tag_update.name is not None and taken.get(tag_update.name, tag_update.id) != tag_update.id:
+                errors.append(bulk_error(index, tag_update.id, "Tag name already exists"))
+                continue
+            if tag_update.name is not None:
+                taken[tag_update.name] = tag_update.id
+            rows.append({"id": tag_update.id, **tag_update.model_dump(exclude_unset=True, exclude={"id"})})
+            ids.append(tag_update.id)
+        updated = await bulk_update(db, Tag, rows, list(dict.fromkeys(ids)))
         await db.commit()
-        return True
+        await self._after_write(db)
+        return updated, errors
 
-    async def get_deleted_tags(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Tag]:
-        """Obtiene tags eliminados (soft delete)"""
-        result = await db.execute(
-            select(Tag)
-            .filter(Tag.is_deleted == True)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def bulk_soft_delete_tags(self, db: AsyncSession, tag_ids: List[int]) -> Tuple[List[int], List[dict]]:
+        """Elimina varios tags (soft delete) con un único UPDATE"""
+        result = await bulk_set_deleted(db, Tag, tag_ids, True, "Tag not found")
+        await self._after_write(db)
+        return result
+
+    async def bulk_restore_tags(self, db: AsyncSession, tag_ids: List[int]) -> Tuple[List[int], List[dict]]:
+        """Restaura varios tags eliminados con un único UPDATE"""
+        result = await bulk_set_deleted(db, Tag, tag_ids, False, "Tag not found")
+        await self._after_write(db)
+        return result
 
 # Instancia global del CRUD
 tag_crud = TagCRUD()
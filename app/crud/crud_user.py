@@ -1,57 +1,73 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from app.models.models import User
+from app.crud.base import CRUDBase
 from app.schemas.schemas import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async, invalidate_cached_user
 
-class UserCRUD:
-    async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
-        """Obtiene un usuario por ID (solo activos)"""
-        result = await db.execute(
-            select(User).filter(User.id == user_id, User.is_deleted == False)
+class DuplicateUserError(ValueError):
+    """El username o el email ya están registrados (`field` indica cuál)"""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field.capitalize()} already registered")
+        self.field = field
+
+
+class UserCRUD(CRUDBase[User]):
+    def __init__(self):
+        super().__init__(User)
+        self._with_posts = self.active.options(
+            selectinload(User.posts), selectinload(User.comments), selectinload(User.items)
         )
-        return result.scalar_one_or_none()
+        # Con is_active == True la consulta paginada recorre el índice parcial ix_users_active
+        self._by_status = {status: self.active.where(User.is_active == status) for status in (True, False)}
+        # Devuelven el username para invalidar la cache sin un SELECT previo
+        self._soft_delete_stmt = self._soft_delete_stmt.returning(User.username)
+        self._restore_stmt = self._restore_stmt.returning(User.username)
+        # Ambas restricciones UNIQUE en una consulta que solo lee las columnas indexadas.
+        # Incluye los usuarios eliminados: la restricción también los cubre
+        self._conflict_stmt = select(User.username, User.email).where(
+            or_(User.username == bindparam("username"), User.email == bindparam("email"))
+        ).limit(2)
 
     async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
         """Obtiene un usuario por email (solo activos)"""
-        result = await db.execute(
-            select(User).filter(User.email == email, User.is_deleted == False)
-        )
-        return result.scalar_one_or_none()
+        return await self.get_by(db, "email", email)
 
     async def get_user_by_username(self, db: AsyncSession, username: str) -> Optional[User]:
         """Obtiene un usuario por username (solo activos)"""
-        result = await db.execute(
-            select(User).filter(User.username == username, User.is_deleted == False)
-        )
-        return result.scalar_one_or_none()
+        return await self.get_by(db, "username", username)
 
-    async def get_users(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
-        """Obtiene lista de usuarios activos"""
-        result = await db.execute(
-            select(User)
-            .filter(User.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def get_users(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None, is_active: Optional[bool] = None) -> List[User]:
+        """Obtiene usuarios (solo no eliminados), opcionalmente filtrados por is_active"""
+        query = None if is_active is None else self._by_status[is_active]
+        return await self.get_multi(db, skip=skip, limit=limit, after=after, query=query)
 
-    async def get_users_with_posts(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
-        """Obtiene usuarios con sus posts (solo activos)"""
-        result = await db.execute(
-            select(User)
-            .options(selectinload(User.posts), selectinload(User.comments))
-            .filter(User.is_deleted == False)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def get_users_with_posts(self, db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None) -> List[User]:
+        """Obtiene usuarios con sus posts, comentarios e items (solo activos)"""
+        return await self.get_multi(db, skip=skip, limit=limit, after=after, query=self._with_posts)
+
+    async def find_conflict(self, db: AsyncSession, username: str, email: str) -> Optional[str]:
+        """Campo ya registrado ("username" antes que "email") o None si ambos están libres"""
+        result = await db.execute(self._conflict_stmt, {"username": username, "email": email})
+        rows = result.all()
+        if any(row.username == username for row in rows):
+            return "username"
+        return "email" if rows else None
 
     async def create_user(self, db: AsyncSession, user: UserCreate) -> User:
-        """Crea un nuevo usuario"""
-        hashed_password = get_password_hash(user.password)
+        """
+        Crea un nuevo usuario. Lanza DuplicateUserError si el username o el email
+        ya existen, comprobado antes de calcular el hash y, ante altas simultáneas,
+        por el IntegrityError del INSERT
+        """
+        conflict = await self.find_conflict(db, user.username, user.email)
+        if conflict is not None:
+            raise DuplicateUserError(conflict)
+        hashed_password = await get_password_hash_async(user.password)
         db_user = User(
             email=user.email,
             username=user.username,
@@ -61,59 +77,51 @@ class UserCRUD:
             is_superuser=user.is_superuser
         )
         db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise DuplicateUserError(await self.find_conflict(db, user.username, user.email) or "username")
+        await self._after_write(db)
         return db_user
 
-    async def update_user(self, db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
-        """Actualiza un usuario"""
-        db_user = await self.get_user(db, user_id)
-        if not db_user:
-            return None
-        
+    async def update(self, db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
+        """Actualiza un usuario (un único UPDATE ... RETURNING)"""
         update_data = user_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return await self.get(db, user_id)
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
         
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
+        # Si cambia el username también hay que invalidar la entrada anterior de la cache
+        previous_username = None
+        if "username" in update_data:
+            result = await db.execute(select(User.username).filter(User.id == user_id))
+            previous_username = result.scalar_one_or_none()
         
-        await db.commit()
-        await db.refresh(db_user)
+        db_user = await self.update_values(db, user_id, update_data)
+        if db_user:
+            await invalidate_cached_user(previous_username, db_user.username)
         return db_user
 
-    async def soft_delete_user(self, db: AsyncSession, user_id: int) -> bool:
-        """Elimina un usuario (soft delete)"""
-        db_user = await self.get_user(db, user_id)
-        if not db_user:
-            return False
-        
-        db_user.soft_delete()
-        await db.commit()
-        return True
+    async def soft_delete(self, db: AsyncSession, user_id: int) -> bool:
+        """Elimina un usuario (soft delete, un único UPDATE)"""
+        return await self._set_deleted(db, user_id, True)
 
-    async def restore_user(self, db: AsyncSession, user_id: int) -> bool:
+    async def restore(self, db: AsyncSession, user_id: int) -> bool:
         """Restaura un usuario eliminado"""
-        result = await db.execute(
-            select(User).filter(User.id == user_id, User.is_deleted == True)
-        )
-        db_user = result.scalar_one_or_none()
-        if not db_user:
-            return False
-        
-        db_user.restore()
+        return await self._set_deleted(db, user_id, False)
+
+    async def _set_deleted(self, db: AsyncSession, user_id: int, deleted: bool) -> bool:
+        stmt = self._soft_delete_stmt if deleted else self._restore_stmt
+        result = await db.execute(stmt, {"pk": user_id})
+        username = result.scalar_one_or_none()
         await db.commit()
+        await self._after_write(db)
+        if username is None:
+            return False
+        await invalidate_cached_user(username)
         return True
 
-    async def get_deleted_users(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
-        """Obtiene usuarios eliminados (soft delete)"""
-        result = await db.execute(
-            select(User)
-            .filter(User.is_deleted == True)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
-
 # Instancia global del CRUD
-user_crud = UserCRUD()
\ No newline at end of file
+user_crud = UserCRUD()
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Dict, Iterable, List, Optional
+from app.core.cache import build_cache_backend
+from app.core.config import settings
+from app.models.models import Tag
+
+# Los tags cambian poco: la versión compartida dura un día (si expira solo fuerza una recarga)
+_VERSION_TTL_SECONDS = 86400
+
+
+class TagIndex:
+    """
+    Índice en memoria del proceso con los tags activos, por ID y por nombre.
+    Se carga al iniciar y se recarga tras cada escritura de TagCRUD. Cada
+    recarga publica una versión en el backend de cache compartido: los demás
+    workers la comparan con la que tienen cargada y se recargan si cambió.
+    Con el backend "memory" la versión no se comparte, así que además se
+    recarga cada TAG_INDEX_RELOAD_SECONDS: hasta entonces los listados pueden
+    mostrar tags eliminados en otro worker. Por eso la validación de tags al
+    escribir posts (existing_ids) siempre se confirma en la base de datos, y
+    las búsquedas por nombre que no encuentran un tag también.
+    """
+
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._ids: Dict[str, int] = {}
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._version: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._shared = build_cache_backend("tag-index", maxsize=1, ttl=_VERSION_TTL_SECONDS)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Carga los tags activos desde la base de datos"""
+        version = await self._shared.get("version")
+        result = await db.execute(select(Tag.id, Tag.name).filter(Tag.is_deleted == False))
+        names = dict(result.all())
+        self._names = names
+        self._ids = {name: id for id, name in names.items()}
+        self._version = version
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Publica una nueva versión y recarga el índice (llamar después del commit)"""
+        await self._shared.set("version", time.time_ns())
+        async with self._lock:
+            await self.load(db)
+
+    def _is_stale(self) -> bool:
+        reload_seconds = settings.TAG_INDEX_RELOAD_SECONDS
+        return reload_seconds > 0 and time.monotonic() - self._loaded_at > reload_seconds
+
+    async def _needs_load(self) -> bool:
+        return not self._loaded or self._is_stale() or await self._shared.get("version") != self._version
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Recarga el índice si no está cargado, si venció o si otro worker publicó otra versión"""
+        if not await self._needs_load():
+            return
+        async with self._lock:
+            if await self._needs_load():
+                await self.load(db)
+
+    def _add(self, rows) -> None:
+        for id, name in rows:
+            self._names[id] = name
+            self._ids[name] = id
+
+    def _discard(self, ids: Iterable[int]) -> None:
+        for id in ids:
+            name = self._names.pop(id, None)
+            if name is not None and self._ids.get(name) == id:
+                del self._ids[name]
+
+    async def existing_ids(self, db: AsyncSession, ids: Iterable[int]) -> List[int]:
+        """
+        IDs de tags activos entre los indicados (sin duplicados, en el orden
+        recibido). Valida escrituras: se confirman en la base con una consulta
+        por clave primaria (el índice puede no reflejar aún un tag creado o
+        eliminado en otro worker) y el resultado corrige el índice
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        result = await db.execute(
+            select(Tag.id, Tag.name).filter(Tag.id.in_(ids), Tag.is_deleted == False)
+        )
+        rows = result.all()
+        active = {row.id for row in rows}
+        self._add(rows)
+        self._discard(id for id in ids if id not in active)
+        return [id for id in ids if id in active]
+
+    async def id_for_name(self, db: AsyncSession, name: str) -> Optional[int]:
+        """ID del tag activo con ese nombre, o None (un nombre desconocido se confirma en la base)"""
+        await self.ensure_fresh(db)
+        tag_id = self._ids.get(name)
+        if tag_id is None:
+            result = await db.execute(
+                select(Tag.id, Tag.name).filter(Tag.name == name, Tag.is_deleted == False)
+            )
+            rows = result.all()
+            self._add(rows)
+            tag_id = rows[0].id if rows else None
+        return tag_id
+
+    async def names_for(self, db: AsyncSession, ids: Iterable[int]) -> List[str]:
+        """Nombres ordenados de los tags activos entre los indicados (solo el índice, para listados)"""
+        await self.ensure_fresh(db)
+        return sorted(self._names[id] for id in ids if id in self._names)
+
+    def get_stats(self) -> dict:
+        return {"loaded": self._loaded, "tags": len(self._names), "version": self._version}
+
+
+tag_index = TagIndex()
@@ -1,10 +1,44 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.access_log import access_logger
+from app.core.database import engine, AsyncSessionLocal, Base, get_pool_prometheus, get_pool_stats, replicas
+from app.core.response_cache import response_cache
+from app.core.revocation import revocation_store
+from app.core.pagination import NEXT_CURSOR_HEADER, SEARCH_TRUNCATED_HEADER
+from app.core.metrics import request_metrics
 from app.core.middleware import ExceptionHandlingMiddleware, LoggingMiddleware, PerformanceMiddleware
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.security import password_hasher
+from app.crud.tag_index import tag_index
 from app.api.endpoints import auth, users, posts, comments, tags, items
 
+async def flush_metrics_periodically():
+    """Publica las métricas del worker para que /stats pueda agregarlas"""
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        await asyncio.to_thread(request_metrics.flush, settings.METRICS_DIR, request_metrics.snapshot())
+
+async def collect_metrics():
+    """Snapshots de todos los workers, leídos del directorio compartido fuera del event loop"""
+    return await asyncio.to_thread(request_metrics.collect, settings.METRICS_DIR, request_metrics.snapshot())
+
+async def sweep_revocations_periodically():
+    """Elimina las revocaciones de tokens ya expirados"""
+    while True:
+        await asyncio.sleep(settings.REVOCATION_SWEEP_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await revocation_store.sweep(db)
+
+async def sync_revocations_periodically():
+    """Incorpora las revocaciones hechas en otros workers (necesario sin un backend de cache compartido)"""
+    while True:
+        await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await revocation_store.sync(db)
+
 # Crear tablas
 async def create_tables():
     async with engine.begin() as conn:
@@ -16,7 +50,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
-# Configurar middlewares
+# Configurar middlewares (el rate limiting es el más interno: los 429 también se registran)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 app.add_middleware(ExceptionHandlingMiddleware)
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(PerformanceMiddleware)
@@ -28,6 +63,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SEARCH_TRUNCATED_HEADER],
 )
 
 # Incluir routers
@@ -41,21 +77,41 @@ app.include_router(items.router, prefix=f"{settings.API_V1_STR}/items", tags=["i
 @app.on_event("startup")
 async def startup_event():
     await create_tables()
+    async with AsyncSessionLocal() as db:
+        await tag_index.load(db)
+        await revocation_store.load(db)
+    asyncio.create_task(sweep_revocations_periodically())
+    if settings.REVOCATION_SYNC_SECONDS > 0:
+        asyncio.create_task(sync_revocations_periodically())
+    if settings.METRICS_DIR:
+        asyncio.create_task(flush_metrics_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    password_hasher.shutdown()
+    access_logger.close()
+    await replicas.dispose()
 
 @app.get("/stats")
 async def get_performance_stats():
     """Obtener estadísticas de rendimiento de la API"""
-    # Obtener el middleware de rendimiento
-    performance_middleware = None
-    for middleware in app.user_middleware:
-        if hasattr(middleware, 'cls') and middleware.cls == PerformanceMiddleware:
-            performance_middleware = middleware.cls(app)
-            break
-    
-    if performance_middleware:
-        return performance_middleware.get_stats()
-    else:
-        return {"message": "Performance middleware not found"}
+    stats = request_metrics.get_stats(await collect_metrics())
+    stats["password_hashing"] = password_hasher.get_stats()
+    stats["database_pool"] = get_pool_stats()
+    stats["response_cache"] = response_cache.get_stats()
+    stats["tag_index"] = tag_index.get_stats()
+    stats["token_revocations"] = revocation_store.get_stats()
+    stats["rate_limits"] = rate_limiter.get_stats()
+    stats["access_log"] = access_logger.get_stats()
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Métricas de latencia en formato de texto de Prometheus"""
+    return PlainTextResponse(
+        request_metrics.prometheus(await collect_metrics()) + get_pool_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
 
 @app.get("/")
 async def root():
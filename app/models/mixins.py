@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Boolean
+from sqlalchemy import Column, DateTime, Boolean, Index, text, update
 from sqlalchemy.sql import func
 from datetime import datetime
 from typing import Optional
@@ -15,6 +15,10 @@ class SoftDeleteMixin:
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Traer los valores generados por el servidor (created_at, updated_at) con
+    # RETURNING en el mismo INSERT/UPDATE, sin un refresh posterior
+    __mapper_args__ = {"eager_defaults": True}
+    
     def soft_delete(self) -> None:
         """Marca el registro como eliminado (soft delete)"""
         self.is_deleted = True
@@ -25,6 +29,29 @@ class SoftDeleteMixin:
         self.is_deleted = False
         self.deleted_at = None
     
+    @classmethod
+    def soft_delete_stmt(cls, *criteria, deleted_at=None):
+        """
+        UPDATE que marca como eliminados los registros activos que cumplen los
+        criterios (deleted_at por defecto es now() del servidor)
+        """
+        return (
+            update(cls)
+            .where(cls.is_deleted == False, *criteria)
+            .values(is_deleted=True, deleted_at=func.now() if deleted_at is None else deleted_at)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @classmethod
+    def restore_stmt(cls, *criteria):
+        """UPDATE que restaura los registros eliminados que cumplen los criterios"""
+        return (
+            update(cls)
+            .where(cls.is_deleted == True, *criteria)
+            .values(is_deleted=False, deleted_at=None)
+            .execution_options(synchronize_session=False)
+        )
+    
     @classmethod
     def filter_active(cls, query):
         """Filtra solo los registros que no están eliminados"""
@@ -39,3 +66,11 @@ class SoftDeleteMixin:
     def filter_all(cls, query):
         """Incluye todos los registros (activos y eliminados)"""
         return query
+
+
+def active_index(name: str, *columns: str) -> Index:
+    """
+    Índice parcial sobre los registros activos (WHERE is_deleted = false).
+    Solo se crea en PostgreSQL; en otros motores se usan los índices compuestos.
+    """
+    return Index(name, *columns, postgresql_where=text("is_deleted = false")).ddl_if(dialect="postgresql")
@@ -1,15 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Table
+from sqlalchemy import Boolean, Column, Integer, String, Float, Text, DateTime, ForeignKey, Table, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
-from app.models.mixins import SoftDeleteMixin
+from app.models.mixins import SoftDeleteMixin, active_index
+from app.models.search import FullTextIndex
 
 # Tabla de asociación para la relación muchos a muchos entre Post y Tag
 post_tags = Table(
     'post_tags',
     Base.metadata,
     Column('post_id', Integer, ForeignKey('posts.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    # La PK (post_id, tag_id) no cubre las búsquedas por tag
+    Index('ix_post_tags_tag_id', 'tag_id')
 )
 
 class User(Base, SoftDeleteMixin):
@@ -20,14 +23,26 @@ class User(Base, SoftDeleteMixin):
     username = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, index=True)
     hashed_password = Column(String, nullable=False)
-    is_active = Column(String, default=True, nullable=False)
-    is_superuser = Column(String, default=False, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    is_superuser = Column(Boolean, default=False, nullable=False)
 
     # Relaciones uno a muchos
     posts = relationship("Post", back_populates="author", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan")
     items = relationship("Item", back_populates="owner", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Índice parcial de los usuarios activos y no eliminados, en el orden de la paginación.
+        # Las columnas de la condición van delante para que SQLite lo elija sin ANALYZE
+        # (si no, prefiere ix_users_is_deleted y ordena aparte). Cada motor necesita la
+        # condición con los literales que genera para `== True`
+        Index(
+            "ix_users_active", "is_active", "is_deleted", "created_at", "id",
+            postgresql_where=text("is_active = true AND is_deleted = false"),
+            sqlite_where=text("is_active = 1 AND is_deleted = 0"),
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+    )
+
 class Post(Base, SoftDeleteMixin):
     __tablename__ = "posts"
 
@@ -41,6 +56,13 @@ class Post(Base, SoftDeleteMixin):
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary=post_tags, back_populates="posts")
 
+    # Índices para listados activos ordenados por (created_at, id)
+    __table_args__ = (
+        Index("ix_posts_is_deleted_created_at", "is_deleted", "created_at", "id"),
+        Index("ix_posts_author_id_is_deleted_created_at", "author_id", "is_deleted", "created_at", "id"),
+        active_index("ix_posts_author_id_active", "author_id", "created_at", "id"),
+    )
+
 class Comment(Base, SoftDeleteMixin):
     __tablename__ = "comments"
 
@@ -53,6 +75,15 @@ class Comment(Base, SoftDeleteMixin):
     author = relationship("User", back_populates="comments")
     post = relationship("Post", back_populates="comments")
 
+    # Índices para listados activos ordenados por (created_at, id)
+    __table_args__ = (
+        Index("ix_comments_is_deleted_created_at", "is_deleted", "created_at", "id"),
+        Index("ix_comments_post_id_is_deleted_created_at", "post_id", "is_deleted", "created_at", "id"),
+        Index("ix_comments_author_id_is_deleted_created_at", "author_id", "is_deleted", "created_at", "id"),
+        active_index("ix_comments_post_id_active", "post_id", "created_at", "id"),
+        active_index("ix_comments_author_id_active", "author_id", "created_at", "id"),
+    )
+
 class Tag(Base, SoftDeleteMixin):
     __tablename__ = "tags"
 
@@ -73,4 +104,23 @@ class Item(Base, SoftDeleteMixin):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relación muchos a uno
-    owner = relationship("User", back_populates="items")
\ No newline at end of file
+    owner = relationship("User", back_populates="items")
+
+    # Índices para listados activos ordenados por (created_at, id)
+    __table_args__ = (
+        Index("ix_items_is_deleted_created_at", "is_deleted", "created_at", "id"),
+        Index("ix_items_owner_id_is_deleted_created_at", "owner_id", "is_deleted", "created_at", "id"),
+        active_index("ix_items_owner_id_active", "owner_id", "created_at", "id"),
+    )
+
+class RevokedToken(Base):
+    """Tokens JWT revocados (por jti) hasta su expiración"""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+# Búsqueda de texto completo (el título pesa más que el contenido)
+post_search = FullTextIndex(Post.__table__, {"title": "A", "content": "B"}, snippet="content")
+comment_search = FullTextIndex(Comment.__table__, {"content": "A"}, snippet="content")
@@ -0,0 +1,281 @@
+import re
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import Float, Table, and_, bindparam, column, event, func, literal, literal_column, select
+from sqlalchemy import table as table_clause
+
+# Configuración de texto de PostgreSQL: sin stemming, válida para contenido en cualquier idioma
+SEARCH_CONFIG = "simple"
+# Marcas de los fragmentos resaltados
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# Términos de búsqueda considerados como máximo
+MAX_SEARCH_TERMS = 16
+
+# Pesos por categoría: tsvector de PostgreSQL (A-D) y su equivalente para bm25 de SQLite
+_BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0, "D": 1.0}
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def search_terms(text: str) -> List[str]:
+    """Palabras de la búsqueda del usuario, sin operadores ni comillas"""
+    return _WORD_PATTERN.findall(text.lower())[:MAX_SEARCH_TERMS]
+
+
+def _fts5_query(terms: Sequence[str]) -> str:
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class FullTextIndex:
+    """
+    Índice de texto completo de una tabla con SoftDeleteMixin.
+      - SQLite: tabla virtual FTS5 con contenido externo (<tabla>_fts), mantenida
+        por triggers que solo indexan los registros activos.
+      - PostgreSQL: columna tsvector generada (search_vector) con índice GIN
+        parcial sobre los registros activos.
+    En ambos casos la sincronización la hace la base de datos, así que cubre
+    también los INSERT/UPDATE masivos y el soft delete en cascada.
+    """
+
+    def __init__(self, table: Table, weights: Dict[str, str], snippet: str):
+        self.table = table
+        self.weights = weights
+        self.columns = list(weights)
+        self.snippet = snippet
+        self.fts_name = f"{table.name}_fts"
+        self._fts_ref = literal_column(self.fts_name)
+        self._fts = table_clause(self.fts_name, column("rowid"))
+        event.listen(table, "after_create", self._after_create)
+        event.listen(table, "before_drop", self._before_drop)
+
+    def _after_create(self, target, connection, **kw) -> None:
+        for statement in self.create_ddl(connection.dialect.name):
+            connection.exec_driver_sql(statement)
+
+    def _before_drop(self, target, connection, **kw) -> None:
+        for statement in self.drop_ddl(connection.dialect.name):
+            connection.exec_driver_sql(statement)
+
+    def create_ddl(self, dialect: str) -> List[str]:
+        """
+        Sentencias que crean el índice (sin indexar filas existentes). Las
+        migraciones copian su resultado en vez de llamarlo, para no cambiar
+        con el modelo
+        """
+        name, columns = self.table.name, ", ".join(self.columns)
+        if dialect == "sqlite":
+            new = ", ".join(f"new.{c}" for c in self.columns)
+            old = ", ".join(f"old.{c}" for c in self.columns)
+            delete_old = f"INSERT INTO {self.fts_name}({self.fts_name}, rowid, {columns}) SELECT 'delete', old.id, {old} WHERE old.is_deleted = 0;"
+            insert_new = f"INSERT INTO {self.fts_name}(rowid, {columns}) SELECT new.id, {new} WHERE new.is_deleted = 0;"
+            return [
+                f"CREATE VIRTUAL TABLE {self.fts_name} USING fts5({columns}, content='{name}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')",
+                f"CREATE TRIGGER {self.fts_name}_ai AFTER INSERT ON {name} BEGIN {insert_new} END",
+                f"CREATE TRIGGER {self.fts_name}_ad AFTER DELETE ON {name} BEGIN {delete_old} END",
+                f"CREATE TRIGGER {self.fts_name}_au AFTER UPDATE OF {columns}, is_deleted ON {name} "
+                f"BEGIN {delete_old} {insert_new} END",
+            ]
+        if dialect == "postgresql":
+            vector = " || ".join(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({c}, '')), '{weight}')"
+                for c, weight in self.weights.items()
+            )
+            return [
+                f"ALTER TABLE {name} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED",
+                f"CREATE INDEX ix_{name}_search_vector ON {name} USING gin (search_vector) WHERE is_deleted = false",
+            ]
+        return []
+
+    def drop_ddl(self, dialect: str) -> List[str]:
+        name = self.table.name
+        if dialect == "sqlite":
+            return [
+                *(f"DROP TRIGGER IF EXISTS {self.fts_name}_{suffix}" for suffix in ("ai", "ad", "au")),
+                f"DROP TABLE IF EXISTS {self.fts_name}",
+            ]
+        if dialect == "postgresql":
+            return [
+                f"DROP INDEX IF EXISTS ix_{name}_search_vector",
+                f"ALTER TABLE {name} DROP COLUMN IF EXISTS search_vector",
+            ]
+        return []
+
+    def term_sample_query(self, terms: List[str], sample: int):
+        """
+        select (solo SQLite) con el mayor id de la tabla y, por cada término,
+        `term_<i>_count` y `term_<i>_oldest`: cuántas de sus `sample`
+        coincidencias más recientes hay y el id de la más antigua. Recorre solo
+        el final de cada lista de documentos del índice, no la lista entera
+        """
+        fts = self._fts_ref
+        columns = [select(func.max(self.table.c.id)).scalar_subquery().label("newest")]
+        for i, term in enumerate(terms):
+            recent = (
+                select(self._fts.c.rowid)
+                .where(fts.op("MATCH")(bindparam(f"term_{i}", _fts5_query([term]))))
+                .order_by(self._fts.c.rowid.desc())
+                .limit(sample)
+                .subquery()
+            )
+            columns.append(select(func.count()).select_from(recent).scalar_subquery().label(f"term_{i}_count"))
+            columns.append(select(func.min(recent.c.rowid)).scalar_subquery().label(f"term_{i}_oldest"))
+        return select(*columns)
+
+    @staticmethod
+    def common_terms(terms: List[str], sample: int, row, ratio: float) -> List[str]:
+        """
+        Términos presentes en al menos `ratio` de las filas recientes, según el
+        resultado de term_sample_query (solo cuentan las muestras completas)
+        """
+        common = []
+        for i, term in enumerate(terms):
+            count, oldest = row[f"term_{i}_count"], row[f"term_{i}_oldest"]
+            if count == sample and count / (row["newest"] - oldest + 1) >= ratio:
+                common.append(term)
+        return common
+
+    def search_query(
+        self, dialect: str, terms: List[str], skip: int, limit: int, candidates: int, *criteria,
+        scoring_terms: Optional[List[str]] = None,
+    ):
+        """
+        select de las columnas de la tabla más `rank` (mayor = más relevante),
+        `snippet` (fragmento resaltado de la columna `snippet`) y `<columna>_highlight`
+        para las demás columnas, ordenado por relevancia. Todos los términos deben
+        aparecer.
+
+        La relevancia se calcula solo sobre las `candidates` coincidencias más
+        recientes (mayor id): un término presente en casi todas las filas no
+        obliga a puntuar la tabla entera. Los resaltados se generan solo para la
+        página pedida.
+
+        En SQLite, `scoring_terms` (por defecto todos) limita los términos que
+        puntúa bm25: su costo fijo es recorrer la lista de documentos completa de
+        cada término, y los muy frecuentes casi no cambian el orden (desde la
+        mitad de las filas su IDF es nulo en FTS5). Sin términos que puntuar
+        las coincidencias quedan ordenadas por recencia.
+        """
+        target = self.table
+        if dialect == "sqlite":
+            fts = self._fts_ref
+            match = bindparam("search_match", _fts5_query(terms))
+            weights = [_BM25_WEIGHTS[w] for w in self.weights.values()]
+            scoring_terms = terms if scoring_terms is None else scoring_terms
+            score_all = list(scoring_terms) == list(terms)
+            columns = [self._fts.c.rowid.label("id")]
+            if score_all:
+                columns.append((-func.bm25(fts, *weights)).label("rank"))
+            matched = select(*columns).where(fts.op("MATCH")(match))
+            if criteria:
+                matched = matched.join_from(self._fts, target, target.c.id == self._fts.c.rowid).where(*criteria)
+            matched = matched.order_by(self._fts.c.rowid.desc()).limit(candidates)
+            if score_all:
+                matched = matched.subquery("matched")
+            else:
+                # CTE: se materializa una vez aunque _rank_recent la use dos veces
+                matched = self._rank_recent(matched.cte("matched"), scoring_terms, weights)
+            page = self._page(matched, skip, limit)
+            highlights = [
+                (
+                    func.snippet(fts, i, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", 24).label("snippet")
+                    if c == self.snippet
+                    else func.highlight(fts, i, HIGHLIGHT_START, HIGHLIGHT_STOP).label(f"{c}_highlight")
+                )
+                for i, c in enumerate(self.columns)
+            ]
+            # Las funciones auxiliares de FTS5 necesitan el MATCH en la misma consulta.
+            # SQLite nunca reordena un LEFT JOIN: así FTS5 busca solo los ids de la
+            # página en vez de recorrer todas las coincidencias (todas tienen fila)
+            query = (
+                select(*target.columns, page.c.rank, *highlights)
+                .select_from(page)
+                .outerjoin(self._fts, and_(self._fts.c.rowid == page.c.id, fts.op("MATCH")(match)))
+                .join(target, target.c.id == page.c.id)
+            )
+        else:
+            config, tsquery = self._tsquery(terms)
+            vector = literal_column(f"{target.name}.search_vector")
+            recent = (
+                select(target.c.id, vector.label("search_vector"))
+                .where(vector.op("@@")(tsquery), target.c.is_deleted == False, *criteria)
+                .order_by(target.c.id.desc())
+                .limit(candidates)
+                .subquery("recent")
+            )
+            matched = select(
+                recent.c.id, func.ts_rank(recent.c.search_vector, tsquery, type_=Float).label("rank")
+            ).subquery("matched")
+            page = self._page(matched, skip, limit)
+            options = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}"
+            highlights = [
+                (
+                    func.ts_headline(config, target.c[c], tsquery, f"{options}, MaxWords=35, MinWords=15, MaxFragments=2").label("snippet")
+                    if c == self.snippet
+                    else func.ts_headline(config, target.c[c], tsquery, f"{options}, HighlightAll=true").label(f"{c}_highlight")
+                )
+                for c in self.columns
+            ]
+            query = (
+                select(*target.columns, page.c.rank, *highlights)
+                .select_from(page)
+                .join(target, target.c.id == page.c.id)
+            )
+        return query.order_by(page.c.rank.desc(), page.c.id)
+
+    def truncation_query(self, dialect: str, terms: List[str], candidates: int, *criteria):
+        """
+        select del id de la coincidencia siguiente a las `candidates` más
+        recientes: si existe, hay coincidencias más antiguas que search_query
+        no ordena ni devuelve
+        """
+        if dialect == "sqlite":
+            fts = self._fts_ref
+            query = select(self._fts.c.rowid).where(
+                fts.op("MATCH")(bindparam("search_match", _fts5_query(terms)))
+            )
+            if criteria:
+                query = query.join_from(self._fts, self.table, self.table.c.id == self._fts.c.rowid).where(*criteria)
+            newest_first = self._fts.c.rowid.desc()
+        else:
+            _, tsquery = self._tsquery(terms)
+            vector = literal_column(f"{self.table.name}.search_vector")
+            query = select(self.table.c.id).where(
+                vector.op("@@")(tsquery), self.table.c.is_deleted == False, *criteria
+            )
+            newest_first = self.table.c.id.desc()
+        return query.order_by(newest_first).offset(candidates).limit(1)
+
+    @staticmethod
+    def _tsquery(terms: List[str]):
+        """(configuración, tsquery) de PostgreSQL que exige todos los términos"""
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        return config, func.to_tsquery(config, bindparam("search_match", " & ".join(terms)))
+
+    def _rank_recent(self, recent, scoring_terms: List[str], weights: List[float]):
+        """(id, rank) de las coincidencias `recent`, con bm25 calculado solo sobre `scoring_terms`"""
+        if not scoring_terms:
+            return select(recent.c.id, literal(0.0, Float).label("rank")).subquery("ranked")
+        fts = self._fts_ref
+        # Las coincidencias de todos los términos también lo son de un subconjunto: un solo
+        # recorrido del índice desde el id más antiguo de las recientes. El "+ 0" evita que
+        # FTS5 use el IN como búsquedas por rowid (cada una recalcularía las estadísticas de bm25)
+        return (
+            select(self._fts.c.rowid.label("id"), (-func.bm25(fts, *weights)).label("rank"))
+            .where(
+                fts.op("MATCH")(bindparam("score_match", _fts5_query(scoring_terms))),
+                self._fts.c.rowid >= select(func.min(recent.c.id)).scalar_subquery(),
+                (self._fts.c.rowid + 0).in_(select(recent.c.id)),
+            )
+            .subquery("ranked")
+        )
+
+    @staticmethod
+    def _page(matched, skip: int, limit: int):
+        """Página de (id, rank) de las coincidencias, ordenada por relevancia"""
+        return (
+            select(matched.c.id, matched.c.rank)
+            .order_by(matched.c.rank.desc(), matched.c.id)
+            .offset(skip)
+            .limit(limit)
+            .subquery("page")
+        )
@@ -1,8 +1,43 @@
-from pydantic import BaseModel, EmailStr, ConfigDict, Field, validator
-from typing import Optional, List
+from pydantic import AfterValidator, BaseModel, EmailStr, ConfigDict, Field, StringConstraints, field_validator
+from typing import Annotated, Generic, List, Optional, TypeVar
 from datetime import datetime
 import re
 
+# Expresiones precompiladas de los validadores
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_-]+$')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+PASSWORD_RULES = (
+    (re.compile(r'[A-Z]'), 'La contraseña debe contener al menos una letra mayúscula'),
+    (re.compile(r'[a-z]'), 'La contraseña debe contener al menos una letra minúscula'),
+    (re.compile(r'\d'), 'La contraseña debe contener al menos un número'),
+)
+
+def normalize_username(v: str) -> str:
+    if not USERNAME_PATTERN.match(v):
+        raise ValueError('Username solo puede contener letras, números, guiones y guiones bajos')
+    return v.lower()
+
+def check_password(v: str) -> str:
+    if len(v) < 8:
+        raise ValueError('La contraseña debe tener al menos 8 caracteres')
+    for pattern, message in PASSWORD_RULES:
+        if not pattern.search(v):
+            raise ValueError(message)
+    return v
+
+def strip_not_blank(v: str, message: str) -> str:
+    stripped = v.strip()
+    if not stripped:
+        raise ValueError(message)
+    return stripped
+
+def normalize_tag_name(v: str) -> str:
+    # Convertir a lowercase y reemplazar espacios con guiones
+    return WHITESPACE_PATTERN.sub('-', strip_not_blank(v, 'El nombre no puede estar vacío').lower())
+
+# Contraseña: longitud y reglas de composición como un único tipo con restricciones
+Password = Annotated[str, StringConstraints(min_length=8, max_length=100), AfterValidator(check_password)]
+
 # User Schemas
 class UserBase(BaseModel):
     email: EmailStr = Field(..., description="Email válido del usuario")
@@ -11,56 +46,30 @@ class UserBase(BaseModel):
     is_active: bool = Field(True, description="Estado activo del usuario")
     is_superuser: bool = Field(False, description="Privilegios de superusuario")
 
-    @validator('username')
-    def validate_username(cls, v):
-        if not re.match(r'^[a-zA-Z0-9_-]+$', v):
-            raise ValueError('Username solo puede contener letras, números, guiones y guiones bajos')
-        return v.lower()
+    @field_validator('username')
+    @classmethod
+    def validate_username(cls, v: str) -> str:
+        return normalize_username(v)
 
 class UserCreate(UserBase):
-    password: str = Field(..., min_length=8, max_length=100, description="Contraseña entre 8 y 100 caracteres")
-
-    @validator('password')
-    def validate_password(cls, v):
-        if len(v) < 8:
-            raise ValueError('La contraseña debe tener al menos 8 caracteres')
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('La contraseña debe contener al menos una letra mayúscula')
-        if not re.search(r'[a-z]', v):
-            raise ValueError('La contraseña debe contener al menos una letra minúscula')
-        if not re.search(r'\d', v):
-            raise ValueError('La contraseña debe contener al menos un número')
-        return v
+    password: Password = Field(..., description="Contraseña entre 8 y 100 caracteres")
 
 class UserUpdate(BaseModel):
     email: Optional[EmailStr] = Field(None, description="Email válido del usuario")
     username: Optional[str] = Field(None, min_length=3, max_length=50, description="Username entre 3 y 50 caracteres")
     name: Optional[str] = Field(None, max_length=100, description="Nombre completo del usuario")
-    password: Optional[str] = Field(None, min_length=8, max_length=100, description="Contraseña entre 8 y 100 caracteres")
+    password: Optional[Password] = Field(None, description="Contraseña entre 8 y 100 caracteres")
     is_active: Optional[bool] = Field(None, description="Estado activo del usuario")
 
-    @validator('username')
-    def validate_username(cls, v):
-        if v is not None:
-            if not re.match(r'^[a-zA-Z0-9_-]+$', v):
-                raise ValueError('Username solo puede contener letras, números, guiones y guiones bajos')
-            return v.lower()
-        return v
-
-    @validator('password')
-    def validate_password(cls, v):
-        if v is not None:
-            if len(v) < 8:
-                raise ValueError('La contraseña debe tener al menos 8 caracteres')
-            if not re.search(r'[A-Z]', v):
-                raise ValueError('La contraseña debe contener al menos una letra mayúscula')
-            if not re.search(r'[a-z]', v):
-                raise ValueError('La contraseña debe contener al menos una letra minúscula')
-            if not re.search(r'\d', v):
-                raise ValueError('La contraseña debe contener al menos un número')
-        return v
+    @field_validator('username')
+    @classmethod
+    def validate_username(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else normalize_username(v)
 
 class User(UserBase):
+    # En las respuestas el email ya viene validado de la base de datos: revalidarlo
+    # como EmailStr (email-validator + idna) domina el costo de serializar listados
+    email: str = Field(..., description="Email del usuario")
     id: int
     created_at: datetime
     updated_at: datetime
@@ -79,12 +88,10 @@ class TagBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50, description="Nombre del tag entre 1 y 50 caracteres")
     description: Optional[str] = Field(None, max_length=200, description="Descripción del tag hasta 200 caracteres")
 
-    @validator('name')
-    def validate_name(cls, v):
-        if not v.strip():
-            raise ValueError('El nombre no puede estar vacío')
-        # Convertir a lowercase y reemplazar espacios con guiones
-        return re.sub(r'\s+', '-', v.strip().lower())
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        return normalize_tag_name(v)
 
 class TagCreate(TagBase):
     pass
@@ -93,14 +100,10 @@ class TagUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=50, description="Nombre del tag entre 1 y 50 caracteres")
     description: Optional[str] = Field(None, max_length=200, description="Descripción del tag hasta 200 caracteres")
 
-    @validator('name')
-    def validate_name(cls, v):
-        if v is not None:
-            if not v.strip():
-                raise ValueError('El nombre no puede estar vacío')
-            # Convertir a lowercase y reemplazar espacios con guiones
-            return re.sub(r'\s+', '-', v.strip().lower())
-        return v
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else normalize_tag_name(v)
 
 class Tag(TagBase):
     id: int
@@ -116,17 +119,15 @@ class PostBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=200, description="Título del post entre 1 y 200 caracteres")
     content: str = Field(..., min_length=10, max_length=5000, description="Contenido del post entre 10 y 5000 caracteres")
 
-    @validator('title')
-    def validate_title(cls, v):
-        if not v.strip():
-            raise ValueError('El título no puede estar vacío')
-        return v.strip()
+    @field_validator('title')
+    @classmethod
+    def validate_title(cls, v: str) -> str:
+        return strip_not_blank(v, 'El título no puede estar vacío')
 
-    @validator('content')
-    def validate_content(cls, v):
-        if not v.strip():
-            raise ValueError('El contenido no puede estar vacío')
-        return v.strip()
+    @field_validator('content')
+    @classmethod
+    def validate_content(cls, v: str) -> str:
+        return strip_not_blank(v, 'El contenido no puede estar vacío')
 
 class PostCreate(PostBase):
     tag_ids: Optional[List[int]] = Field(default=[], description="IDs de tags asociados al post")
@@ -136,21 +137,15 @@ class PostUpdate(BaseModel):
     content: Optional[str] = Field(None, min_length=10, max_length=5000, description="Contenido del post entre 10 y 5000 caracteres")
     tag_ids: Optional[List[int]] = Field(None, description="IDs de tags asociados al post")
 
-    @validator('title')
-    def validate_title(cls, v):
-        if v is not None:
-            if not v.strip():
-                raise ValueError('El título no puede estar vacío')
-            return v.strip()
-        return v
-
-    @validator('content')
-    def validate_content(cls, v):
-        if v is not None:
-            if not v.strip():
-                raise ValueError('El contenido no puede estar vacío')
-            return v.strip()
-        return v
+    @field_validator('title')
+    @classmethod
+    def validate_title(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else strip_not_blank(v, 'El título no puede estar vacío')
+
+    @field_validator('content')
+    @classmethod
+    def validate_content(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else strip_not_blank(v, 'El contenido no puede estar vacío')
 
 class Post(PostBase):
     id: int
@@ -167,15 +162,24 @@ class PostWithRelations(Post):
     comments: List["Comment"] = []
     tags: List[Tag] = []
 
+class PostSummary(Post):
+    comment_count: int = 0
+    last_comment_at: Optional[datetime] = None
+    tag_names: List[str] = []
+
+class PostSearchResult(Post):
+    rank: float = Field(..., description="Relevancia (mayor = más relevante)")
+    title_highlight: str = Field(..., description="Título con los términos resaltados con <mark>")
+    snippet: str = Field(..., description="Fragmento del contenido con los términos resaltados con <mark>")
+
 # Comment Schemas
 class CommentBase(BaseModel):
     content: str = Field(..., min_length=1, max_length=1000, description="Contenido del comentario entre 1 y 1000 caracteres")
 
-    @validator('content')
-    def validate_content(cls, v):
-        if not v.strip():
-            raise ValueError('El contenido no puede estar vacío')
-        return v.strip()
+    @field_validator('content')
+    @classmethod
+    def validate_content(cls, v: str) -> str:
+        return strip_not_blank(v, 'El contenido no puede estar vacío')
 
 class CommentCreate(CommentBase):
     post_id: int = Field(..., description="ID del post al que pertenece el comentario")
@@ -183,13 +187,10 @@ class CommentCreate(CommentBase):
 class CommentUpdate(BaseModel):
     content: Optional[str] = Field(None, min_length=1, max_length=1000, description="Contenido del comentario entre 1 y 1000 caracteres")
 
-    @validator('content')
-    def validate_content(cls, v):
-        if v is not None:
-            if not v.strip():
-                raise ValueError('El contenido no puede estar vacío')
-            return v.strip()
-        return v
+    @field_validator('content')
+    @classmethod
+    def validate_content(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else strip_not_blank(v, 'El contenido no puede estar vacío')
 
 class Comment(CommentBase):
     id: int
@@ -202,6 +203,10 @@ class Comment(CommentBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class CommentSearchResult(Comment):
+    rank: float = Field(..., description="Relevancia (mayor = más relevante)")
+    snippet: str = Field(..., description="Fragmento del contenido con los términos resaltados con <mark>")
+
 class CommentWithRelations(Comment):
     author: User
     post: Post
@@ -212,11 +217,10 @@ class ItemBase(BaseModel):
     description: Optional[str] = Field(None, max_length=500, description="Descripción del item hasta 500 caracteres")
     price: float = Field(..., gt=0, description="Precio del item mayor a 0")
 
-    @validator('title')
-    def validate_title(cls, v):
-        if not v.strip():
-            raise ValueError('El título no puede estar vacío')
-        return v.strip()
+    @field_validator('title')
+    @classmethod
+    def validate_title(cls, v: str) -> str:
+        return strip_not_blank(v, 'El título no puede estar vacío')
 
 class ItemCreate(ItemBase):
     pass
@@ -226,13 +230,10 @@ class ItemUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=500, description="Descripción del item hasta 500 caracteres")
     price: Optional[float] = Field(None, gt=0, description="Precio del item mayor a 0")
 
-    @validator('title')
-    def validate_title(cls, v):
-        if v is not None:
-            if not v.strip():
-                raise ValueError('El título no puede estar vacío')
-            return v.strip()
-        return v
+    @field_validator('title')
+    @classmethod
+    def validate_title(cls, v: Optional[str]) -> Optional[str]:
+        return v if v is None else strip_not_blank(v, 'El título no puede estar vacío')
 
 class Item(ItemBase):
     id: int
@@ -247,10 +248,47 @@ class Item(ItemBase):
 class ItemWithRelations(Item):
     owner: User
 
+# Bulk Schemas
+BULK_MAX_ITEMS = 1000
+
+T = TypeVar("T")
+
+class BulkError(BaseModel):
+    index: int = Field(..., description="Posición del elemento en el request")
+    id: Optional[int] = Field(None, description="ID del registro afectado, si aplica")
+    detail: str
+
+class BulkResult(BaseModel, Generic[T]):
+    results: List[T] = []
+    errors: List[BulkError] = []
+
+class BulkIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS, description="IDs de los registros")
+
+class BulkIdsResult(BaseModel):
+    ids: List[int] = []
+    errors: List[BulkError] = []
+
+class PostBulkUpdate(PostUpdate):
+    id: int
+
+class CommentBulkUpdate(CommentUpdate):
+    id: int
+
+class TagBulkUpdate(TagUpdate):
+    id: int
+
+class ItemBulkUpdate(ItemUpdate):
+    id: int
+
 # Token Schemas
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = Field(..., description="Refresh token emitido por /auth/token o /auth/refresh")
 
 class TokenData(BaseModel):
     username: Optional[str] = None
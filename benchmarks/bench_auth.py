@@ -0,0 +1,86 @@
+"""
+Microbenchmark de la dependencia de autenticación por request.
+
+Compara la implementación anterior de get_current_user (jwt.decode en cada
+request, HTTPException y TokenData creados siempre) con la actual, que
+reutiliza los claims de los tokens ya verificados y consulta la lista de
+revocaciones en memoria. En ambos casos el usuario está en la cache de
+usuarios, como en el camino habitual de un cliente que hace varios requests
+con el mismo token.
+
+Uso: python benchmarks/bench_auth.py [n_llamadas]
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.core.revocation import revocation_store
+from app.core.security import (
+    _deserialize_user, _serialize_user, create_access_token, get_current_user, user_cache
+)
+from app.models.models import User
+from app.schemas.schemas import TokenData
+
+
+async def legacy_get_current_user(token, db=None):
+    """Copia de get_current_user anterior"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            raise credentials_exception
+        token_data = TokenData(username=username)
+    except JWTError:
+        raise credentials_exception
+    cached = await user_cache.get(token_data.username)
+    if cached is not None:
+        return _deserialize_user(cached)
+    raise credentials_exception
+
+
+async def measure(fn, token, db, n):
+    for _ in range(200):
+        await fn(token, db=db)
+    start = time.perf_counter()
+    for _ in range(n):
+        await fn(token, db=db)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def main(n):
+    now = datetime(2024, 1, 1)
+    user = User(
+        id=1, email="bench@example.com", username="bench", name="Bench", is_active=True,
+        is_superuser=False, is_deleted=False, deleted_at=None, created_at=now, updated_at=now
+    )
+    await user_cache.set("bench", _serialize_user(user))
+    token = create_access_token({"sub": "bench"})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        # La lista de revocaciones se carga al iniciar la app; la consulta por request es en memoria
+        await revocation_store.load(db)
+        assert (await legacy_get_current_user(token)).username == (await get_current_user(token, db=db)).username
+        before = await measure(legacy_get_current_user, token, db, n)
+        after = await measure(get_current_user, token, db, n)
+    print(f"anterior (jwt.decode por request)  {before:8.2f} us/request")
+    print(f"actual (LRU de tokens verificados) {after:8.2f} us/request")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
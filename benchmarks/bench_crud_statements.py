@@ -0,0 +1,103 @@
+"""
+Benchmark del overhead por llamada de las consultas del CRUD.
+
+Compara construir el select en cada llamada (implementación anterior) con
+los statements cacheados de CRUDBase, en dos niveles:
+  - solo Python: construcción del statement + clave de la cache de compilación
+  - extremo a extremo: get por ID y listado paginado contra SQLite en memoria
+
+Uso: python benchmarks/bench_crud_statements.py [n_llamadas]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+
+from sqlalchemy import select
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.core.pagination import paginate
+from app.crud.crud_item import item_crud
+from app.models.models import Item, User
+
+
+def per_call_get(item_id):
+    return select(Item).filter(Item.id == item_id, Item.is_deleted == False)
+
+
+def per_call_by_owner(owner_id):
+    return paginate(
+        select(Item).filter(Item.owner_id == owner_id, Item.is_deleted == False),
+        Item, skip=0, limit=20
+    )
+
+
+def measure_sync(fn, n):
+    for i in range(200):
+        fn(i)
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def measure_async(fn, n):
+    for i in range(200):
+        await fn(i)
+    start = time.perf_counter()
+    for i in range(n):
+        await fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def report(title, before, after):
+    print(f"{title:<40} anterior {before:8.1f} us   actual {after:8.1f} us   ({(after / before - 1) * 100:+.0f}%)")
+
+
+async def main(n):
+    cached_get = item_crud._get_stmt
+    cached_by_owner = item_crud.active_by("owner_id")
+    report(
+        "statement get por ID (solo Python)",
+        measure_sync(lambda i: per_call_get(i)._generate_cache_key(), n),
+        measure_sync(lambda i: cached_get._generate_cache_key(), n),
+    )
+    report(
+        "statement listado por owner (solo Python)",
+        measure_sync(lambda i: per_call_by_owner(i)._generate_cache_key(), n),
+        measure_sync(lambda i: paginate(cached_by_owner, Item, skip=0, limit=20)._generate_cache_key(), n),
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        db.add(User(email="bench@example.com", username="bench", hashed_password="x"))
+        await db.flush()
+        db.add_all([Item(title=f"item {i}", price=1.0, owner_id=1) for i in range(100)])
+        await db.commit()
+
+        async def old_get(i):
+            result = await db.execute(per_call_get(i % 100 + 1))
+            return result.scalar_one_or_none()
+
+        async def old_by_owner(i):
+            result = await db.execute(per_call_by_owner(1))
+            return result.scalars().all()
+
+        report(
+            "get por ID (SQLite en memoria)",
+            await measure_async(old_get, n),
+            await measure_async(lambda i: item_crud.get(db, i % 100 + 1), n),
+        )
+        report(
+            "listado por owner (SQLite en memoria)",
+            await measure_async(old_by_owner, n // 5),
+            await measure_async(lambda i: item_crud.get_multi_by(db, "owner_id", 1, limit=20), n // 5),
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
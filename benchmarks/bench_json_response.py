@@ -0,0 +1,106 @@
+"""
+Benchmark de serialización de listados grandes.
+
+Compara un endpoint con `response_model=List[PostWithRelations]` (validación
+de FastAPI + jsonable + json.dumps) con el mismo endpoint devolviendo
+TypedJSONResponse (una validación con TypeAdapter y dump_json a bytes).
+El payload son 1.000 posts con autor, 3 comentarios y 2 tags cada uno,
+como objetos con atributos (equivalentes a filas ORM ya cargadas).
+
+Uso: python benchmarks/bench_json_response.py [n_requests]
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from pydantic import TypeAdapter
+from app.core.responses import typed_json_response
+from app.schemas.schemas import PostWithRelations
+
+ROWS = 1000
+
+
+def build_payload():
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    audit = {"created_at": now, "updated_at": now, "is_deleted": False, "deleted_at": None}
+    author = SimpleNamespace(
+        id=1, email="autor@example.com", username="autor", name="Autor",
+        is_active=True, is_superuser=False, **audit
+    )
+    tags = [SimpleNamespace(id=i, name=f"tag-{i}", description=None, **audit) for i in range(2)]
+    return [
+        SimpleNamespace(
+            id=i, title=f"Post {i}", content="contenido del post " * 10, author_id=1,
+            author=author, tags=tags,
+            comments=[
+                SimpleNamespace(id=i * 3 + j, content=f"comentario {j}", author_id=1, post_id=i, **audit)
+                for j in range(3)
+            ],
+            **audit
+        )
+        for i in range(ROWS)
+    ]
+
+
+payload = build_payload()
+post_list = TypeAdapter(List[PostWithRelations])
+app = FastAPI()
+
+
+@app.get("/default", response_model=List[PostWithRelations])
+async def default_path():
+    return payload
+
+
+@app.get("/typed", response_model=List[PostWithRelations])
+async def typed_path():
+    return typed_json_response(payload, post_list)
+
+
+async def call(path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(path, n):
+    for _ in range(3):
+        await call(path)
+    start = time.perf_counter()
+    for _ in range(n):
+        await call(path)
+    return (time.perf_counter() - start) / n
+
+
+async def main(n):
+    import json
+    assert json.loads(await call("/default")) == json.loads(await call("/typed"))
+    results = {path: await measure(path, n) for path in ("/default", "/typed")}
+    for path, seconds in results.items():
+        print(f"{path:<10} {seconds * 1000:8.2f} ms/request  {1 / seconds:8.1f} req/s  ({ROWS} filas)")
+    print(f"speedup: {results['/default'] / results['/typed']:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
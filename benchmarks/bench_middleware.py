@@ -0,0 +1,87 @@
+"""
+Benchmark del overhead por request de la pila de middlewares.
+
+Compara una app mínima sin middlewares, la misma app con tres capas
+BaseHTTPMiddleware (implementación anterior) y con los middlewares ASGI
+actuales. Las requests se envían directamente por ASGI, sin red.
+
+Uso: python benchmarks/bench_middleware.py [n_requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.core.access_log import access_logger
+from app.core.middleware import ExceptionHandlingMiddleware, LoggingMiddleware, PerformanceMiddleware
+
+
+async def endpoint(request):
+    return JSONResponse({"status": "ok"})
+
+
+class PassthroughHTTPMiddleware(BaseHTTPMiddleware):
+    """Capa BaseHTTPMiddleware equivalente a las anteriores (solo agrega un header)"""
+
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+
+def build_app(middlewares):
+    app = Starlette(routes=[Route("/", endpoint)])
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+async def call(app):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/", "raw_path": b"/",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, n):
+    for _ in range(200):
+        await call(app)
+    start = time.perf_counter()
+    for _ in range(n):
+        await call(app)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def main(n):
+    access_logger.stream = open(os.devnull, "w")
+    scenarios = {
+        "sin middlewares": build_app([]),
+        "BaseHTTPMiddleware x3 (anterior)": build_app([PassthroughHTTPMiddleware] * 3),
+        "ASGI puro x3 (actual)": build_app([ExceptionHandlingMiddleware, LoggingMiddleware, PerformanceMiddleware]),
+    }
+    results = {name: await measure(app, n) for name, app in scenarios.items()}
+    baseline = results["sin middlewares"]
+    for name, us in results.items():
+        print(f"{name:<36} {us:8.1f} us/request  (+{us - baseline:.1f} us)")
+    access_logger.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,112 @@
+"""
+Microbenchmark de validación de esquemas.
+
+Compara los esquemas actuales (field_validator nativos de Pydantic v2 y el
+tipo Password con restricciones precompiladas) con copias de los esquemas
+anteriores escritas con @validator de estilo v1 (shim de compatibilidad).
+
+Uso: python benchmarks/bench_schema_validation.py [n_iteraciones]
+"""
+import os
+import re
+import sys
+import time
+import warnings
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel, EmailStr, Field
+from app.schemas.schemas import PostCreate, TagCreate, UserCreate
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import validator
+
+    class LegacyUserCreate(BaseModel):
+        """Copia de UserCreate anterior (@validator v1)"""
+        email: EmailStr
+        username: str = Field(..., min_length=3, max_length=50)
+        name: Optional[str] = Field(None, max_length=100)
+        is_active: bool = True
+        is_superuser: bool = False
+        password: str = Field(..., min_length=8, max_length=100)
+
+        @validator('username')
+        def validate_username(cls, v):
+            if not re.match(r'^[a-zA-Z0-9_-]+$', v):
+                raise ValueError('Username solo puede contener letras, números, guiones y guiones bajos')
+            return v.lower()
+
+        @validator('password')
+        def validate_password(cls, v):
+            if len(v) < 8:
+                raise ValueError('La contraseña debe tener al menos 8 caracteres')
+            if not re.search(r'[A-Z]', v):
+                raise ValueError('La contraseña debe contener al menos una letra mayúscula')
+            if not re.search(r'[a-z]', v):
+                raise ValueError('La contraseña debe contener al menos una letra minúscula')
+            if not re.search(r'\d', v):
+                raise ValueError('La contraseña debe contener al menos un número')
+            return v
+
+    class LegacyPostCreate(BaseModel):
+        """Copia de PostCreate anterior (@validator v1)"""
+        title: str = Field(..., min_length=1, max_length=200)
+        content: str = Field(..., min_length=10, max_length=5000)
+        tag_ids: Optional[List[int]] = Field(default=[])
+
+        @validator('title')
+        def validate_title(cls, v):
+            if not v.strip():
+                raise ValueError('El título no puede estar vacío')
+            return v.strip()
+
+        @validator('content')
+        def validate_content(cls, v):
+            if not v.strip():
+                raise ValueError('El contenido no puede estar vacío')
+            return v.strip()
+
+    class LegacyTagCreate(BaseModel):
+        """Copia de TagCreate anterior (@validator v1)"""
+        name: str = Field(..., min_length=1, max_length=50)
+        description: Optional[str] = Field(None, max_length=200)
+
+        @validator('name')
+        def validate_name(cls, v):
+            if not v.strip():
+                raise ValueError('El nombre no puede estar vacío')
+            return re.sub(r'\s+', '-', v.strip().lower())
+
+
+USER = {"email": "user@example.com", "username": "Some_User", "password": "Sup3rSecret", "name": "Usuario"}
+POST = {"title": "  Un título  ", "content": "  Contenido del post con algo de texto  ", "tag_ids": [1, 2, 3]}
+TAG = {"name": "  Python Async  ", "description": "Tag de prueba"}
+
+
+def measure(model, data, n):
+    validate = model.model_validate
+    for _ in range(500):
+        validate(data)
+    start = time.perf_counter()
+    for _ in range(n):
+        validate(data)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(n):
+    scenarios = [
+        ("UserCreate", LegacyUserCreate, UserCreate, USER),
+        ("PostCreate", LegacyPostCreate, PostCreate, POST),
+        ("TagCreate", LegacyTagCreate, TagCreate, TAG),
+    ]
+    for name, legacy, current, data in scenarios:
+        assert legacy.model_validate(data).model_dump() == current.model_validate(data).model_dump()
+        before = measure(legacy, data, n)
+        after = measure(current, data, n)
+        print(f"{name:<12} v1 @validator {before:7.2f} us   v2 field_validator {after:7.2f} us   ({(after / before - 1) * 100:+.0f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
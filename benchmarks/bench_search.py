@@ -0,0 +1,89 @@
+"""
+Benchmark de la búsqueda de texto completo de posts (SQLite FTS5).
+
+Crea una base SQLite temporal con N posts de texto aleatorio (indexados por
+los triggers de FullTextIndex al insertar) y mide la latencia de
+PostCRUD.search para términos frecuentes, poco frecuentes y combinados,
+con la primera página de 20 resultados.
+
+Uso: python benchmarks/bench_search.py [n_posts] [n_búsquedas]
+"""
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import insert
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.crud.crud_post import post_crud
+from app.models.models import Post, User
+
+# Vocabulario de palabras aleatorias con distribución de Zipf: pocas muy frecuentes y muchas raras
+_rng = random.Random(7)
+VOCABULARY = sorted({"".join(_rng.choices(string.ascii_lowercase, k=_rng.randint(3, 10))) for _ in range(30000)})
+_rng.shuffle(VOCABULARY)
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+BATCH = 10000
+
+QUERIES = {
+    "frecuente": VOCABULARY[0],
+    "rara": VOCABULARY[20000],
+    "dos términos": f"{VOCABULARY[2]} {VOCABULARY[40]}",
+    "tres términos": f"{VOCABULARY[0]} {VOCABULARY[10]} {VOCABULARY[300]}",
+}
+
+
+def random_text(rng, words):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words))
+
+
+async def populate(n):
+    rng = random.Random(42)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(email="a@example.com", username="autor", hashed_password="x"))
+        for start in range(0, n, BATCH):
+            rows = [
+                {"title": random_text(rng, 6), "content": random_text(rng, 60), "author_id": 1}
+                for _ in range(min(BATCH, n - start))
+            ]
+            await conn.execute(insert(Post), rows)
+
+
+async def measure(text, n):
+    latencies = []
+    async with AsyncSessionLocal() as db:
+        await post_crud.search(db, text, limit=20)
+        for _ in range(n):
+            start = time.perf_counter()
+            await post_crud.search(db, text, limit=20)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def main(n_posts, n_queries):
+    start = time.perf_counter()
+    await populate(n_posts)
+    print(f"{n_posts} posts insertados e indexados en {time.perf_counter() - start:.1f} s")
+    for name, text in QUERIES.items():
+        p50, p95 = await measure(text, n_queries)
+        print(f"{name:<14} {QUERIES[name]!r:<24} p50 {p50 * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+    await engine.dispose()
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    ))
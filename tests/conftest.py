@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+# Base de datos de las pruebas: SQLite en un archivo temporal salvo que se indique otra (p. ej. PostgreSQL).
+# Un archivo y no :memory: para que varias sesiones concurrentes vean la misma base.
+# Se fija antes de importar la app, que crea el motor al importarse
+TEST_DATABASE_URL = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='api-tests-')}/test.db"
+)
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+# El rate limiting y el access log se prueban con sus propias instancias
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["ACCESS_LOG_ENABLED"] = "false"
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.database import AsyncSessionLocal, Base, engine, recent_writers
+from app.core.response_cache import response_cache
+from app.core.revocation import revocation_store
+from app.core.security import create_access_token, get_password_hash, user_cache
+from app.core.tokens import verified_tokens
+from app.crud.tag_index import tag_index
+from app.main import app
+from app.models.models import User
+
+PASSWORD = "Passw0rdX"
+# Un único hash de bcrypt para todos los usuarios de prueba
+PASSWORD_HASH = get_password_hash(PASSWORD)
+API = "/api/v1"
+
+
+async def reset_app_state() -> None:
+    """Vacía las caches e índices globales del proceso entre pruebas"""
+    await user_cache.clear()
+    verified_tokens.clear()
+    await recent_writers.clear()
+    await response_cache._entries.clear()
+    await response_cache._versions.clear()
+    response_cache.hits = response_cache.misses = response_cache.not_modified = 0
+    tag_index._loaded = False
+    await tag_index._shared.clear()
+    revocation_store._expiry.clear()
+    revocation_store._rebuild()
+    revocation_store._loaded = False
+    revocation_store._next_check = 0.0
+    await revocation_store._shared.clear()
+
+
+@pytest_asyncio.fixture
+async def database():
+    """Esquema nuevo y estado global vacío para cada prueba"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await reset_app_state()
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(database):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def client(database):
+    """Cliente HTTP contra la app en el mismo event loop (sin servidor)"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client
+
+
+@pytest.fixture
+def make_user(database):
+    """Crea usuarios directamente en la base (con PASSWORD como contraseña)"""
+    async def make(username: str = "alice", **values) -> User:
+        async with AsyncSessionLocal() as session:
+            user = User(
+                email=values.pop("email", f"{username}@example.com"),
+                username=username,
+                hashed_password=PASSWORD_HASH,
+                **values,
+            )
+            session.add(user)
+            await session.commit()
+            return user
+    return make
+
+
+def auth_headers(username: str) -> dict:
+    """Header Authorization con un token de acceso válido para el usuario"""
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+@pytest.fixture
+def headers():
+    return auth_headers
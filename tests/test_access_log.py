@@ -0,0 +1,50 @@
+"""Access log: niveles configurables y errores de escritura"""
+import io
+import json
+import logging
+
+import pytest
+
+from app.core.access_log import AccessLogger, _parse_level
+
+
+@pytest.mark.parametrize("name, level", [("DEBUG", logging.DEBUG), ("info", logging.INFO), ("Warning", logging.WARNING)])
+def test_parse_level_accepts_names_in_any_case(name, level):
+    assert _parse_level(name) == level
+
+
+@pytest.mark.parametrize("name", ["verbose", "Level 5", ""])
+def test_parse_level_rejects_unknown_names(name):
+    with pytest.raises(ValueError):
+        _parse_level(name)
+
+
+def test_unknown_path_level_fails_at_startup():
+    with pytest.raises(ValueError):
+        AccessLogger(path_levels={"/health": "quiet"})
+
+
+def test_requests_are_written_as_json_lines():
+    stream = io.StringIO()
+    logger = AccessLogger(level="DEBUG", path_levels={"/health": "DEBUG"}, stream=stream)
+    logger.log_request(200, "/health", method="GET")
+    logger.log_request(404, "/missing", method="GET")
+    logger.close()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line["path"], line["level"]) for line in lines] == [("/health", "debug"), ("/missing", "warning")]
+
+
+class BrokenStream(io.StringIO):
+    def write(self, text):
+        raise OSError("disco lleno")
+
+
+def test_write_errors_are_counted_and_reported_once(capsys):
+    logger = AccessLogger(stream=BrokenStream())
+    for _ in range(2):
+        logger.log_request(200, "/", method="GET")
+        logger.close()
+
+    assert logger.get_stats() == {"dropped": 0, "write_errors": 2, "queued": 0}
+    assert capsys.readouterr().err.count("access log: write failed") == 1
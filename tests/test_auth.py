@@ -0,0 +1,95 @@
+"""Rotación de refresh tokens, logout y lista de tokens revocados"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core.revocation import revocation_store
+from app.core.security import create_token_pair
+from app.models.models import RevokedToken
+from conftest import API
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_and_rejects_reuse(client, make_user):
+    await make_user("alice")
+    tokens = create_token_pair("alice")
+
+    response = await client.post(f"{API}/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    reused = await client.post(f"{API}/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert reused.status_code == 401
+    # El par nuevo sigue funcionando
+    response = await client.post(f"{API}/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_access_token(client, make_user):
+    await make_user("alice")
+    tokens = create_token_pair("alice")
+    response = await client.post(f"{API}/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refresh_only_one_wins(client, make_user):
+    await make_user("alice")
+    body = {"refresh_token": create_token_pair("alice")["refresh_token"]}
+    responses = await asyncio.gather(*(client.post(f"{API}/auth/refresh", json=body) for _ in range(2)))
+    assert sorted(response.status_code for response in responses) == [200, 401]
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_and_refresh_tokens(client, make_user):
+    await make_user("alice")
+    tokens = create_token_pair("alice")
+    auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert (await client.get(f"{API}/users/", headers=auth)).status_code == 200
+
+    response = await client.post(f"{API}/auth/logout", headers=auth, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 204
+
+    assert (await client.get(f"{API}/users/", headers=auth)).status_code == 401
+    response = await client.post(f"{API}/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_from_another_worker_is_synced_not_reloaded(db, monkeypatch):
+    await revocation_store.load(db)
+    assert not await revocation_store.is_revoked(db, "other")
+
+    # Otro worker revoca: fila en la tabla y nueva versión compartida
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    await db.execute(insert(RevokedToken).values(jti="other", expires_at=expires_at))
+    await db.commit()
+    await revocation_store._shared.set("version", time.time_ns())
+
+    async def fail_load(db):
+        raise AssertionError("un cambio de versión no debe recargar la tabla entera")
+    monkeypatch.setattr(revocation_store, "load", fail_load)
+
+    # Dentro del intervalo de comprobación la versión no se consulta
+    assert not await revocation_store.is_revoked(db, "other")
+    revocation_store._next_check = 0.0
+    assert await revocation_store.is_revoked(db, "other")
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_expired_revocations(db):
+    await revocation_store.load(db)
+    now = time.time()
+    assert await revocation_store.revoke(db, "expired", now - 60)
+    assert await revocation_store.revoke(db, "valid", now + 3600)
+
+    assert await revocation_store.sweep(db) == 1
+
+    assert not await revocation_store.is_revoked(db, "expired")
+    assert await revocation_store.is_revoked(db, "valid")
+    assert await db.scalar(select(func.count()).select_from(RevokedToken)) == 1
@@ -0,0 +1,102 @@
+"""Operaciones masivas: errores por posición, permisos y registros eliminados"""
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.crud.bulk import bulk_update
+from app.models.models import Item, Post
+from conftest import API
+
+
+@pytest_asyncio.fixture
+async def owners(client, make_user, headers):
+    """Items de alice y de bob"""
+    await make_user("alice")
+    await make_user("bob")
+    auth = {"alice": headers("alice"), "bob": headers("bob")}
+    items = {}
+    for owner in auth:
+        response = await client.post(
+            f"{API}/items/bulk", headers=auth[owner],
+            json=[{"title": f"{owner}-{i}", "price": 1} for i in range(2)],
+        )
+        items[owner] = [item["id"] for item in response.json()["results"]]
+    return {"auth": auth, "items": items}
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_reports_errors_by_position(client, owners):
+    mine, theirs = owners["items"]["alice"], owners["items"]["bob"]
+    response = await client.put(f"{API}/items/bulk", headers=owners["auth"]["alice"], json=[
+        {"id": mine[0], "title": "nuevo"},
+        {"id": 999},
+        {"id": theirs[0], "title": "ajeno"},
+        {"id": mine[1], "price": 5},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert [(item["id"], item["title"], item["price"]) for item in body["results"]] == [
+        (mine[0], "nuevo", 1), (mine[1], "alice-1", 5),
+    ]
+    assert body["errors"] == [
+        {"index": 1, "id": 999, "detail": "Item not found"},
+        {"index": 2, "id": theirs[0], "detail": "Not enough permissions"},
+    ]
+
+    # El item ajeno no cambió
+    response = await client.get(f"{API}/items/{theirs[0]}", headers=owners["auth"]["bob"])
+    assert response.json()["title"] == "bob-0"
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_and_restore_report_errors(client, owners):
+    mine, theirs = owners["items"]["alice"], owners["items"]["bob"]
+    auth = owners["auth"]["alice"]
+    response = await client.post(f"{API}/items/bulk/delete", headers=auth, json={"ids": [theirs[0], 999, mine[0]]})
+    assert response.json() == {
+        "ids": [mine[0]],
+        "errors": [
+            {"index": 0, "id": theirs[0], "detail": "Not enough permissions"},
+            {"index": 1, "id": 999, "detail": "Item not found"},
+        ],
+    }
+
+    response = await client.post(f"{API}/items/bulk/restore", headers=auth, json={"ids": [mine[1], mine[0]]})
+    assert response.json() == {
+        "ids": [mine[0]],
+        "errors": [{"index": 0, "id": mine[1], "detail": "Item not found or not deleted"}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_skips_deleted_rows(db, owners):
+    mine = owners["items"]["alice"]
+    await db.execute(update(Item).where(Item.id == mine[1]).values(is_deleted=True))
+    await db.commit()
+
+    # Un soft delete entre la validación y el UPDATE no se pisa ni se devuelve
+    updated = await bulk_update(db, Item, [{"id": id, "title": "tarde"} for id in mine], mine)
+    await db.commit()
+    assert [item.id for item in updated] == [mine[0]]
+    titles = dict((await db.execute(select(Item.id, Item.title).filter(Item.id.in_(mine)))).all())
+    assert titles == {mine[0]: "tarde", mine[1]: "alice-1"}
+
+
+@pytest.mark.asyncio
+async def test_tag_only_bulk_update_marks_post_updated(client, db, make_user, headers):
+    await make_user("alice", is_superuser=True)
+    auth = headers("alice")
+    tag = (await client.post(f"{API}/tags/", headers=auth, json={"name": "python"})).json()
+    post = (await client.post(f"{API}/posts/", headers=auth, json={"title": "Post", "content": "contenido del post"})).json()
+    long_ago = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    await db.execute(update(Post).where(Post.id == post["id"]).values(updated_at=long_ago))
+    await db.commit()
+
+    response = await client.put(f"{API}/posts/bulk", headers=auth, json=[{"id": post["id"], "tag_ids": [tag["id"]]}])
+    assert response.status_code == 200
+    [result] = response.json()["results"]
+    assert datetime.fromisoformat(result["updated_at"]).year > 2020
+    response = await client.get(f"{API}/posts/{post['id']}/with-relations", headers=auth)
+    assert [t["id"] for t in response.json()["tags"]] == [tag["id"]]
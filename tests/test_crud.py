@@ -0,0 +1,137 @@
+"""Repositorios CRUD: lectura de activos, UPDATE ... RETURNING y soft delete con cascada"""
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.crud.crud_comment import comment_crud
+from app.crud.crud_item import item_crud
+from app.crud.crud_post import post_crud
+from app.models.models import Comment, Item
+from app.schemas.schemas import CommentCreate, ItemCreate, ItemUpdate, PostCreate
+
+
+@pytest_asyncio.fixture
+async def owners(make_user):
+    return [(await make_user(name)).id for name in ("alice", "bob")]
+
+
+@pytest_asyncio.fixture
+async def items(db, owners):
+    """Tres items de alice y uno de bob"""
+    alice, bob = owners
+    created = await item_crud.bulk_create_items(db, [ItemCreate(title=f"item {i}", price=i + 1) for i in range(3)], owner_id=alice)
+    created += await item_crud.bulk_create_items(db, [ItemCreate(title="ajeno", price=1)], owner_id=bob)
+    return [item.id for item in created]
+
+
+@pytest.mark.asyncio
+async def test_get_and_get_multi_only_return_active(db, items):
+    assert (await item_crud.get(db, items[0])).title == "item 0"
+    assert await item_crud.get(db, 999) is None
+
+    assert await item_crud.soft_delete(db, items[1])
+    assert await item_crud.get(db, items[1]) is None
+    assert [item.id for item in await item_crud.get_multi(db)] == [items[0], items[2], items[3]]
+    assert [item.id for item in await item_crud.get_multi(db, skip=1, limit=1)] == [items[2]]
+    assert [item.id for item in await item_crud.get_deleted(db)] == [items[1]]
+
+
+@pytest.mark.asyncio
+async def test_get_multi_by_filters_by_column(db, owners, items):
+    alice, bob = owners
+    assert [item.id for item in await item_crud.get_items_by_owner(db, alice)] == items[:3]
+    assert [item.id for item in await item_crud.get_items_by_owner(db, bob)] == items[3:]
+    assert (await item_crud.get_by(db, "title", "ajeno")).id == items[3]
+
+
+@pytest.mark.asyncio
+async def test_update_returns_row_and_only_touches_sent_fields(db, items):
+    updated = await item_crud.update(db, items[0], ItemUpdate(price=9.5))
+    assert (updated.title, updated.price) == ("item 0", 9.5)
+    assert (await item_crud.get(db, items[0])).price == 9.5
+
+    # Sin campos no hay UPDATE: devuelve el registro tal cual
+    assert (await item_crud.update(db, items[0], ItemUpdate())).price == 9.5
+    assert await item_crud.update(db, 999, ItemUpdate(price=1)) is None
+
+    await item_crud.soft_delete(db, items[0])
+    assert await item_crud.update(db, items[0], ItemUpdate(price=1)) is None
+
+
+@pytest.mark.asyncio
+async def test_soft_delete_and_restore_are_idempotent(db, items):
+    assert await item_crud.soft_delete(db, items[0])
+    assert not await item_crud.soft_delete(db, items[0])
+    [deleted] = await item_crud.get_deleted(db)
+    assert deleted.deleted_at is not None
+
+    assert await item_crud.restore(db, items[0])
+    assert not await item_crud.restore(db, items[0])
+    result = await db.execute(select(Item.is_deleted, Item.deleted_at).filter(Item.id == items[0]))
+    assert result.one() == (False, None)
+
+
+@pytest_asyncio.fixture
+async def post_with_comments(db, owners):
+    """Post de alice con tres comentarios; el último eliminado antes que el post"""
+    post = await post_crud.create_post(db, PostCreate(title="Post", content="contenido del post"), author_id=owners[0])
+    comments = [
+        (await comment_crud.create_comment(db, CommentCreate(content=f"comentario {i}", post_id=post.id), author_id=owners[1])).id
+        for i in range(3)
+    ]
+    await comment_crud.soft_delete(db, comments[2])
+    # Eliminado mucho antes: su deleted_at nunca coincide con el del post
+    await db.execute(
+        update(Comment).where(Comment.id == comments[2]).values(deleted_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+    )
+    await db.commit()
+    return post.id, comments
+
+
+async def comment_states(db, ids) -> list:
+    result = await db.execute(select(Comment.id, Comment.is_deleted).filter(Comment.id.in_(ids)).order_by(Comment.id))
+    return [is_deleted for _, is_deleted in result.all()]
+
+
+@pytest.mark.asyncio
+async def test_post_soft_delete_cascades_to_comments(db, post_with_comments):
+    post_id, comments = post_with_comments
+    assert await post_crud.soft_delete(db, post_id)
+    assert await comment_states(db, comments) == [True, True, True]
+
+    # Los comentarios eliminados junto con el post copian su deleted_at
+    post_deleted_at = (await post_crud.get_deleted(db))[0].deleted_at
+    result = await db.execute(select(Comment.deleted_at).filter(Comment.id.in_(comments[:2])))
+    assert set(result.scalars()) == {post_deleted_at}
+
+    # Al restaurar solo vuelven esos, no el eliminado por separado
+    assert await post_crud.restore(db, post_id)
+    assert await comment_states(db, comments) == [False, False, True]
+    assert [comment.id for comment in await comment_crud.get_comments_by_post(db, post_id)] == comments[:2]
+
+
+@pytest.mark.asyncio
+async def test_bulk_post_soft_delete_cascades_to_comments(db, post_with_comments):
+    post_id, comments = post_with_comments
+    assert await post_crud.bulk_soft_delete_posts(db, [post_id]) == ([post_id], [])
+    assert await comment_states(db, comments) == [True, True, True]
+
+    assert await post_crud.bulk_restore_posts(db, [post_id]) == ([post_id], [])
+    assert await comment_states(db, comments) == [False, False, True]
+
+
+@pytest.mark.asyncio
+async def test_noop_delete_or_restore_leaves_comments_alone(db, post_with_comments):
+    post_id, comments = post_with_comments
+    # Restaurar un post activo no restaura comentarios eliminados por separado
+    assert not await post_crud.restore(db, post_id)
+    assert await comment_states(db, comments) == [False, False, True]
+
+    # Eliminar un post ya eliminado no vuelve a copiar su deleted_at
+    await post_crud.soft_delete(db, post_id)
+    await db.execute(update(Comment).where(Comment.id == comments[0]).values(is_deleted=False, deleted_at=None))
+    await db.commit()
+    assert not await post_crud.soft_delete(db, post_id)
+    assert await comment_states(db, comments) == [False, True, True]
@@ -0,0 +1,105 @@
+"""Métricas de latencia: histogramas, ventanas y agregación entre workers"""
+import json
+import os
+import time
+
+import pytest
+
+from app.core.metrics import BUCKET_BOUNDS, Histogram, RequestMetrics, bucket_index
+
+
+def test_bucket_index_bounds():
+    assert bucket_index(0) == 0
+    for index in (1, 10, 40):
+        assert bucket_index(BUCKET_BOUNDS[index]) == index
+        assert bucket_index(BUCKET_BOUNDS[index] * 1.01) == index + 1
+    assert bucket_index(10 ** 6) == len(BUCKET_BOUNDS)
+
+
+def test_percentiles_within_bucket_error():
+    histogram = Histogram()
+    durations = [i / 1000 for i in range(1, 1001)]  # 1 ms .. 1 s
+    for seconds in durations:
+        histogram.record(seconds)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = durations[int(q * len(durations)) - 1]
+        assert exact <= histogram.percentile(q) <= exact * 2 ** 0.25
+    assert histogram.percentile(1.0) == histogram.max == 1.0
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_percentile_is_capped_by_max_and_merge_adds_up():
+    first, second = Histogram(), Histogram()
+    first.record(0.0105)
+    second.record(0.002)
+    second.record(0.003)
+    assert first.percentile(0.99) == 0.0105
+
+    first.merge(Histogram.from_dict(json.loads(json.dumps(second.to_dict()))))
+    assert (first.count, first.max) == (3, 0.0105)
+    assert first.sum == pytest.approx(0.0155)
+    assert first.percentile(0.5) == pytest.approx(0.003, rel=0.19)
+
+
+def test_windows_only_include_recent_slots():
+    metrics = RequestMetrics(windows=(60, 300), slot_seconds=10)
+    metrics.record("GET", "/items", 200, 0.01)
+    # Un slot de hace dos minutos: fuera de la ventana de 60 s, dentro de la de 300 s
+    old_slot = int(time.time() // 10) - 12
+    metrics.slots[old_slot] = {"GET /items 200": Histogram()}
+    metrics.slots[old_slot]["GET /items 200"].record(0.5)
+
+    [route] = metrics.get_stats()["routes"]
+    assert route["windows"]["60s"]["count"] == 1
+    assert route["windows"]["300s"]["count"] == 2
+    assert route["total"]["count"] == 1
+
+
+def write_snapshot(directory, pid: int, snapshot: dict, age: float = 0.0) -> str:
+    path = os.path.join(directory, f"worker-{pid}.json")
+    with open(path, "w") as f:
+        json.dump({**snapshot, "pid": pid, "updated_at": time.time() - age}, f)
+    return path
+
+
+def test_collect_merges_workers_and_drops_stale_snapshots(tmp_path):
+    other = RequestMetrics()
+    other.record("GET", "/items", 200, 0.02)
+    fresh = write_snapshot(tmp_path, 1, other.snapshot())
+    stale = write_snapshot(tmp_path, 2, other.snapshot(), age=60)
+    (tmp_path / "worker-3.json").write_text("{roto")
+
+    metrics = RequestMetrics(stale_seconds=30)
+    metrics.record("GET", "/items", 200, 0.01)
+    metrics.flush(str(tmp_path))
+    snapshots = metrics.collect(str(tmp_path))
+
+    assert [s["pid"] for s in snapshots] == [os.getpid(), 1]
+    assert os.path.exists(fresh) and not os.path.exists(stale)
+    stats = metrics.get_stats(snapshots)
+    assert (stats["workers"], stats["total_requests"]) == (2, 2)
+    assert stats["routes"][0]["total"]["max"] == 0.02
+
+
+def test_prometheus_buckets_are_cumulative():
+    metrics = RequestMetrics()
+    for seconds in (0.001, 0.01, 0.1):
+        metrics.record("GET", "/items", 200, seconds)
+    lines = metrics.prometheus().splitlines()
+
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines if "_bucket{" in line]
+    assert counts == sorted(counts) and counts[-1] == 3
+    assert 'http_request_duration_seconds_count{method="GET",route="/items",status="200"} 3' in lines
+
+
+@pytest.mark.asyncio
+async def test_stats_and_metrics_endpoints(client):
+    await client.get("/health")
+    stats = (await client.get("/stats")).json()
+    assert any(route["route"] == "/health" for route in stats["routes"])
+    assert {"access_log", "password_hashing", "response_cache"} <= set(stats)
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/health"' in response.text
@@ -0,0 +1,95 @@
+"""Paginación keyset por (created_at, id) con el cursor en X-Next-Cursor"""
+import asyncio
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from app.models.models import Item
+from conftest import API
+
+
+@pytest_asyncio.fixture
+async def auth(make_user, headers):
+    await make_user("alice")
+    return headers("alice")
+
+
+async def create_items(client, auth, count: int) -> list:
+    response = await client.post(
+        f"{API}/items/bulk", headers=auth, json=[{"title": f"item {i}", "price": 1} for i in range(count)]
+    )
+    return [item["id"] for item in response.json()["results"]]
+
+
+async def walk(client, auth, limit: int) -> list:
+    """Recorre /items/ siguiendo el cursor; devuelve los ids de cada página y si traía cursor"""
+    pages, params = [], {"limit": limit}
+    while True:
+        response = await client.get(f"{API}/items/", headers=auth, params=params)
+        assert response.status_code == 200
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        pages.append(([item["id"] for item in response.json()], cursor is not None))
+        if cursor is None:
+            return pages
+        params = {"limit": limit, "after": cursor}
+
+
+@pytest.mark.asyncio
+async def test_pages_are_stable_when_created_at_ties(client, db, auth):
+    first = await create_items(client, auth, 1)
+    ids = await create_items(client, auth, 6)
+    # Los seis con el mismo created_at (copiado en la base, con su formato), y el
+    # primero después de ellos aunque tenga el menor id
+    source = aliased(Item)
+    same_time = select(source.created_at).where(source.id == ids[0]).scalar_subquery()
+    await db.execute(update(Item).where(Item.id.in_(ids)).values(created_at=same_time))
+    await db.commit()
+    await asyncio.sleep(1.1)
+    await db.execute(update(Item).where(Item.id == first[0]).values(created_at=func.current_timestamp()))
+    await db.commit()
+
+    pages = await walk(client, auth, limit=3)
+    assert pages == [(ids[:3], True), (ids[3:], True), (first, False)]
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_absent_on_last_page(client, auth):
+    ids = await create_items(client, auth, 4)
+    # Con una última página completa el cursor lleva a una página vacía sin cursor
+    assert await walk(client, auth, limit=2) == [(ids[:2], True), (ids[2:], True), ([], False)]
+    assert await walk(client, auth, limit=10) == [(ids, False)]
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "%%%",
+    "bm8tanNvbg",  # "no-json"
+    raw_cursor(["no es una fecha", 1]),
+    raw_cursor(["2024-01-01T00:00:00"]),
+    raw_cursor({"created_at": "2024-01-01T00:00:00", "id": 1}),
+    raw_cursor([None, 1]),
+    raw_cursor(5),
+])
+async def test_invalid_cursor_returns_400(client, auth, cursor):
+    response = await client.get(f"{API}/items/", headers=auth, params={"after": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+@pytest.mark.asyncio
+async def test_cursor_after_last_row_returns_empty_page(client, auth):
+    await create_items(client, auth, 2)
+    cursor = encode_cursor(datetime(2999, 1, 1, tzinfo=timezone.utc), 1)
+    response = await client.get(f"{API}/items/", headers=auth, params={"after": cursor})
+    assert response.json() == []
+    assert NEXT_CURSOR_HEADER not in response.headers
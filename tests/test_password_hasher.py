@@ -0,0 +1,80 @@
+"""Pool de hashing de contraseñas: admisión acotada y cancelación de trabajos en cola"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import PasswordHasher
+from conftest import API, PASSWORD
+
+
+@pytest.fixture
+def release():
+    """Libera el trabajo que ocupa el pool (también al terminar la prueba)"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def hasher(release):
+    """Pool de un hilo que admite dos trabajos"""
+    hasher = PasswordHasher(max_workers=1, max_pending=2)
+    yield hasher
+    release.set()
+    hasher.shutdown()
+
+
+async def occupy(hasher: PasswordHasher, release: threading.Event) -> asyncio.Task:
+    """Ocupa el único hilo del pool hasta `release`"""
+    task = asyncio.create_task(hasher.submit(release.wait))
+    while hasher.in_flight == 0:
+        await asyncio.sleep(0.001)
+    return task
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_job_frees_its_slot(hasher, release):
+    running = await occupy(hasher, release)
+    queued = asyncio.create_task(hasher.submit(lambda: "nunca"))
+    await asyncio.sleep(0)
+    assert hasher.get_stats()["queued"] == 1
+
+    # El pool está lleno: el siguiente se rechaza
+    with pytest.raises(HTTPException):
+        await hasher.submit(lambda: None)
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    assert hasher.get_stats()["queued"] == 0
+
+    # El lugar del trabajo cancelado vuelve a estar disponible
+    admitted = asyncio.create_task(hasher.submit(lambda: "ok"))
+    await asyncio.sleep(0)
+    release.set()
+    assert await admitted == "ok"
+    await running
+    stats = hasher.get_stats()
+    assert (stats["queued"], stats["in_flight"], stats["completed"], stats["rejected"]) == (0, 0, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_returns_503_with_retry_after(client, make_user, hasher, release, monkeypatch):
+    await make_user("alice")
+    monkeypatch.setattr(security, "password_hasher", hasher)
+    running = await occupy(hasher, release)
+    queued = asyncio.create_task(hasher.submit(lambda: None))
+    await asyncio.sleep(0)
+
+    form = {"username": "alice", "password": PASSWORD}
+    response = await client.post(f"{API}/auth/token", data=form)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    release.set()
+    await asyncio.gather(running, queued)
+    response = await client.post(f"{API}/auth/token", data=form)
+    assert response.status_code == 200
@@ -0,0 +1,97 @@
+"""
+Regresión de planes de consulta: las consultas de listado más usadas deben
+recorrer sus índices compuestos (o parciales en PostgreSQL) en el orden de la
+paginación, sin un scan completo ni un ordenamiento aparte.
+
+Por defecto corre sobre SQLite; con TEST_DATABASE_URL apuntando a
+PostgreSQL también comprueba los índices parciales.
+"""
+import os
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import Base, build_async_url
+from app.core.pagination import encode_cursor, paginate
+from app.crud.crud_comment import comment_crud
+from app.crud.crud_item import item_crud
+from app.crud.crud_post import post_crud
+from app.crud.crud_user import user_crud
+from app.models.models import Comment, Item, Post, User
+
+# conftest.py fija DATABASE_URL a partir de TEST_DATABASE_URL
+TEST_DATABASE_URL = os.environ["DATABASE_URL"]
+CURSOR = encode_cursor(datetime(2024, 1, 1), 1)
+
+# (nombre, statement, índice compuesto esperado, índice parcial esperado en PostgreSQL)
+LIST_QUERIES = [
+    ("posts", paginate(post_crud.active, Post), "ix_posts_is_deleted_created_at", None),
+    ("posts_keyset", paginate(post_crud.active, Post, after=CURSOR), "ix_posts_is_deleted_created_at", None),
+    ("posts_by_author", paginate(post_crud.active_by("author_id"), Post).params(author_id=1),
+     "ix_posts_author_id_is_deleted_created_at", "ix_posts_author_id_active"),
+    ("posts_by_author_keyset", paginate(post_crud.active_by("author_id"), Post, after=CURSOR).params(author_id=1),
+     "ix_posts_author_id_is_deleted_created_at", "ix_posts_author_id_active"),
+    ("comments", paginate(comment_crud.active, Comment), "ix_comments_is_deleted_created_at", None),
+    ("comments_by_post", paginate(comment_crud.active_by("post_id"), Comment).params(post_id=1),
+     "ix_comments_post_id_is_deleted_created_at", "ix_comments_post_id_active"),
+    ("comments_by_post_keyset", paginate(comment_crud.active_by("post_id"), Comment, after=CURSOR).params(post_id=1),
+     "ix_comments_post_id_is_deleted_created_at", "ix_comments_post_id_active"),
+    ("comments_by_author", paginate(comment_crud.active_by("author_id"), Comment).params(author_id=1),
+     "ix_comments_author_id_is_deleted_created_at", "ix_comments_author_id_active"),
+    ("items", paginate(item_crud.active, Item), "ix_items_is_deleted_created_at", None),
+    ("items_by_owner", paginate(item_crud.active_by("owner_id"), Item).params(owner_id=1),
+     "ix_items_owner_id_is_deleted_created_at", "ix_items_owner_id_active"),
+    ("active_users", paginate(user_crud._by_status[True], User), "ix_users_active", "ix_users_active"),
+]
+
+
+@pytest_asyncio.fixture
+async def connection():
+    engine = create_async_engine(build_async_url(TEST_DATABASE_URL))
+    async with engine.connect() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            # Con tablas vacías el planner siempre prefiere el scan secuencial
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        yield conn
+        await conn.rollback()
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.commit()
+    await engine.dispose()
+
+
+async def query_plan(conn, stmt) -> str:
+    """Plan de la consulta como texto (EXPLAIN QUERY PLAN en SQLite, EXPLAIN en PostgreSQL)"""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    explain = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    result = await conn.exec_driver_sql(explain + sql)
+    # SQLite devuelve (id, parent, notused, detail); PostgreSQL una línea por fila
+    return "\n".join(str(row[-1]) for row in result)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "stmt, index", [(stmt, index) for _, stmt, index, _ in LIST_QUERIES], ids=[q[0] for q in LIST_QUERIES]
+)
+async def test_list_query_uses_index(connection, stmt, index):
+    if connection.dialect.name != "sqlite":
+        pytest.skip("los índices compuestos se comprueban en SQLite; PostgreSQL usa los parciales")
+    plan = await query_plan(connection, stmt)
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "stmt, index",
+    [(stmt, index) for _, stmt, _, index in LIST_QUERIES if index is not None],
+    ids=[q[0] for q in LIST_QUERIES if q[3] is not None],
+)
+async def test_list_query_uses_partial_index(connection, stmt, index):
+    if connection.dialect.name != "postgresql":
+        pytest.skip("índices parciales WHERE is_deleted = false solo en PostgreSQL")
+    plan = await query_plan(connection, stmt)
+    assert index in plan, plan
+    assert "Sort" not in plan, plan
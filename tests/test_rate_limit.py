@@ -0,0 +1,104 @@
+"""Rate limiting con token buckets: rutas, 429 con Retry-After, recarga y claves por usuario"""
+import time
+
+import pytest
+from jose import jwt
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import MemoryBucketStore, RateLimitPolicy, rate_limiter
+from conftest import API, PASSWORD, auth_headers
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize("path, matches", [
+    ("/api/v1/auth/token", True),
+    ("/api/v1/auth/token/", True),
+    ("/api/v1/auth/token/extra", True),
+    ("/api/v1/auth/tokens", False),
+    ("/api/v1/auth/tokenize/x", False),
+    ("/api/v1/auth", False),
+])
+def test_policy_matches_whole_segments(path, matches):
+    policy = RateLimitPolicy("auth", ["/api/v1/auth/token/"], capacity=1, per_seconds=1, methods=["post"])
+    assert policy.matches("POST", path) is matches
+    assert not policy.matches("GET", "/api/v1/auth/token")
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_at_configured_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    store = MemoryBucketStore(maxsize=10)
+
+    assert [await store.take("k", 2, 1.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+    clock.now += 0.5
+    assert await store.take("k", 2, 1.0) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert await store.take("k", 2, 1.0) == 0.0
+    # Nunca acumula más que la capacidad
+    clock.now += 100
+    assert [await store.take("k", 2, 1.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+@pytest.fixture
+def policies(monkeypatch):
+    """Activa políticas en el limitador de la app con un almacén vacío"""
+    def configure(*policies: RateLimitPolicy):
+        monkeypatch.setattr(rate_limiter, "policies", list(policies))
+        monkeypatch.setattr(rate_limiter, "store", MemoryBucketStore(maxsize=100))
+    return configure
+
+
+@pytest.mark.asyncio
+async def test_exhausted_bucket_returns_429_with_retry_after(client, make_user, policies):
+    await make_user("alice")
+    policy = RateLimitPolicy("auth", [f"{API}/auth/token"], capacity=2, per_seconds=60, methods=["POST"])
+    policies(policy)
+    form = {"username": "alice", "password": PASSWORD}
+
+    statuses = [(await client.post(f"{API}/auth/token", data=form)).status_code for _ in range(2)]
+    assert statuses == [200, 200]
+    response = await client.post(f"{API}/auth/token", data=form)
+    assert response.status_code == 429
+    assert response.json()["error"] == "RATE_LIMITED"
+    # Un token cada 30 s
+    assert response.headers["retry-after"] == "30"
+    assert rate_limiter.get_stats() == {"auth": {"allowed": 2, "limited": 1}}
+
+    # Otras rutas del mismo prefijo de texto no comparten el bucket
+    assert (await client.post(f"{API}/auth/tokens")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_user_key_falls_back_to_ip_for_forged_tokens(client, make_user, policies):
+    await make_user("alice")
+    policies(RateLimitPolicy("posts", [f"{API}/posts"], capacity=1, per_seconds=60, key="user"))
+    forged = jwt.encode({"sub": "alice", "exp": time.time() + 60}, "otra-clave", algorithm=settings.ALGORITHM)
+    forged_headers = {"Authorization": f"Bearer {forged}"}
+
+    assert (await client.get(f"{API}/posts/", headers=forged_headers)).status_code == 401
+    assert (await client.get(f"{API}/posts/", headers=forged_headers)).status_code == 429
+    # El token falso consumió el bucket de su IP, no el de alice
+    assert (await client.get(f"{API}/posts/", headers=auth_headers("alice"))).status_code == 200
+    assert (await client.get(f"{API}/posts/", headers=auth_headers("alice"))).status_code == 429
+
+
+def test_client_key_uses_verified_subject_or_ip():
+    policy = RateLimitPolicy("posts", ["/posts"], capacity=1, per_seconds=1, key="user")
+    scope = {"type": "http", "client": ("10.0.0.1", 1234), "headers": []}
+    assert rate_limiter.client_key(policy, scope) == "posts:ip:10.0.0.1"
+
+    token = auth_headers("alice")["Authorization"].encode()
+    scope["headers"] = [(b"authorization", token)]
+    assert rate_limiter.client_key(policy, scope) == "posts:user:alice"
+
+    scope["headers"] = [(b"authorization", b"Bearer no-es-un-jwt")]
+    assert rate_limiter.client_key(policy, scope) == "posts:ip:10.0.0.1"
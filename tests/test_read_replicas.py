@@ -0,0 +1,104 @@
+"""Réplicas de lectura: balanceo y read-your-writes por subject verificado"""
+import time
+
+import pytest
+import pytest_asyncio
+from jose import jwt
+from starlette.requests import Request
+
+from app.core import database as database_module
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, ReplicaSet, recent_writers
+from conftest import API, TEST_DATABASE_URL
+
+
+@pytest_asyncio.fixture
+async def replica_set(tmp_path):
+    replica_set = ReplicaSet([f"sqlite:///{tmp_path}/replica-{i}.db" for i in range(2)])
+    yield replica_set
+    await replica_set.dispose()
+
+
+@pytest.mark.asyncio
+async def test_round_robin_alternates_replicas(replica_set):
+    chosen = [replica_set.choose() for _ in range(4)]
+    assert chosen == [replica_set.sessions[0], replica_set.sessions[1]] * 2
+
+
+@pytest.mark.asyncio
+async def test_least_busy_picks_replica_with_fewer_checked_out(replica_set):
+    replica_set.balancing = "least_busy"
+    async with replica_set.engines[0].connect():
+        assert replica_set.choose() is replica_set.sessions[1]
+        assert replica_set.choose() is replica_set.sessions[1]
+
+
+@pytest_asyncio.fixture
+async def replica(monkeypatch, database):
+    """Una réplica sobre la misma base de pruebas que cuenta las sesiones que entrega"""
+    replica_set = ReplicaSet([TEST_DATABASE_URL])
+    replica_set.chosen = 0
+    choose = replica_set.choose
+
+    def counting_choose():
+        replica_set.chosen += 1
+        return choose()
+
+    monkeypatch.setattr(replica_set, "choose", counting_choose)
+    monkeypatch.setattr(database_module, "replicas", replica_set)
+    yield replica_set
+    await replica_set.dispose()
+
+
+def forged_headers(username: str) -> dict:
+    token = jwt.encode({"sub": username, "exp": time.time() + 60}, "otra-clave", algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_primary_after_a_write(client, make_user, headers, replica):
+    await make_user("alice")
+    auth = headers("alice")
+    assert (await client.get(f"{API}/posts/", headers=auth)).status_code == 200
+    assert replica.chosen == 1
+
+    response = await client.post(f"{API}/posts/", headers=auth, json={"title": "Nuevo", "content": "recién escrito"})
+    assert response.status_code == 201
+    assert await recent_writers.get("alice")
+
+    # Dentro de la ventana la lectura ve su propia escritura en el primario
+    response = await client.get(f"{API}/posts/", headers=auth)
+    assert [post["title"] for post in response.json()] == ["Nuevo"]
+    assert replica.chosen == 1
+
+
+@pytest.mark.asyncio
+async def test_stickiness_expires_after_window(make_user, headers, replica):
+    await make_user("alice")
+    token = headers("alice")["Authorization"].encode()
+    request = Request({"type": "http", "method": "POST", "headers": [(b"authorization", token)]})
+    async for _ in database_module.get_db(request):
+        pass
+
+    expires_at, value = recent_writers._cache._data["alice"]
+    assert expires_at - time.monotonic() == pytest.approx(settings.DB_READ_YOUR_WRITES_SECONDS, abs=1)
+    assert await database_module.get_read_session_factory(request) is AsyncSessionLocal
+
+    recent_writers._cache._data["alice"] = (time.monotonic() - 1, value)
+    assert await database_module.get_read_session_factory(request) is replica.sessions[0]
+
+
+@pytest.mark.asyncio
+async def test_forged_token_does_not_pin_reads(client, make_user, headers, replica):
+    await make_user("alice")
+    forged = forged_headers("alice")
+
+    response = await client.post(f"{API}/posts/", headers=forged, json={"title": "x", "content": "y"})
+    assert response.status_code == 401
+    assert await recent_writers.get("alice") is None
+
+    # Aunque alice haya escrito, un token falsificado con su subject no lee del primario
+    await client.post(f"{API}/posts/", headers=headers("alice"), json={"title": "x", "content": "y"})
+    chosen = replica.chosen
+    await client.get(f"{API}/posts/", headers=forged)
+    assert replica.chosen == chosen + 1
@@ -0,0 +1,126 @@
+"""Cache de respuestas GET: aciertos, ETag / If-None-Match e invalidación por entidad"""
+import pytest
+import pytest_asyncio
+
+from app.core.response_cache import response_cache
+from conftest import API
+
+
+@pytest_asyncio.fixture
+async def data(client, make_user, headers):
+    """Superusuario con un tag, un post etiquetado, un comentario y un item"""
+    user = await make_user("alice", is_superuser=True)
+    auth = headers("alice")
+    tag = (await client.post(f"{API}/tags/", headers=auth, json={"name": "python"})).json()
+    post = (await client.post(
+        f"{API}/posts/", headers=auth, json={"title": "Primero", "content": "contenido del post", "tag_ids": [tag["id"]]}
+    )).json()
+    await client.post(f"{API}/comments/", headers=auth, json={"content": "comentario", "post_id": post["id"]})
+    await client.post(f"{API}/items/", headers=auth, json={"title": "libro", "price": 10})
+    return {"user": user, "post": post, "tag": tag, "auth": auth}
+
+
+# Escritura de cada entidad de la que dependen las respuestas cacheadas
+WRITES = {
+    "users": lambda client, data: client.put(
+        f"{API}/users/{data['user'].id}", headers=data["auth"], json={"name": "Alice"}
+    ),
+    "posts": lambda client, data: client.post(
+        f"{API}/posts/", headers=data["auth"], json={"title": "Otro", "content": "otro contenido"}
+    ),
+    "comments": lambda client, data: client.post(
+        f"{API}/comments/", headers=data["auth"], json={"content": "otro", "post_id": data["post"]["id"]}
+    ),
+    "items": lambda client, data: client.post(
+        f"{API}/items/", headers=data["auth"], json={"title": "lápiz", "price": 1}
+    ),
+    "tags": lambda client, data: client.post(f"{API}/tags/", headers=data["auth"], json={"name": "rust"}),
+}
+
+# Endpoint cacheado -> entidades de las que depende
+CACHED_ENDPOINTS = {
+    "/users/with-posts": ("users", "posts", "comments", "items"),
+    "/posts/summary": ("posts", "comments", "tags"),
+    "/posts/{post}/with-relations": ("posts", "comments", "tags", "users"),
+    "/tags/": ("tags",),
+    "/tags/with-posts": ("tags", "posts"),
+}
+
+
+def _url(path: str, data: dict) -> str:
+    return API + path.format(post=data["post"]["id"])
+
+
+@pytest.mark.asyncio
+async def test_users_with_posts_includes_items(client, data):
+    response = await client.get(f"{API}/users/with-posts", headers=data["auth"])
+    assert response.status_code == 200
+    [user] = response.json()
+    assert [item["title"] for item in user["items"]] == ["libro"]
+    assert len(user["posts"]) == 1 and len(user["comments"]) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", CACHED_ENDPOINTS)
+async def test_second_request_is_served_from_cache(client, data, path):
+    first = await client.get(_url(path, data), headers=data["auth"])
+    assert first.status_code == 200
+    hits = response_cache.hits
+
+    second = await client.get(_url(path, data), headers=data["auth"])
+    assert second.status_code == 200
+    assert response_cache.hits == hits + 1
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", CACHED_ENDPOINTS)
+async def test_if_none_match_returns_304(client, data, path):
+    etag = (await client.get(_url(path, data), headers=data["auth"])).headers["etag"]
+
+    response = await client.get(_url(path, data), headers={**data["auth"], "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    response = await client.get(_url(path, data), headers={**data["auth"], "If-None-Match": '"otra"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path, entity",
+    [(path, entity) for path, entities in CACHED_ENDPOINTS.items() for entity in entities],
+)
+async def test_write_to_dependency_invalidates(client, data, path, entity):
+    await client.get(_url(path, data), headers=data["auth"])
+    response = await WRITES[entity](client, data)
+    assert response.status_code in (200, 201)
+    misses = response_cache.misses
+
+    await client.get(_url(path, data), headers=data["auth"])
+    assert response_cache.misses == misses + 1
+
+
+@pytest.mark.asyncio
+async def test_unrelated_write_keeps_cache(client, data):
+    await client.get(f"{API}/tags/", headers=data["auth"])
+    await WRITES["items"](client, data)
+    hits = response_cache.hits
+
+    await client.get(f"{API}/tags/", headers=data["auth"])
+    assert response_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_invalidated_response_has_new_content_and_etag(client, data):
+    first = await client.get(f"{API}/users/with-posts", headers=data["auth"])
+    await WRITES["items"](client, data)
+
+    response = await client.get(
+        f"{API}/users/with-posts", headers={**data["auth"], "If-None-Match": first.headers["etag"]}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != first.headers["etag"]
+    assert len(response.json()[0]["items"]) == 2
@@ -0,0 +1,153 @@
+"""
+Búsqueda de texto completo de posts y comentarios. Corre sobre la base de
+pruebas configurada: FTS5 en SQLite o tsvector en PostgreSQL.
+"""
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.core.pagination import SEARCH_TRUNCATED_HEADER
+from app.models.search import HIGHLIGHT_START, HIGHLIGHT_STOP, MAX_SEARCH_TERMS, search_terms
+from conftest import API
+
+
+@pytest_asyncio.fixture
+async def auth(make_user, headers):
+    await make_user("alice")
+    return headers("alice")
+
+
+@pytest.fixture
+def create_post(client, auth):
+    async def create(title: str, content: str) -> dict:
+        response = await client.post(f"{API}/posts/", headers=auth, json={"title": title, "content": content})
+        assert response.status_code == 201
+        return response.json()
+    return create
+
+
+@pytest.fixture
+def search(client, auth):
+    async def search(q: str, path: str = "/posts/search", **params):
+        return await client.get(f"{API}{path}", headers=auth, params={"q": q, **params})
+    return search
+
+
+def ids(response) -> list:
+    assert response.status_code == 200, response.text
+    return [row["id"] for row in response.json()]
+
+
+def test_search_terms_drop_operators_and_quotes():
+    assert search_terms('"Hola" OR mundo* -NEAR(a, b) ^título') == ["hola", "or", "mundo", "near", "a", "b", "título"]
+    assert len(search_terms(" ".join(f"t{i}" for i in range(MAX_SEARCH_TERMS + 5)))) == MAX_SEARCH_TERMS
+
+
+@pytest.mark.asyncio
+async def test_operators_in_query_are_plain_words(create_post, search):
+    post = await create_post("Comillas", 'contenido con "near" y or sueltos')
+    assert ids(await search('"near" OR*')) == [post["id"]]
+    assert ids(await search("***")) == []
+
+
+@pytest.mark.asyncio
+async def test_all_terms_must_match(create_post, search):
+    both = await create_post("Colores", "un coche rojo y azul")
+    await create_post("Colores", "un coche rojo")
+    assert ids(await search("rojo azul")) == [both["id"]]
+
+
+@pytest.mark.asyncio
+async def test_title_matches_rank_higher(create_post, search):
+    in_content = await create_post("Mascotas", "el gato duerme en el sillón")
+    in_title = await create_post("Gato", "un animal que duerme en el sillón")
+    assert ids(await search("gato")) == [in_title["id"], in_content["id"]]
+
+
+@pytest.mark.asyncio
+async def test_results_are_highlighted(create_post, search):
+    await create_post("Aprender Python", "guía de python para principiantes")
+    [result] = (await search("python")).json()
+    assert f"{HIGHLIGHT_START}Python{HIGHLIGHT_STOP}" in result["title_highlight"]
+    assert f"{HIGHLIGHT_START}python{HIGHLIGHT_STOP}" in result["snippet"]
+    assert result["rank"] > 0
+
+
+@pytest.mark.asyncio
+async def test_index_follows_update_soft_delete_and_restore(client, auth, create_post, search):
+    post = await create_post("Receta", "sopa de tomate casera")
+    assert ids(await search("tomate")) == [post["id"]]
+
+    await client.put(f"{API}/posts/{post['id']}", headers=auth, json={"content": "sopa de calabaza casera"})
+    assert ids(await search("tomate")) == []
+    assert ids(await search("calabaza")) == [post["id"]]
+
+    assert (await client.delete(f"{API}/posts/{post['id']}", headers=auth)).status_code == 204
+    assert ids(await search("calabaza")) == []
+
+    assert (await client.post(f"{API}/posts/{post['id']}/restore", headers=auth)).status_code == 200
+    assert ids(await search("calabaza")) == [post["id"]]
+
+
+@pytest.mark.asyncio
+async def test_comment_search_filters_by_post_and_follows_cascade(client, auth, create_post, search):
+    first, second = await create_post("Uno", "primer post"), await create_post("Dos", "segundo post")
+    comment_ids = []
+    for post in (first, second):
+        response = await client.post(f"{API}/comments/", headers=auth, json={"content": "muy interesante", "post_id": post["id"]})
+        comment_ids.append(response.json()["id"])
+
+    assert sorted(ids(await search("interesante", "/comments/search"))) == comment_ids
+    assert ids(await search("interesante", "/comments/search", post_id=first["id"])) == [comment_ids[0]]
+
+    # El soft delete en cascada del post también saca sus comentarios del índice
+    await client.delete(f"{API}/posts/{first['id']}", headers=auth)
+    assert ids(await search("interesante", "/comments/search")) == [comment_ids[1]]
+    await client.post(f"{API}/posts/{first['id']}/restore", headers=auth)
+    assert sorted(ids(await search("interesante", "/comments/search"))) == comment_ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/posts/search", "/comments/search"])
+async def test_page_outside_ranked_window_is_rejected(search, path):
+    response = await search("algo", path, skip=settings.SEARCH_RANK_CANDIDATES - 10, limit=11)
+    assert response.status_code == 400
+    response = await search("algo", path, skip=settings.SEARCH_RANK_CANDIDATES - 10, limit=10)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_truncated_results_are_flagged(monkeypatch, create_post, search):
+    monkeypatch.setattr(settings, "SEARCH_RANK_CANDIDATES", 3)
+    posts = [await create_post(f"Post {i}", "contenido repetido") for i in range(3)]
+
+    response = await search("repetido", limit=3)
+    assert SEARCH_TRUNCATED_HEADER not in response.headers
+
+    posts.append(await create_post("Post 3", "contenido repetido"))
+    response = await search("repetido", limit=3)
+    assert response.headers[SEARCH_TRUNCATED_HEADER] == "true"
+    # Solo se consideran las coincidencias más recientes
+    assert sorted(ids(response)) == [post["id"] for post in posts[1:]]
+    assert SEARCH_TRUNCATED_HEADER not in (await search("repetido", limit=3, skip=1)).headers
+
+
+@pytest.mark.asyncio
+async def test_common_terms_match_without_scoring(database, monkeypatch, create_post, search):
+    if database.dialect.name != "sqlite":
+        pytest.skip("los términos frecuentes solo se excluyen de bm25 en SQLite")
+    monkeypatch.setattr(settings, "SEARCH_TERM_SAMPLE_SIZE", 2)
+    monkeypatch.setattr(settings, "SEARCH_COMMON_TERM_RATIO", 0.5)
+    rare = await create_post("Raro", "palabra comun y otra rara rara")
+    other = await create_post("Otro", "palabra comun y otra rara")
+    plain = [await create_post(f"Comun {i}", "palabra comun") for i in range(3)]
+
+    # "comun" aparece en todas las filas: sola queda sin puntuar
+    response = await search("comun")
+    assert sorted(ids(response)) == [rare["id"], other["id"], *(post["id"] for post in plain)]
+    assert {row["rank"] for row in response.json()} == {0.0}
+
+    # Con un término raro, bm25 puntúa solo ese término pero se exigen los dos
+    response = await search("comun rara")
+    assert ids(response) == [rare["id"], other["id"]]
+    assert response.json()[0]["rank"] > response.json()[1]["rank"] > 0
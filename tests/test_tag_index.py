@@ -0,0 +1,84 @@
+"""Índice de tags en memoria: recargas y validación de escrituras contra la base"""
+import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, update
+
+from app.core.config import settings
+from app.crud.tag_index import tag_index
+from app.models.models import Tag
+from conftest import API
+
+
+@pytest_asyncio.fixture
+async def tags(db):
+    """Tags python y rust con el índice cargado"""
+    result = await db.execute(insert(Tag).returning(Tag.id), [{"name": "python"}, {"name": "rust"}])
+    ids = result.scalars().all()
+    await db.commit()
+    await tag_index.load(db)
+    return dict(zip(("python", "rust"), ids))
+
+
+async def change_elsewhere(db, stmt) -> None:
+    """Escritura hecha por otro worker: la base cambia pero este índice no se recarga"""
+    await db.execute(stmt)
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_existing_ids_rejects_tag_deleted_elsewhere(db, tags):
+    await change_elsewhere(db, update(Tag).where(Tag.id == tags["rust"]).values(is_deleted=True))
+    assert await tag_index.names_for(db, tags.values()) == ["python", "rust"]
+
+    assert await tag_index.existing_ids(db, [tags["rust"], tags["python"], tags["python"]]) == [tags["python"]]
+    # La confirmación también corrige el índice que usan los listados
+    assert await tag_index.names_for(db, tags.values()) == ["python"]
+    assert await tag_index.id_for_name(db, "rust") is None
+
+
+@pytest.mark.asyncio
+async def test_existing_ids_accepts_tag_created_elsewhere(db, tags):
+    result = await db.execute(insert(Tag).values(name="go").returning(Tag.id))
+    go = result.scalar_one()
+    await db.commit()
+
+    assert await tag_index.existing_ids(db, [go, 999]) == [go]
+    assert await tag_index.names_for(db, [go]) == ["go"]
+
+
+@pytest.mark.asyncio
+async def test_id_for_name_confirms_misses(db, tags):
+    result = await db.execute(insert(Tag).values(name="go").returning(Tag.id))
+    go = result.scalar_one()
+    await db.commit()
+    assert await tag_index.id_for_name(db, "go") == go
+    assert await tag_index.id_for_name(db, "zig") is None
+
+
+@pytest.mark.asyncio
+async def test_reloads_on_new_version_and_after_interval(db, tags, monkeypatch):
+    await change_elsewhere(db, update(Tag).where(Tag.id == tags["rust"]).values(is_deleted=True))
+    await tag_index._shared.set("version", time.time_ns())
+    assert await tag_index.names_for(db, tags.values()) == ["python"]
+
+    await change_elsewhere(db, update(Tag).where(Tag.id == tags["rust"]).values(is_deleted=False))
+    monkeypatch.setattr(settings, "TAG_INDEX_RELOAD_SECONDS", 30.0)
+    assert await tag_index.names_for(db, tags.values()) == ["python"]
+    tag_index._loaded_at -= 31
+    assert await tag_index.names_for(db, tags.values()) == ["python", "rust"]
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_linked_to_tag_deleted_elsewhere(client, db, make_user, headers, tags):
+    await make_user("alice")
+    auth = headers("alice")
+    await change_elsewhere(db, update(Tag).where(Tag.id == tags["rust"]).values(is_deleted=True))
+
+    response = await client.post(f"{API}/posts/", headers=auth, json={
+        "title": "Tags", "content": "un post con tags", "tag_ids": list(tags.values()),
+    })
+    assert response.status_code == 201
+    response = await client.get(f"{API}/posts/{response.json()['id']}/with-relations", headers=auth)
+    assert [tag["name"] for tag in response.json()["tags"]] == ["python"]
@@ -0,0 +1,77 @@
+"""Cache de usuarios autenticados: serialización e invalidación al escribir"""
+import json
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.core.security import _deserialize_user, _serialize_user, user_cache
+from conftest import API
+
+
+@pytest_asyncio.fixture
+async def users(make_user, headers):
+    """Superusuario admin y usuario bob, con bob ya en la cache"""
+    admin = await make_user("admin", is_superuser=True)
+    bob = await make_user("bob")
+    return {"admin": headers("admin"), "bob": headers("bob"), "bob_id": bob.id, "admin_id": admin.id}
+
+
+async def cache_bob(client, users) -> None:
+    assert (await client.get(f"{API}/users/", headers=users["bob"])).status_code == 200
+    assert await user_cache.get("bob") is not None
+
+
+@pytest.mark.asyncio
+async def test_serialization_round_trip_excludes_password(make_user):
+    user = await make_user("alice", name="Alice", is_superuser=True)
+    data = _serialize_user(user)
+
+    assert "hashed_password" not in data
+    # Apto para el backend Redis, que guarda JSON
+    restored = _deserialize_user(json.loads(json.dumps(data)))
+    assert restored.hashed_password is None
+    for key in ("id", "email", "username", "name", "is_active", "is_superuser", "is_deleted"):
+        assert getattr(restored, key) == getattr(user, key)
+    assert isinstance(restored.created_at, datetime)
+    assert restored.created_at == user.created_at
+    assert restored.updated_at == user.updated_at
+
+
+@pytest.mark.asyncio
+async def test_update_evicts_cached_user(client, users):
+    await cache_bob(client, users)
+    response = await client.put(f"{API}/users/{users['bob_id']}", headers=users["admin"], json={"is_active": False})
+    assert response.status_code == 200
+
+    assert await user_cache.get("bob") is None
+    response = await client.get(f"{API}/users/", headers=users["bob"])
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_username_change_evicts_previous_name(client, users):
+    await cache_bob(client, users)
+    response = await client.put(f"{API}/users/{users['bob_id']}", headers=users["admin"], json={"username": "robert"})
+    assert response.status_code == 200
+
+    assert await user_cache.get("bob") is None
+    assert (await client.get(f"{API}/users/", headers=users["bob"])).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_soft_delete_and_restore_evict_cached_user(client, users):
+    await cache_bob(client, users)
+    assert (await client.delete(f"{API}/users/{users['bob_id']}", headers=users["admin"])).status_code == 204
+    assert (await client.get(f"{API}/users/", headers=users["bob"])).status_code == 401
+
+    assert (await client.post(f"{API}/users/{users['bob_id']}/restore", headers=users["admin"])).status_code == 200
+    assert await user_cache.get("bob") is None
+    assert (await client.get(f"{API}/users/", headers=users["bob"])).status_code == 200
+
+
+def test_memory_backend_uses_short_ttl():
+    assert settings.CACHE_BACKEND == "memory"
+    assert user_cache._cache.ttl == settings.USER_CACHE_MEMORY_TTL_SECONDS
+    assert settings.USER_CACHE_MEMORY_TTL_SECONDS < settings.USER_CACHE_TTL_SECONDS